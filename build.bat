@@ -1,7 +1,13 @@
 @echo off
+rem Предварительно масштабируем логотип и анимацию (нужен Pillow) в assets/prescaled - копии вкладываются в exe
+python -m newsparser.assets
 pyinstaller --onefile --noconsole ^
 --icon=assets/SEV.ico ^
 --add-data "assets/*;assets" ^
+--add-data "assets/prescaled/*;assets/prescaled" ^
 --add-data "parsers/*;parsers" ^
+--add-data "newsparser/*;newsparser" ^
+--add-data "tags.json;." ^
+--add-data "newsparser/fixtures/feeds/*;newsparser/fixtures/feeds" ^
 --name NewsParser.exe main.py
-pause
\ No newline at end of file
+pause
@@ -1,6 +1,18 @@
+import time
+_START = time.perf_counter()
+
 import sys
 import subprocess
+import json
 import os
+import threading
+from collections import deque
+
+from newsparser.startup import StartupProfiler
+
+profiler = StartupProfiler(t0=_START)
+profiler.mark("Импорт stdlib")
+
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QPushButton, QVBoxLayout, QWidget,
     QStatusBar, QLabel, QProgressBar, QMessageBox, QScrollArea,
@@ -10,6 +22,13 @@ from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer, QSize
 from PyQt6.QtGui import (QPalette, QLinearGradient, QColor, QBrush,
                         QFont, QPixmap, QIcon, QFontDatabase, QMovie)
 
+profiler.mark("Импорт PyQt6")
+
+from newsparser import assets
+
+# newsparser.metrics и newsparser.proctree (и psutil вместе с ними) импортируются
+# при первом запуске парсера, а не при старте окна
+
 # --- Константы и пути ---
 SCRIPTS = {
     "ИНТЕРФАКС Бизнесс": os.path.join("parsers", "INTERFAX_Business_news.py"),
@@ -19,24 +38,91 @@ SCRIPTS = {
     "RGru Новости": os.path.join("parsers", "RGru_news.py"),
     "ТАСС Новости": os.path.join("parsers", "TASS_news.py"),
     "ИНТЕРФАКС Новости": os.path.join("parsers", "INTERFAX_First_100_news.py"),
+    "RSS Ленты": os.path.join("parsers", "RSS_news.py"),
     "----": os.path.join("parsers", "Test.py")
 }
 
+PYTHON_EXE = os.environ.get("PYTHON_EXE", "python")
+
+FRAME_INTERVAL_MS = 33  # Частота отрисовки консоли и прогресса (~30 кадров в секунду)
+CONSOLE_MAX_LINES = 5000  # Ограничение истории консоли
+
+# Каждый парсер держит свой Chrome, поэтому параллельно запускаем не больше половины ядер
+MAX_PARALLEL_JOBS = max(1, min(4, (os.cpu_count() or 2) // 2))
+
+BUTTON_STYLE = """
+    QPushButton {
+        background-color: #fff12b;
+        color: black;
+        border: none;
+        border-radius: 5px;
+        padding: 10px;
+        font-family: 'DIN Pro Black';
+    }
+    QPushButton:hover {
+        background-color: #fff12b;
+    }
+    QPushButton:disabled {
+        background-color: #aaaaaa;
+    }
+"""
+
+PROGRESS_STYLE = """
+    QProgressBar {
+        border: 2px solid #315045;
+        border-radius: 5px;
+        text-align: center;
+        font-family: 'DIN Pro Black';
+    }
+    QProgressBar::chunk {
+        background-color: #16f062;
+        width: 10px;
+    }
+"""
+
+CONSOLE_STYLE = """
+    QPlainTextEdit {
+        background-color: #1a1a1a;
+        color: #ffffff;
+        border: 1px solid #315045;
+        border-radius: 5px;
+    }
+"""
+
 class ParserWorker(QThread):
-    """Класс для выполнения парсинга в отдельном потоке"""
-    progress = pyqtSignal(int)  # Сигнал прогресса для UI
+    """Класс для выполнения парсинга в отдельном потоке.
+
+    Строки вывода и прогресс не отправляются сигналом на каждую строку:
+    поток складывает их в буфер, а UI забирает накопленное раз в кадр (take_lines).
+    """
     finished = pyqtSignal(str, bool)  # Сигнал завершения (сообщение, успех)
     error = pyqtSignal(str)  # Сигнал ошибки
-    console_output = pyqtSignal(str)  # Сигнал вывода в консоль
+    metrics_ready = pyqtSignal(dict)  # Сигнал итоговых метрик запуска
+
+    ERROR_TAIL_LINES = 20  # Сколько последних строк показывать в сообщении об ошибке
 
     def __init__(self, script_path):
         super().__init__()
         self.script_path = script_path
         self._is_running = True
+        self.cancelled = False
+        self._lines = deque()  # Буфер строк (append/popleft потокобезопасны)
+        self._tail = deque(maxlen=self.ERROR_TAIL_LINES)
         self.current_progress = 0
-        self.last_progress = 0
-        self.progress_timer = QTimer()
-        self.progress_timer.timeout.connect(self.smooth_progress)
+        self.process = None
+
+    def push_line(self, text):
+        """Добавление строки в буфер вывода"""
+        self._lines.append(text)
+
+    def take_lines(self):
+        """Забрать все накопленные строки (вызывается из UI-потока)"""
+        lines = []
+        while True:
+            try:
+                lines.append(self._lines.popleft())
+            except IndexError:
+                return lines
 
     def run(self):
         """Основной метод выполнения парсера"""
@@ -44,64 +130,215 @@ class ParserWorker(QThread):
             if not os.path.exists(self.script_path):
                 raise FileNotFoundError(f"Файл скрипта не найден: {self.script_path}")
 
-            self.console_output.emit(f"Запускаем парсер: {os.path.basename(self.script_path)}")
-            self.console_output.emit(f"Прогружаем страницу сайта, находим кнопки, скролим данные, пожалуйста подождите!")
+            self.push_line(f"Запускаем парсер: {os.path.basename(self.script_path)}")
+            self.push_line(f"Прогружаем страницу сайта, находим кнопки, скролим данные, пожалуйста подождите!")
 
-            process = subprocess.Popen(
-                ["python", self.script_path],
+            from newsparser.metrics import parse_metrics_line
+            from newsparser.records import RECORD_MARKER
+            from newsparser.snapshots import CHANGE_MARKER
+            from newsparser.proctree import popen_group, kill_tree
+
+            # stderr объединён с stdout: иначе вывод tqdm заполняет неразобранный канал и парсер зависает.
+            # Отдельная группа процессов нужна, чтобы при отмене завершить и chromedriver с Chrome
+            self.process = popen_group(
+                [PYTHON_EXE, self.script_path],
                 stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
                 text=True,
-                shell=True,
                 bufsize=1,
                 universal_newlines=True
             )
-
-            self.progress_timer.start(50)  # Таймер для плавного прогресса
-
-            while True:
-                if not self._is_running:
-                    process.terminate()
-                    break
-
-                output = process.stdout.readline() if process.stdout else ''
-                if output == '' and process.poll() is not None:
-                    break
-
-                if output:
-                    self.console_output.emit(output.strip())
-                    if "Progress:" in output:
-                        try:
-                            progress = int(output.split("Progress:")[1].split("%")[0].strip())
-                            self.current_progress = max(0, min(100, progress))
-                            self.progress.emit(self.current_progress)
-                        except Exception as e:
-                            self.console_output.emit(f"Ошибка парсинга прогресса: {e}")
-
-            self.progress_timer.stop()
-            return_code = process.wait()
-
-            if return_code == 0:
+            if not self._is_running:
+                kill_tree(self.process)
+
+            # После отмены дерево процессов убито, readline вернёт '' и цикл завершится
+            for output in iter(self.process.stdout.readline, ''):
+                output = output.strip()
+                if not output:
+                    continue
+
+                run_metrics = parse_metrics_line(output)
+                if run_metrics is not None:
+                    self.metrics_ready.emit(run_metrics)
+                    continue
+
+                # Записи и изменения ленты нужны веб-интерфейсу, в журнал приложения не выводим
+                if output.startswith((RECORD_MARKER, CHANGE_MARKER)):
+                    continue
+
+                self.push_line(output)
+                self._tail.append(output)
+                if "Progress:" in output:
+                    try:
+                        progress = int(output.split("Progress:")[1].split("%")[0].strip())
+                        self.current_progress = max(0, min(100, progress))
+                    except Exception as e:
+                        self.push_line(f"Ошибка парсинга прогресса: {e}")
+
+            return_code = self.process.wait()
+
+            if self.cancelled:
+                self.finished.emit("Остановлено пользователем", False)
+            elif return_code == 0:
                 self.finished.emit("Завершено успешно", True)
             else:
-                error_msg = process.stderr.read() if process.stderr else "Неизвестная ошибка"
+                error_msg = "\n".join(self._tail) or "Неизвестная ошибка"
                 raise subprocess.CalledProcessError(return_code, self.script_path, error_msg)
 
         except Exception as e:
             self.error.emit(str(e))
             self.finished.emit(f"Ошибка: {str(e)}", False)
 
-    def smooth_progress(self):
-        """Плавное увеличение значения прогресс-бара"""
-        if self.last_progress < self.current_progress:
-            self.last_progress += 1
-            self.progress.emit(self.last_progress)
-
-    def stop(self):
-        """Остановка парсера"""
+    def stop(self, wait=False):
+        """Остановка парсера вместе с дочерними процессами (chromedriver, Chrome)"""
         self._is_running = False
-        self.progress_timer.stop()
-        self.terminate()
+        self.cancelled = True
+        if self.process is None:
+            return
+
+        from newsparser.proctree import kill_tree
+        if wait:
+            kill_tree(self.process)
+        else:
+            # Завершение с ожиданием не должно блокировать UI
+            threading.Thread(target=kill_tree, args=(self.process,), daemon=True).start()
+
+class BrowserCheckWorker(QThread):
+    """Проверка пары chromedriver/Chrome в фоне (интерпретатором парсеров, где установлен Selenium)"""
+    checked = pyqtSignal(dict)
+
+    def run(self):
+        try:
+            result = subprocess.run(
+                [PYTHON_EXE, "-m", "newsparser.browser", "--json"],
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                capture_output=True, text=True, timeout=180
+            )
+            lines = result.stdout.strip().splitlines()
+            info = json.loads(lines[-1]) if lines else {"ok": False, "error": result.stderr.strip()[-300:]}
+        except Exception as e:
+            info = {"ok": False, "error": str(e)}
+        self.checked.emit(info)
+
+
+class JobRow(QWidget):
+    """Строка задания на панели: название, прогресс, статус, отмена и собственная консоль"""
+    cancel_requested = pyqtSignal(str)
+
+    def __init__(self, name, font):
+        super().__init__()
+        self.name = name
+        self.worker = None
+        self.shown_progress = 0
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(4)
+
+        header = QHBoxLayout()
+        self.title = QLabel(name)
+        self.title.setFont(font)
+        self.title.setStyleSheet("color: white;")
+        self.title.setMinimumWidth(150)
+        header.addWidget(self.title)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setValue(0)
+        self.progress_bar.setFormat("0%")
+        self.progress_bar.setStyleSheet(PROGRESS_STYLE)
+        header.addWidget(self.progress_bar, 1)
+
+        self.state = QLabel("В очереди")
+        self.state.setStyleSheet("color: white;")
+        self.state.setMinimumWidth(90)
+        header.addWidget(self.state)
+
+        self.log_button = QPushButton("Лог")
+        self.log_button.setCheckable(True)
+        self.log_button.setStyleSheet(BUTTON_STYLE)
+        self.log_button.toggled.connect(self.toggle_log)
+        header.addWidget(self.log_button)
+
+        self.cancel_button = QPushButton("✕")
+        self.cancel_button.setStyleSheet(BUTTON_STYLE)
+        self.cancel_button.setToolTip("Остановить")
+        self.cancel_button.clicked.connect(lambda: self.cancel_requested.emit(self.name))
+        header.addWidget(self.cancel_button)
+        layout.addLayout(header)
+
+        # Консоль создаётся при первом открытии, до этого строки копятся в буфере
+        self.log = None
+        self._backlog = deque(maxlen=CONSOLE_MAX_LINES)
+        self._layout = layout
+
+        self.setLayout(layout)
+
+    def create_log(self):
+        """Создание консоли задания и перенос в неё накопленных строк"""
+        self.log = QPlainTextEdit()
+        self.log.setReadOnly(True)
+        self.log.setFont(QFont("Consolas", 10))
+        self.log.setStyleSheet(CONSOLE_STYLE)
+        self.log.setMaximumHeight(160)
+        self.log.setMaximumBlockCount(CONSOLE_MAX_LINES)
+        self._layout.addWidget(self.log)
+        if self._backlog:
+            self.log.setPlainText("\n".join(self._backlog))
+            self._backlog.clear()
+
+    def reset(self):
+        """Подготовка строки к новому запуску"""
+        self.worker = None
+        self.shown_progress = 0
+        self._backlog.clear()
+        if self.log is not None:
+            self.log.clear()
+        self.update_progress(0)
+        self.set_state("В очереди", "white")
+        self.cancel_button.setEnabled(True)
+
+    def toggle_log(self, visible):
+        if visible and self.log is None:
+            self.create_log()
+        if self.log is not None:
+            self.log.setVisible(visible)
+
+    def set_state(self, text, color):
+        self.state.setText(text)
+        self.state.setStyleSheet(f"color: {color};")
+
+    def update_progress(self, progress):
+        """Обновление прогресса строки"""
+        self.progress_bar.setValue(progress)
+        self.progress_bar.setFormat(f"{progress}%")
+
+    def append_log(self, text):
+        """Добавление текста в консоль задания"""
+        if self.log is None:
+            self._backlog.extend(text.split("\n"))
+            return
+
+        scrollbar = self.log.verticalScrollBar()
+        # Автопрокрутка только если пользователь не пролистал консоль вверх
+        follow = scrollbar is None or scrollbar.value() >= scrollbar.maximum() - 2
+        self.log.appendPlainText(text)
+        if scrollbar and follow:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def render_frame(self):
+        """Отрисовка накопленного за кадр вывода одним вызовом и плавный прогресс"""
+        if self.worker is None:
+            return
+
+        lines = self.worker.take_lines()
+        if lines:
+            # Строки сверх лимита всё равно были бы вытеснены из консоли
+            self.append_log("\n".join(lines[-CONSOLE_MAX_LINES:]))
+
+        target = self.worker.current_progress
+        if self.shown_progress < target:
+            self.shown_progress += max(1, (target - self.shown_progress) // 4)
+            self.update_progress(self.shown_progress)
 
 class NewsParserUI(QMainWindow):
     def __init__(self):
@@ -112,26 +349,97 @@ class NewsParserUI(QMainWindow):
 
         # Инициализация переменных
         self.script_status = QLabel()
-        self.loading_movie = QMovie("loading.gif")
-        self.loading_movie.setScaledSize(QSize(100, 100))
-        self.loading_label = QLabel()
-        self.loading_label.setMovie(self.loading_movie)
-        self.loading_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.loading_label.hide()
-        self.current_worker = None
+        self.browser_status = QLabel()
+        self.browser_worker = None
+        # Анимация загрузки создаётся при первом запуске парсера
+        self.loading_movie = None
+        self.loading_label = None
         self.ready_message = "Готов к работе"
 
-        self.load_fonts()
+        self.jobs = {}  # Строки заданий по имени источника
+        self.pending = deque()  # Задания, ожидающие свободного слота
+
+        # Таймер кадров в UI-потоке: забирает буферы строк и прогресс у всех воркеров
+        self.frame_timer = QTimer(self)
+        self.frame_timer.setInterval(FRAME_INTERVAL_MS)
+        self.frame_timer.timeout.connect(self.render_frame)
+
+        # Шрифты и проверка скриптов откладываются до первой отрисовки окна (finish_startup)
         self.init_ui()
         self.set_gradient_background()
 
+    def finish_startup(self):
+        """Отложенная инициализация: выполняется после того, как окно уже показано"""
+        profiler.mark("Первая итерация цикла событий")
+        self.load_fonts()
+        self.check_scripts_availability()
+        profiler.mark("Шрифты и проверка скриптов")
+        self.check_browser()
+
+        if profiler.enabled:
+            report = profiler.report()
+            if sys.stdout:
+                print(report)
+            self.status.showMessage(f"Окно готово за {profiler.total_ms():.0f} мс")
+
     def load_fonts(self):
         """Загрузка пользовательских шрифтов"""
         font_dir = os.path.join(os.path.dirname(__file__), "fonts")
-        if os.path.exists(font_dir):
-            for font_file in os.listdir(font_dir):
-                if font_file.endswith(('.ttf', '.otf')):
-                    QFontDatabase.addApplicationFont(os.path.join(font_dir, font_file))
+        if not os.path.exists(font_dir):
+            return
+
+        loaded = 0
+        for font_file in os.listdir(font_dir):
+            if font_file.endswith(('.ttf', '.otf')):
+                if QFontDatabase.addApplicationFont(os.path.join(font_dir, font_file)) != -1:
+                    loaded += 1
+
+        # Виджеты уже созданы - переназначаем шрифт, чтобы подхватить зарегистрированные гарнитуры
+        if loaded:
+            for widget in self.din_pro_widgets:
+                widget.setFont(self.din_pro)
+
+    def load_logo(self):
+        """Логотип из кэша уменьшенных копий (масштабирование только при первом запуске)"""
+        path = assets.find_asset(assets.LOGO_CANDIDATES)
+        if path is None:
+            return
+
+        tag = f"{assets.LOGO_SIZE}x{assets.LOGO_SIZE}"
+        prescaled = assets.find_prescaled(path, tag)
+        if prescaled:
+            self.logo.setPixmap(QPixmap(prescaled))
+            return
+        cached = assets.cache_path(path, tag)
+
+        pixmap = QPixmap(path).scaled(assets.LOGO_SIZE, assets.LOGO_SIZE,
+                                    Qt.AspectRatioMode.KeepAspectRatio,
+                                    Qt.TransformationMode.SmoothTransformation)
+        self.logo.setPixmap(pixmap)
+        try:
+            os.makedirs(assets.CACHE_DIR, exist_ok=True)
+            pixmap.save(cached, "PNG")
+        except OSError as e:
+            print(f"[WARN] Не удалось сохранить кэш логотипа: {e}")
+
+    def ensure_loading_animation(self):
+        """Создание анимации загрузки при первом использовании"""
+        if self.loading_label is not None:
+            return
+
+        path = assets.find_asset((assets.LOADING_GIF,)) or assets.LOADING_GIF
+        prescaled = assets.prescaled_gif(path, assets.LOADING_SIZE) if os.path.exists(path) else None
+        self.loading_movie = QMovie(prescaled or path)
+        if prescaled is None:
+            self.loading_movie.setScaledSize(QSize(assets.LOADING_SIZE, assets.LOADING_SIZE))
+        # Кадры декодируются один раз и дальше берутся из памяти
+        self.loading_movie.setCacheMode(QMovie.CacheMode.CacheAll)
+
+        self.loading_label = QLabel()
+        self.loading_label.setMovie(self.loading_movie)
+        self.loading_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.loading_label.hide()
+        self.main_layout.insertWidget(self.main_layout.count() - 1, self.loading_label)
 
     def set_gradient_background(self):
         """Установка градиентного фона окна"""
@@ -151,35 +459,13 @@ class NewsParserUI(QMainWindow):
         # Настройка шрифта для кнопок
         din_pro = QFont("DIN Pro Black", 12)
         din_pro.setWeight(QFont.Weight.Black)
-
-        # Стиль для кнопок
-        button_style = """
-            QPushButton {
-                background-color: #fff12b;
-                color: black;
-                border: none;
-                border-radius: 5px;
-                padding: 10px;
-                font-family: 'DIN Pro Black';
-            }
-            QPushButton:hover {
-                background-color: #fff12b;
-            }
-            QPushButton:disabled {
-                background-color: #aaaaaa;
-            }
-        """
+        self.din_pro = din_pro
+        self.din_pro_widgets = []
+        self.main_layout = main_layout
 
         # Логотип приложения
         self.logo = QLabel()
-        logo_paths = ["SEV.png", os.path.join(os.path.dirname(__file__), "SEV.png")]
-        for path in logo_paths:
-            if os.path.exists(path):
-                pixmap = QPixmap(path).scaled(150, 150,
-                                            Qt.AspectRatioMode.KeepAspectRatio,
-                                            Qt.TransformationMode.SmoothTransformation)
-                self.logo.setPixmap(pixmap)
-                break
+        self.load_logo()
 
         self.logo.setAlignment(Qt.AlignmentFlag.AlignCenter)
         main_layout.addWidget(self.logo)
@@ -187,9 +473,15 @@ class NewsParserUI(QMainWindow):
         # Статус доступности скриптов
         self.script_status.setFont(din_pro)
         self.script_status.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.check_scripts_availability()
+        self.din_pro_widgets.append(self.script_status)
         main_layout.addWidget(self.script_status)
 
+        # Статус браузера (chromedriver/Chrome) - заполняется после фоновой проверки
+        self.browser_status.setFont(din_pro)
+        self.browser_status.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.din_pro_widgets.append(self.browser_status)
+        main_layout.addWidget(self.browser_status)
+
         # Контейнер для кнопок в 2 столбца
         buttons_container = QWidget()
         buttons_layout = QHBoxLayout()
@@ -204,9 +496,10 @@ class NewsParserUI(QMainWindow):
         for i, name in enumerate(SCRIPTS):
             btn = QPushButton(name)
             btn.setFont(din_pro)
-            btn.setStyleSheet(button_style)
+            btn.setStyleSheet(BUTTON_STYLE)
             btn.setMinimumHeight(45)
             btn.clicked.connect(lambda checked, n=name: self.run_parser(n))
+            self.din_pro_widgets.append(btn)
 
             # Распределяем кнопки по столбцам
             if i % 2 == 0:
@@ -223,46 +516,28 @@ class NewsParserUI(QMainWindow):
         # Добавляем контейнер с кнопками в основной layout
         main_layout.addWidget(buttons_container)
 
-        # Прогресс-бар
-        self.progress_bar = QProgressBar()
-        self.progress_bar.setValue(0)
-        self.progress_bar.setFont(din_pro)
-        self.progress_bar.setStyleSheet("""
-            QProgressBar {
-                border: 2px solid #315045;
-                border-radius: 5px;
-                text-align: center;
-                font-family: 'DIN Pro Black';
-            }
-            QProgressBar::chunk {
-                background-color: #16f062;
-                width: 10px;
-            }
-        """)
-        main_layout.addWidget(self.progress_bar)
+        # Запуск всех источников и остановка всех заданий
+        controls_layout = QHBoxLayout()
+        self.run_all_button = QPushButton("Запустить все")
+        self.run_all_button.setFont(din_pro)
+        self.run_all_button.setStyleSheet(BUTTON_STYLE)
+        self.run_all_button.clicked.connect(self.run_all)
+        self.din_pro_widgets.append(self.run_all_button)
+        controls_layout.addWidget(self.run_all_button)
 
-        # Кнопка остановки
-        self.stop_button = QPushButton("Остановить")
+        self.stop_button = QPushButton("Остановить все")
         self.stop_button.setFont(din_pro)
-        self.stop_button.setStyleSheet(button_style)
+        self.stop_button.setStyleSheet(BUTTON_STYLE)
         self.stop_button.setEnabled(False)
-        self.stop_button.clicked.connect(self.stop_parser)
-        main_layout.addWidget(self.stop_button)
-
-        # Консольный вывод
-        self.console_output = QPlainTextEdit()
-        self.console_output.setReadOnly(True)
-        self.console_output.setFont(QFont("Consolas", 10))
-        self.console_output.setStyleSheet("""
-            QPlainTextEdit {
-                background-color: #1a1a1a;
-                color: #ffffff;
-                border: 1px solid #315045;
-                border-radius: 5px;
-            }
-        """)
-        self.console_output.setMaximumHeight(200)
-        main_layout.addWidget(self.console_output)
+        self.stop_button.clicked.connect(self.stop_all)
+        self.din_pro_widgets.append(self.stop_button)
+        controls_layout.addWidget(self.stop_button)
+        main_layout.addLayout(controls_layout)
+
+        # Панель заданий: по строке с прогрессом и консолью на каждый источник
+        self.jobs_layout = QVBoxLayout()
+        self.jobs_layout.setSpacing(8)
+        main_layout.addLayout(self.jobs_layout)
 
         # Статусная строка
         self.status = QStatusBar()
@@ -287,8 +562,8 @@ class NewsParserUI(QMainWindow):
         scroll.setWidgetResizable(True)
         self.setCentralWidget(scroll)
 
-        # Анимация загрузки
-        main_layout.addWidget(self.loading_label)
+        # Анимация загрузки добавляется перед этим растяжителем в ensure_loading_animation
+        main_layout.addStretch()
 
     def check_scripts_availability(self):
         """Проверка доступности скриптов парсеров"""
@@ -304,69 +579,124 @@ class NewsParserUI(QMainWindow):
             self.script_status.setText("✓ Все скрипты доступны")
             self.script_status.setStyleSheet("color: #1eeb74; font-weight: bold;")
 
+    def check_browser(self):
+        """Фоновая проверка chromedriver/Chrome: результат кэшируется и используется всеми парсерами"""
+        self.browser_status.setText("… Проверяем Chrome и chromedriver")
+        self.browser_status.setStyleSheet("color: #8a8a8a;")
+        self.browser_worker = BrowserCheckWorker()
+        self.browser_worker.checked.connect(self.on_browser_checked)
+        self.browser_worker.start()
+
+    def on_browser_checked(self, info):
+        if info.get("ok"):
+            version = info.get("browser_version") or info.get("driver_version") or "версия не определена"
+            self.browser_status.setText(f"✓ Chrome готов к запуску ({version})")
+            self.browser_status.setStyleSheet("color: #1eeb74; font-weight: bold;")
+        else:
+            self.browser_status.setText(f"⚠️ Chrome: {info.get('error') or 'проверка не удалась'}")
+            self.browser_status.setStyleSheet("color: #cf3c28; font-weight: bold;")
+        self.browser_status.setToolTip(f"chromedriver: {info.get('driver_path')}\nChrome: {info.get('browser_path')}")
+
+    def running_jobs(self):
+        return [row for row in self.jobs.values() if row.worker and row.worker.isRunning()]
+
     def run_parser(self, parser_name):
-        """Запуск выбранного парсера"""
+        """Постановка парсера в очередь заданий (запускается сразу, если есть свободный слот)"""
         script = SCRIPTS[parser_name]
 
         if not os.path.exists(script):
             QMessageBox.critical(self, "Ошибка", f"Файл скрипта не найден:\n{script}")
             return
 
-        if self.current_worker and self.current_worker.isRunning():
-            self.current_worker.stop()
-
-        # Подготовка UI к запуску
-        self.console_output.clear()
-        self.clear_status_message()
-        self.progress_bar.setValue(0)
-        self.progress_bar.setFormat("0%")
-        self.logo.hide()
-        self.loading_label.show()
-        self.loading_movie.start()
-
-        # Создание и настройка потока
-        self.current_worker = ParserWorker(script)
-        self.current_worker.progress.connect(self.update_progress)
-        self.current_worker.finished.connect(self.on_parser_finished)
-        self.current_worker.error.connect(self.on_parser_error)
-        self.current_worker.console_output.connect(self.update_console_output)
-
-        # Блокировка кнопок
-        for btn in self.buttons.values():
-            btn.setEnabled(False)
-        self.stop_button.setEnabled(True)
-
-        # Запуск потока
-        self.current_worker.start()
-
-    def update_progress(self, progress):
-        """Обновление прогресса на UI"""
-        self.progress_bar.setValue(progress)
-        self.progress_bar.setFormat(f"{progress}%")
+        row = self.jobs.get(parser_name)
+        if row is None:
+            row = JobRow(parser_name, self.din_pro)
+            row.cancel_requested.connect(self.cancel_job)
+            self.jobs[parser_name] = row
+            self.jobs_layout.addWidget(row)
+        elif parser_name in self.pending or (row.worker and row.worker.isRunning()):
+            return
 
-    def stop_parser(self):
-        """Остановка текущего парсера"""
-        if self.current_worker and self.current_worker.isRunning():
-            self.current_worker.stop()
-            self.ready_status_message()
-            self.progress_bar.setValue(0)
-
-            # Разблокировка кнопок
-            for btn in self.buttons.values():
-                btn.setEnabled(True)
-            self.stop_button.setEnabled(False)
-
-            # Сброс анимации
-            self.loading_movie.stop()
-            self.loading_label.hide()
+        row.reset()
+        self.buttons[parser_name].setEnabled(False)
+        self.pending.append(parser_name)
+        self.start_pending()
+
+    def run_all(self):
+        """Утренний прогон: все источники, не больше MAX_PARALLEL_JOBS одновременно"""
+        for name in SCRIPTS:
+            if not name.startswith("-"):
+                self.run_parser(name)
+
+    def start_pending(self):
+        """Запуск заданий из очереди в свободные слоты"""
+        while self.pending and len(self.running_jobs()) < MAX_PARALLEL_JOBS:
+            name = self.pending.popleft()
+            row = self.jobs[name]
+
+            # Создание и настройка потока
+            worker = ParserWorker(SCRIPTS[name])
+            worker.finished.connect(lambda message, success, n=name: self.on_parser_finished(n, message, success))
+            worker.error.connect(lambda error, n=name: self.on_parser_error(n, error))
+            worker.metrics_ready.connect(lambda run_metrics, n=name: self.show_run_metrics(n, run_metrics))
+            row.worker = worker
+            row.set_state("Выполняется", "#fff12b")
+
+            # Запуск потока
+            worker.start()
+
+        self.update_activity()
+
+    def update_activity(self):
+        """Анимация, кнопки и таймер кадров в зависимости от наличия активных заданий"""
+        active = bool(self.running_jobs() or self.pending)
+        self.stop_button.setEnabled(active)
+        if active:
+            self.ensure_loading_animation()
+            self.clear_status_message()
+            self.logo.hide()
+            self.loading_label.show()
+            self.loading_movie.start()
+            if not self.frame_timer.isActive():
+                self.frame_timer.start()
+        else:
+            self.frame_timer.stop()
+            if self.loading_label is not None:
+                self.loading_movie.stop()
+                self.loading_label.hide()
             self.logo.show()
 
-    def update_console_output(self, text):
-        """Обновление вывода в консольном виджете"""
-        self.console_output.appendPlainText(text)
-        scrollbar = self.console_output.verticalScrollBar()
-        if scrollbar:
-            scrollbar.setValue(scrollbar.maximum())
+    def render_frame(self):
+        """Отрисовка всех строк заданий за один кадр"""
+        for row in self.jobs.values():
+            row.render_frame()
+
+    def cancel_job(self, name):
+        """Отмена одного задания (из очереди или выполняющегося)"""
+        row = self.jobs[name]
+        if name in self.pending:
+            self.pending.remove(name)
+            row.set_state("Отменено", "#cf3c28")
+            self.buttons[name].setEnabled(True)
+            self.update_activity()
+        elif row.worker and row.worker.isRunning():
+            row.set_state("Остановка…", "#cf3c28")
+            row.cancel_button.setEnabled(False)
+            row.worker.stop()
+
+    def stop_all(self):
+        """Остановка всех заданий"""
+        for name in list(self.pending):
+            self.cancel_job(name)
+        for row in self.running_jobs():
+            self.cancel_job(row.name)
+
+    def show_run_metrics(self, name, run_metrics):
+        """Вывод таблицы метрик запуска в консоль задания"""
+        row = self.jobs[name]
+        row.render_frame()  # Сначала строки, пришедшие до метрик
+        from newsparser.metrics import format_summary
+        row.append_log(format_summary(run_metrics))
 
     def clear_status_message(self):
         """Очистка сообщения в статусной строке"""
@@ -374,39 +704,62 @@ class NewsParserUI(QMainWindow):
 
     def ready_status_message(self):
         """Восстановление стандартного сообщения"""
-        self.status.showMessage(self.ready_message)
+        if not self.running_jobs():
+            self.status.setStyleSheet("")
+            self.status.showMessage(self.ready_message)
 
-    def on_parser_finished(self, message, success):
+    def on_parser_finished(self, name, message, success):
         """Обработчик завершения работы парсера"""
+        row = self.jobs[name]
+        # Дорисовываем остаток буфера до отключения воркера
+        row.render_frame()
         color = "#1eeb74" if success else "#cf3c28"
-        self.status.showMessage(f"{message}")
+        if success:
+            row.set_state("Готово", color)
+        else:
+            row.set_state("Остановлено" if row.worker.cancelled else "Ошибка", color)
+        if success:
+            row.update_progress(100)
+        row.cancel_button.setEnabled(False)
+        row.append_log(message)
+        row.worker.wait()
+        row.worker = None
+
+        self.buttons[name].setEnabled(True)
+        self.status.showMessage(f"{name}: {message}")
         self.status.setStyleSheet(f"color: {color};")
 
-        # Разблокировка кнопок
-        for btn in self.buttons.values():
-            btn.setEnabled(True)
-        self.stop_button.setEnabled(False)
-
-        # Сброс анимации
-        self.loading_movie.stop()
-        self.loading_label.hide()
-        self.logo.show()
+        # Освободился слот - запускаем следующее задание из очереди
+        self.start_pending()
 
         # Восстановление стандартного сообщения через 3 секунды
         QTimer.singleShot(3000, self.ready_status_message)
 
-    def on_parser_error(self, error):
-        """Обработчик ошибок парсера"""
-        QMessageBox.critical(self, "Ошибка", f"Произошла ошибка:\n{error[:500]}")
-        self.ready_status_message()
-
-        # Сброс анимации
-        self.loading_movie.stop()
-        self.loading_label.hide()
-        self.logo.show()
+    def on_parser_error(self, name, error):
+        """Обработчик ошибок парсера: текст ошибки в консоль задания, без модального окна"""
+        row = self.jobs[name]
+        row.append_log(f"Произошла ошибка:\n{error[:500]}")
+        row.log_button.setChecked(True)
+
+    def closeEvent(self, event):
+        """При закрытии окна завершаем все деревья процессов, чтобы не оставлять Chrome"""
+        self.pending.clear()
+        workers = [row.worker for row in self.running_jobs()]
+        stoppers = [threading.Thread(target=worker.stop, kwargs={"wait": True}) for worker in workers]
+        for stopper in stoppers:
+            stopper.start()
+        for stopper in stoppers:
+            stopper.join()
+        for worker in workers:
+            worker.wait()
+        super().closeEvent(event)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    profiler.mark("QApplication")
     window = NewsParserUI()
+    profiler.mark("Создание окна")
     window.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    profiler.mark("Показ окна")
+    QTimer.singleShot(0, window.finish_startup)
+    sys.exit(app.exec())
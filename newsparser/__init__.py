@@ -0,0 +1,3 @@
+"""
+Общие компоненты для парсеров новостей, веб-сервера и десктопного приложения.
+"""
@@ -0,0 +1,379 @@
+import json
+import os
+import queue
+import re
+import socket
+import sqlite3
+import threading
+import time
+import urllib.request
+from datetime import datetime, timedelta
+
+from newsparser import assets
+from newsparser.snapshots import item_key
+from newsparser.tagging import Tagger
+from newsparser.workqueue import worker_mode
+
+ALERTS_PATH = os.environ.get("NEWSPARSER_ALERTS", os.path.join(assets.PROJECT_DIR, "alerts.json"))
+# Уже отправленные уведомления (источник, запись, правило): запись в ленте между запусками не шлётся повторно
+FIRED_PATH = os.path.join(assets.PROJECT_DIR, "data", "alerts.sqlite3")
+FIRED_KEEP_DAYS = 30
+
+# Пакет уходит, когда набралось BATCH_SIZE срабатываний или прошло BATCH_INTERVAL секунд
+BATCH_SIZE = 50
+BATCH_INTERVAL = 1.0
+RETRIES = 4
+RETRY_BASE_DELAY = 0.5
+SEND_TIMEOUT = 5.0
+# Сколько парсер ждёт доставки оставшихся уведомлений при завершении
+CLOSE_DEADLINE = 15.0
+
+
+class AlertRule:
+    """
+    Правило уведомления. Все заданные условия должны выполниться:
+    источник из sources, хотя бы одно ключевое слово из keywords, совпадение regex.
+    """
+
+    def __init__(self, name, keywords=None, sources=None, regex=None):
+        self.name = name
+        self.keywords = list(keywords or [])
+        self.sources = set(sources or [])
+        self.regex = re.compile(regex, re.IGNORECASE) if regex else None
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["name"], data.get("keywords"), data.get("sources"), data.get("regex"))
+
+
+class AlertEngine:
+    """
+    Проверка записей по набору правил.
+
+    Ключевые слова всех правил компилируются в один автомат (как словарь тегов),
+    поэтому заголовок просматривается один раз при любом числе правил. Правила без
+    ключевых слов разложены по источникам; регулярные выражения проверяются только
+    у правил-кандидатов.
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.keyword_matcher = Tagger({index: rule.keywords for index, rule in enumerate(self.rules)
+                                       if rule.keywords})
+        # Правила без ключевых слов: по источнику и для всех источников
+        self.by_source = {}
+        self.any_source = []
+        for index, rule in enumerate(self.rules):
+            if rule.keywords:
+                continue
+            if rule.sources:
+                for source in rule.sources:
+                    self.by_source.setdefault(source, []).append(index)
+            else:
+                self.any_source.append(index)
+
+    def match(self, source, title):
+        """Имена сработавших правил"""
+        candidates = self.keyword_matcher.tags(title)
+        candidates.extend(self.by_source.get(source, ()))
+        candidates.extend(self.any_source)
+
+        matched = []
+        for index in candidates:
+            rule = self.rules[index]
+            if rule.sources and source not in rule.sources:
+                continue
+            if rule.regex is not None and not rule.regex.search(title or ""):
+                continue
+            matched.append(rule.name)
+        return matched
+
+
+def _send_webhook(url, payload, timeout=SEND_TIMEOUT):
+    request = urllib.request.Request(url, data=payload, method="POST",
+                                     headers={"Content-Type": "application/json; charset=utf-8"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        response.read()
+
+
+def _send_socket(address, payload, timeout=SEND_TIMEOUT):
+    """address: tcp://host:port или unix:///path/to.sock; пакет отправляется одной JSON-строкой"""
+    if address.startswith("unix://"):
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        target = address[len("unix://"):]
+    else:
+        host, _, port = address[len("tcp://"):].rpartition(":")
+        conn = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        target = (host or "127.0.0.1", int(port))
+    conn.settimeout(timeout)
+    try:
+        conn.connect(target)
+        conn.sendall(payload + b"\n")
+    finally:
+        conn.close()
+
+
+class FiredAlerts:
+    """
+    Журнал отправленных уведомлений (SQLite): ключ - источник, запись (каноническая ссылка
+    или хэш заголовка) и правило. Правило срабатывает на запись один раз, сколько бы запусков
+    она ни провисела в ленте. Записи старше FIRED_KEEP_DAYS удаляются при открытии.
+    """
+
+    def __init__(self, path=FIRED_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = self.connect()
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS fired (
+                source TEXT NOT NULL,
+                key TEXT NOT NULL,
+                rule TEXT NOT NULL,
+                fired_at TEXT NOT NULL,
+                PRIMARY KEY (source, key, rule)
+            ) WITHOUT ROWID
+        """)
+        cutoff = (datetime.now() - timedelta(days=FIRED_KEEP_DAYS)).isoformat(timespec="seconds")
+        self._conn.execute("DELETE FROM fired WHERE fired_at < ?", (cutoff,))
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def claim(self, source, key, rules):
+        """Правила из rules, которые для этой записи ещё не срабатывали (и теперь отмечены)"""
+        now = datetime.now().isoformat(timespec="seconds")
+        fresh = []
+        with self._lock:
+            for rule in rules:
+                cursor = self._conn.execute("INSERT OR IGNORE INTO fired (source, key, rule, fired_at) VALUES (?, ?, ?, ?)",
+                                            (source, key, rule, now))
+                if cursor.rowcount:
+                    fresh.append(rule)
+        return fresh
+
+    def release(self, alerts):
+        """Уведомления не доставлены ни одним каналом: следующий запуск отправит их снова"""
+        with self._lock:
+            self._conn.executemany("DELETE FROM fired WHERE source = ? AND key = ? AND rule = ?",
+                                   [(alert["source"], alert["key"], rule) for alert in alerts for rule in alert["rules"]])
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class AlertDispatcher:
+    """
+    Фоновая доставка уведомлений пакетами с повторами.
+    Сбор новостей не ждёт сеть: emit() только кладёт запись в очередь.
+
+    Каждый канал (вебхук, сокет) повторяется отдельно: доставленный пакет не уходит в канал
+    ещё раз из-за сбоя другого. После close() повторы укладываются в его срок, а всё,
+    что не успело уйти, считается недоставленным. on_failed(batch) вызывается для пакета,
+    который не принял ни один канал.
+    """
+
+    def __init__(self, webhook=None, socket_address=None, on_failed=None):
+        self.webhook = webhook
+        self.socket_address = socket_address
+        self.on_failed = on_failed
+        self.sent = 0
+        self.failed = 0
+        self._pending = 0
+        self._deadline = None
+        self._counts_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+        self._thread.start()
+
+    def put(self, alert):
+        with self._counts_lock:
+            self._pending += 1
+        self._queue.put(alert)
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = BATCH_INTERVAL if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+                if item is not None:
+                    batch.append(item)
+                    if deadline is None:
+                        deadline = time.monotonic() + BATCH_INTERVAL
+            except queue.Empty:
+                pass
+            done = self._stopped.is_set() and self._queue.empty()
+            if batch and (done or len(batch) >= BATCH_SIZE or time.monotonic() >= deadline):
+                self._deliver(batch)
+                batch, deadline = [], None
+            if done:
+                return
+
+    def _remaining(self):
+        return None if self._deadline is None else self._deadline - time.monotonic()
+
+    def _send_with_retries(self, send, target, payload):
+        error = None
+        for attempt in range(RETRIES):
+            remaining = self._remaining()
+            if remaining is not None and remaining <= 0:
+                break
+            try:
+                send(target, payload, SEND_TIMEOUT if remaining is None else min(SEND_TIMEOUT, remaining))
+                return None
+            except Exception as e:
+                error = e
+            delay = RETRY_BASE_DELAY * (2 ** attempt)
+            remaining = self._remaining()
+            if attempt == RETRIES - 1 or (remaining is not None and remaining <= delay):
+                break
+            time.sleep(delay)
+        return error or TimeoutError("истёк срок доставки")
+
+    def _deliver(self, batch):
+        payload = json.dumps({"alerts": batch}, ensure_ascii=False).encode("utf-8")
+        channels = [(name, send, target) for name, send, target in
+                    (("вебхук", _send_webhook, self.webhook), ("сокет", _send_socket, self.socket_address)) if target]
+        errors = {}
+        for name, send, target in channels:
+            error = self._send_with_retries(send, target, payload)
+            if error is not None:
+                errors[name] = error
+        with self._counts_lock:
+            self._pending -= len(batch)
+            if errors:
+                self.failed += len(batch)
+            else:
+                self.sent += len(batch)
+        if errors:
+            print(f"[WARN] Уведомления не доставлены ({len(batch)} шт.): "
+                  + "; ".join(f"{name}: {error}" for name, error in errors.items()))
+            if len(errors) == len(channels) and self.on_failed is not None:
+                try:
+                    self.on_failed(batch)
+                except Exception as e:
+                    print(f"[WARN] Не удалось снять отметку об отправке уведомлений: {e}")
+
+    def close(self, timeout=CLOSE_DEADLINE):
+        self._deadline = time.monotonic() + timeout
+        self._stopped.set()
+        # Пустой элемент будит поток, если он ждёт без таймаута
+        self._queue.put(None)
+        # Запас на последнюю попытку: таймаут отправки тоже ограничен сроком
+        self._thread.join(timeout + 1.0)
+        if self._thread.is_alive():
+            with self._counts_lock:
+                self.failed += self._pending
+                self._pending = 0
+
+
+class AlertStream:
+    """
+    Уведомления одного запуска парсера. Парсер вызывает emit() для каждой
+    собранной новости; без файла правил все вызовы ничего не делают.
+    """
+
+    def __init__(self, source, path=ALERTS_PATH):
+        self.source = source
+        self.path = path
+        self.engine = None
+        self.dispatcher = None
+        self.fired = None
+        self.matched = 0
+        self.repeated = 0
+        self._loaded = False
+
+    def _load(self):
+        self._loaded = True
+        # Под рабочим очереди уведомления не отправляются: записи попадут к координатору
+        if worker_mode() or not os.path.isfile(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                config = json.load(f)
+            rules = [AlertRule.from_dict(rule) for rule in config.get("rules", [])]
+            if not rules or not (config.get("webhook") or config.get("socket")):
+                return
+            self.engine = AlertEngine(rules)
+            self.fired = FiredAlerts()
+            self.dispatcher = AlertDispatcher(config.get("webhook"), config.get("socket"), on_failed=self.fired.release)
+        except Exception as e:
+            print(f"[WARN] Не удалось загрузить правила уведомлений: {e}")
+
+    def emit(self, title, link=None, date=None):
+        if not self._loaded:
+            self._load()
+        if self.engine is None:
+            return
+        rules = self.engine.match(self.source, title)
+        if not rules:
+            return
+        key = item_key(link, title)
+        fresh = self.fired.claim(self.source, key, rules)
+        if not fresh:
+            # Запись всё ещё в ленте или восстановлена из журнала - уведомление уже отправлялось
+            self.repeated += 1
+            return
+        self.matched += 1
+        self.dispatcher.put({
+            "rules": fresh,
+            "key": key,
+            "source": self.source,
+            "title": title,
+            "url": link,
+            "date": date,
+            "detected_at": datetime.now().isoformat(timespec="seconds"),
+        })
+
+    def stream(self, records):
+        """Проверка правил для каждой записи потока extract_news (записи идут дальше без изменений)"""
+        for record in records:
+            self.emit(record.title, record.url, record.raw_date)
+            yield record
+
+    def close(self):
+        """Доставка оставшихся уведомлений перед выходом"""
+        if self.dispatcher is None:
+            return
+        self.dispatcher.close()
+        self.fired.close()
+        print(f"[INFO] Уведомлений: сработало {self.matched}, доставлено {self.dispatcher.sent}, "
+              f"не доставлено {self.dispatcher.failed}, уже отправлялись раньше {self.repeated}")
+
+
+def run_stub(port=8765):
+    """Локальный приёмник вебхука для проверки доставки: печатает полученные уведомления"""
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            try:
+                alerts = json.loads(body).get("alerts", [])
+            except ValueError:
+                alerts = []
+            for alert in alerts:
+                print(f"[ALERT] {', '.join(alert.get('rules', []))} | {alert.get('source')} | "
+                      f"{alert.get('title')} | {alert.get('url')}", flush=True)
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    print(f"[INFO] Приёмник уведомлений: http://127.0.0.1:{port}/")
+    HTTPServer(("127.0.0.1", port), StubHandler).serve_forever()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Тестовый приёмник уведомлений")
+    parser.add_argument("--port", type=int, default=8765)
+    run_stub(parser.parse_args().port)
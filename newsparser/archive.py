@@ -0,0 +1,528 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+from newsparser import dedup
+from newsparser.records import canonical_url, parse_date
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARCHIVE_PATH = os.path.join(PROJECT_DIR, "data", "archive.sqlite3")
+
+# Похожие заголовки склеиваются в сюжет только внутри этого окна,
+# иначе ежедневные «Курс доллара снизился...» слились бы в один кластер
+CLUSTER_WINDOW_HOURS = 48
+
+# Сводки числа публикаций: формат корзины времени и окно по умолчанию для series()
+ROLLUP_FORMATS = {"hour": "%Y-%m-%dT%H", "day": "%Y-%m-%d"}
+ROLLUP_STEPS = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+ROLLUP_DEFAULT_HOURS = {"hour": 7 * 24, "day": 90 * 24}
+MAX_ROLLUP_BUCKETS = 20000
+# Сюжетов в одном запросе IN (...) при выборке публикаций (предел параметров SQLite - 999 в старых сборках)
+STORY_CHUNK = 500
+
+# PRAGMA user_version архива: 1 - ссылки записей в канонической форме (records.canonical_url)
+SCHEMA_VERSION = 1
+
+
+class NewsArchive:
+    """
+    Общий архив новостей всех парсеров (SQLite).
+
+    Каждая запись получает номер сюжета (cluster_id): MinHash-сигнатура заголовка
+    раскладывается по корзинам LSH, и новая запись сравнивается только с записями
+    из совпавших корзин. Вставка инкрементальная и безопасна для параллельных парсеров.
+    """
+
+    def __init__(self, path=ARCHIVE_PATH, window_hours=CLUSTER_WINDOW_HOURS,
+                 threshold=dedup.SIMILARITY_THRESHOLD):
+        self.path = path
+        self.window_hours = window_hours
+        self.threshold = threshold
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._init_schema()
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _init_schema(self):
+        conn = self.connect()
+        try:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS records (
+                    id INTEGER PRIMARY KEY,
+                    source TEXT NOT NULL,
+                    title TEXT,
+                    url TEXT UNIQUE,
+                    date_raw TEXT,
+                    collected_at TEXT NOT NULL,
+                    cluster_id INTEGER,
+                    signature BLOB,
+                    tags TEXT,
+                    published_at TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_records_cluster ON records(cluster_id);
+                CREATE INDEX IF NOT EXISTS idx_records_collected ON records(collected_at);
+                CREATE INDEX IF NOT EXISTS idx_records_source ON records(source, collected_at);
+
+                CREATE TABLE IF NOT EXISTS lsh (
+                    band INTEGER NOT NULL,
+                    bucket INTEGER NOT NULL,
+                    record_id INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_lsh_bucket ON lsh(band, bucket);
+
+                CREATE TABLE IF NOT EXISTS record_tags (
+                    tag TEXT NOT NULL,
+                    record_id INTEGER NOT NULL,
+                    PRIMARY KEY (tag, record_id)
+                );
+            """)
+            # Архивы, созданные до появления тегов
+            columns = [row["name"] for row in conn.execute("PRAGMA table_info(records)")]
+            if "tags" not in columns:
+                conn.execute("ALTER TABLE records ADD COLUMN tags TEXT")
+            # Архивы до хранения распознанной даты: у старых записей она берётся из date_raw
+            if "published_at" not in columns:
+                conn.execute("ALTER TABLE records ADD COLUMN published_at TEXT")
+            # Сводки по часам и дням (tag = '' - все записи источника); архивы до их появления досчитываются
+            has_rollups = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'rollups'").fetchone()
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rollups (
+                    granularity TEXT NOT NULL,
+                    tag TEXT NOT NULL,
+                    bucket TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (granularity, tag, bucket, source)
+                ) WITHOUT ROWID
+            """)
+            if not has_rollups:
+                self._rebuild_rollups(conn)
+            if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                self._canonicalize_urls(conn)
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        finally:
+            conn.close()
+
+    def _canonicalize_urls(self, conn):
+        """
+        Ссылки архивов до канонической формы приводятся к ней, иначе та же новость с меткой
+        рассылки и без неё попадёт в архив дважды. Если каноническая ссылка уже есть
+        у другой записи, у дубликата ссылка снимается (запись и её сюжет остаются).
+        """
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute("SELECT id, url FROM records WHERE url IS NOT NULL").fetchall()
+            taken = {row["url"] for row in rows}
+            changed = 0
+            for row in rows:
+                url = canonical_url(row["url"])
+                if url == row["url"]:
+                    continue
+                if url in taken:
+                    url = None
+                else:
+                    taken.add(url)
+                taken.discard(row["url"])
+                conn.execute("UPDATE records SET url = ? WHERE id = ?", (url, row["id"]))
+                changed += 1
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if changed:
+            print(f"[INFO] Ссылки архива приведены к канонической форме: {changed}")
+
+    def _find_cluster(self, conn, signature, keys, window_start):
+        """Лучший сюжет среди кандидатов из корзин LSH (или None)"""
+        best_cluster, best_score = None, 0.0
+        seen = set()
+        for band, bucket in keys:
+            rows = conn.execute("""
+                SELECT r.id, r.cluster_id, r.signature
+                FROM lsh l JOIN records r ON r.id = l.record_id
+                WHERE l.band = ? AND l.bucket = ? AND r.collected_at >= ?
+            """, (band, bucket, window_start))
+            for row in rows:
+                if row["id"] in seen:
+                    continue
+                seen.add(row["id"])
+                score = dedup.similarity(signature, dedup.signature_from_bytes(row["signature"]))
+                if score > best_score:
+                    best_cluster, best_score = row["cluster_id"], score
+        return best_cluster if best_score >= self.threshold else None
+
+    def ingest(self, source, news_data):
+        """
+        Добавление новостей одного запуска в архив.
+        news_data['published_at'] - даты, уже распознанные конвейером (NormalizeDates); без этого
+        ключа (вызов со словарём столбцов) дата разбирается из news_data['date'].
+        Возвращает номера сюжетов в порядке news_data['name'].
+        """
+        titles = news_data.get('name', [])
+        links = news_data.get('link', [None] * len(titles))
+        dates = news_data.get('date', [None] * len(titles))
+        tags = news_data.get('tags') or [[] for _ in titles]
+
+        now = datetime.now()
+        published = news_data.get('published_at')
+        if published is None:
+            published = [parse_date(date, now=now) for date in dates]
+        collected_at = now.isoformat(timespec="seconds")
+        window_start = (now - timedelta(hours=self.window_hours)).isoformat(timespec="seconds")
+
+        clusters = []
+        rollups = {}
+        conn = self.connect()
+        try:
+            # Одна транзакция на пакет: параллельные парсеры не назначат сюжеты наперегонки
+            conn.execute("BEGIN IMMEDIATE")
+            for title, link, date, record_tags, published_at in zip(titles, links, dates, tags, published):
+                url = canonical_url(link) if link and str(link).startswith("http") else None
+                if url:
+                    existing = conn.execute("SELECT cluster_id FROM records WHERE url = ?", (url,)).fetchone()
+                    if existing:
+                        clusters.append(existing["cluster_id"])
+                        continue
+
+                signature = dedup.minhash(title)
+                keys = dedup.band_keys(signature)
+                cluster_id = self._find_cluster(conn, signature, keys, window_start)
+
+                cursor = conn.execute("""
+                    INSERT INTO records (source, title, url, date_raw, collected_at, cluster_id, signature, tags,
+                                         published_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (source, title, url, date, collected_at, cluster_id,
+                      dedup.signature_to_bytes(signature), ",".join(record_tags),
+                      published_at.isoformat(timespec="minutes") if published_at else None))
+                record_id = cursor.lastrowid
+                if cluster_id is None:
+                    cluster_id = record_id
+                    conn.execute("UPDATE records SET cluster_id = ? WHERE id = ?", (cluster_id, record_id))
+                conn.executemany("INSERT INTO lsh (band, bucket, record_id) VALUES (?, ?, ?)",
+                                 [(band, bucket, record_id) for band, bucket in keys])
+                conn.executemany("INSERT OR IGNORE INTO record_tags (tag, record_id) VALUES (?, ?)",
+                                 [(tag, record_id) for tag in record_tags])
+                _count_rollups(rollups, source, published_at or now, record_tags)
+                clusters.append(cluster_id)
+            self._add_rollups(conn, rollups)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return clusters
+
+    @staticmethod
+    def _add_rollups(conn, rollups):
+        conn.executemany("""
+            INSERT INTO rollups (granularity, tag, bucket, source, count) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (granularity, tag, bucket, source) DO UPDATE SET count = count + excluded.count
+        """, [key + (count,) for key, count in rollups.items()])
+
+    def _rebuild_rollups(self, conn):
+        """Пересчёт сводок по всем записям архива (один раз для архивов, созданных до сводок)"""
+        rollups = {}
+        rows = conn.execute("SELECT source, date_raw, published_at, collected_at, tags FROM records")
+        for row in rows:
+            collected_at = datetime.fromisoformat(row["collected_at"])
+            if row["published_at"]:
+                published = datetime.fromisoformat(row["published_at"])
+            else:
+                published = parse_date(row["date_raw"], now=collected_at) or collected_at
+            _count_rollups(rollups, row["source"], published, row["tags"].split(",") if row["tags"] else [])
+        conn.execute("DELETE FROM rollups")
+        self._add_rollups(conn, rollups)
+        if rollups:
+            print(f"[INFO] Сводки публикаций пересчитаны: {len(rollups)} корзин")
+
+    def rebuild_rollups(self):
+        conn = self.connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            self._rebuild_rollups(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def series(self, granularity="hour", since_hours=None, source=None, tag=None, group="source"):
+        """
+        Число публикаций по часам или дням из готовых сводок (без просмотра записей).
+        group="source" - ряд на источник (tag - фильтр), group="tag" - ряд на тег (source - фильтр).
+        Ряды плотные, с нулями: i-е значение относится к корзине start + i * step секунд.
+        """
+        if granularity not in ROLLUP_FORMATS:
+            raise ValueError(f"granularity: {', '.join(ROLLUP_FORMATS)}")
+        fmt, step = ROLLUP_FORMATS[granularity], ROLLUP_STEPS[granularity]
+        hours = since_hours or ROLLUP_DEFAULT_HOURS[granularity]
+        current = datetime.strptime(datetime.now().strftime(fmt), fmt)
+        size = min(int(timedelta(hours=hours) / step) + 1, MAX_ROLLUP_BUCKETS)
+        first = current - step * (size - 1)
+        index = {(first + step * i).strftime(fmt): i for i in range(size)}
+
+        query = "SELECT bucket, source, tag, count FROM rollups WHERE granularity = ? AND bucket >= ?"
+        params = [granularity, first.strftime(fmt)]
+        if group == "tag":
+            query += " AND tag != ''"
+            if source:
+                query += " AND source = ?"
+                params.append(source)
+        else:
+            query += " AND tag = ?"
+            params.append(tag or "")
+            if source:
+                query += " AND source = ?"
+                params.append(source)
+
+        series = {}
+        conn = self.connect()
+        try:
+            for row in conn.execute(query, params):
+                position = index.get(row["bucket"])
+                if position is None:
+                    continue
+                key = row["tag"] if group == "tag" else row["source"]
+                series.setdefault(key, [0] * size)[position] += row["count"]
+        finally:
+            conn.close()
+        return {
+            "granularity": granularity,
+            "start": first.isoformat(timespec="seconds"),
+            "step": int(step.total_seconds()),
+            "buckets": size,
+            "series": series,
+            "totals": {key: sum(values) for key, values in series.items()},
+        }
+
+    def records(self, source=None, tag=None, since_hours=None, limit=100, before_id=None):
+        """
+        Последние записи архива с фильтрами по источнику, тегу и периоду.
+        before_id - постраничная выдача: записи старше указанной (по id, без OFFSET)
+        """
+        query = "SELECT id, source, title, url, date_raw, published_at, collected_at, cluster_id, tags FROM records"
+        conditions, params = [], []
+        if source:
+            conditions.append("source = ?")
+            params.append(source)
+        if tag:
+            conditions.append("id IN (SELECT record_id FROM record_tags WHERE tag = ?)")
+            params.append(tag)
+        if since_hours:
+            conditions.append("collected_at >= ?")
+            params.append((datetime.now() - timedelta(hours=since_hours)).isoformat(timespec="seconds"))
+        if before_id:
+            conditions.append("id < ?")
+            params.append(before_id)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+
+        conn = self.connect()
+        try:
+            records = []
+            for row in conn.execute(query, params):
+                record = dict(row)
+                record["tags"] = record["tags"].split(",") if record["tags"] else []
+                records.append(record)
+            return records
+        finally:
+            conn.close()
+
+    def after_id(self, after_id=0, limit=5000):
+        """Записи с id больше after_id по возрастанию id - для инкрементальных индексов поверх архива"""
+        conn = self.connect()
+        try:
+            return [dict(row) for row in conn.execute("""
+                SELECT id, source, title, collected_at FROM records WHERE id > ? ORDER BY id LIMIT ?
+            """, (after_id, limit))]
+        finally:
+            conn.close()
+
+    def by_ids(self, ids):
+        """Записи по списку id (словарь id -> запись)"""
+        ids = list(ids)
+        if not ids:
+            return {}
+        conn = self.connect()
+        try:
+            rows = conn.execute(f"""
+                SELECT id, source, title, url, date_raw, published_at, collected_at, cluster_id, tags
+                FROM records WHERE id IN ({",".join("?" * len(ids))})
+            """, ids)
+            result = {}
+            for row in rows:
+                record = dict(row)
+                record["tags"] = record["tags"].split(",") if record["tags"] else []
+                result[record["id"]] = record
+            return result
+        finally:
+            conn.close()
+
+    def tag_counts(self, since_hours=None):
+        """Число записей по каждому тегу"""
+        query = "SELECT t.tag, COUNT(*) AS count FROM record_tags t"
+        params = []
+        if since_hours:
+            query += " JOIN records r ON r.id = t.record_id WHERE r.collected_at >= ?"
+            params.append((datetime.now() - timedelta(hours=since_hours)).isoformat(timespec="seconds"))
+        query += " GROUP BY t.tag ORDER BY count DESC"
+        conn = self.connect()
+        try:
+            return {row["tag"]: row["count"] for row in conn.execute(query, params)}
+        finally:
+            conn.close()
+
+    def stories(self, since_hours=None, limit=None, tag=None):
+        """Сюжеты: одна строка на кластер (первый заголовок, источники, ссылки, число публикаций)"""
+        query = """
+            SELECT cluster_id,
+                   MIN(collected_at) AS first_seen,
+                   MAX(collected_at) AS last_seen,
+                   COUNT(*) AS count,
+                   GROUP_CONCAT(DISTINCT source) AS sources
+            FROM records
+        """
+        conditions, params = [], []
+        if since_hours:
+            conditions.append("collected_at >= ?")
+            params.append((datetime.now() - timedelta(hours=since_hours)).isoformat(timespec="seconds"))
+        if tag:
+            # Сюжет попадает в выборку, если тег есть хотя бы у одной публикации
+            conditions.append("""cluster_id IN (SELECT r.cluster_id FROM record_tags t
+                                 JOIN records r ON r.id = t.record_id WHERE t.tag = ?)""")
+            params.append(tag)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " GROUP BY cluster_id ORDER BY last_seen DESC"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        conn = self.connect()
+        try:
+            stories = [dict(row, title=None, links=[], tags=set()) for row in conn.execute(query, params)]
+            by_cluster = {story["cluster_id"]: story for story in stories}
+            # Публикации всех сюжетов - пачками IN (...), а не запросом на каждый сюжет
+            ids = list(by_cluster)
+            for start in range(0, len(ids), STORY_CHUNK):
+                chunk = ids[start:start + STORY_CHUNK]
+                rows = conn.execute(f"""
+                    SELECT cluster_id, title, url, tags FROM records
+                    WHERE cluster_id IN ({",".join("?" * len(chunk))}) ORDER BY id
+                """, chunk)
+                for r in rows:
+                    story = by_cluster[r["cluster_id"]]
+                    if story["title"] is None:
+                        story["title"] = r["title"]
+                    if r["url"]:
+                        story["links"].append(r["url"])
+                    if r["tags"]:
+                        story["tags"].update(r["tags"].split(","))
+            for story in stories:
+                story["tags"] = sorted(story["tags"])
+            return stories
+        finally:
+            conn.close()
+
+    def export_stories(self, output_path, since_hours=None, tag=None):
+        """Выгрузка в Excel по одной строке на сюжет (опционально только с тегом tag)"""
+        import pandas as pd
+
+        stories = self.stories(since_hours=since_hours, tag=tag)
+        df = pd.DataFrame({
+            'Сюжет': [s['cluster_id'] for s in stories],
+            'Название': [s['title'] for s in stories],
+            'Источники': [s['sources'] for s in stories],
+            'Публикаций': [s['count'] for s in stories],
+            'Теги': [", ".join(s['tags']) for s in stories],
+            'Ссылки': ["\n".join(s['links']) for s in stories],
+            'Впервые': [s['first_seen'] for s in stories],
+        })
+        df.to_excel(output_path, index=False, sheet_name='Сюжеты')
+        print(f"[INFO] Сюжетов выгружено: {len(stories)} -> {output_path}")
+
+
+def _count_rollups(rollups, source, published, tags):
+    """Учёт одной записи в сводках пакета: часы и дни, общий ряд источника и ряды его тегов"""
+    for granularity, fmt in ROLLUP_FORMATS.items():
+        bucket = published.strftime(fmt)
+        for tag in [""] + [tag for tag in tags if tag]:
+            key = (granularity, tag, bucket, source)
+            rollups[key] = rollups.get(key, 0) + 1
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def shared_archive(path=None):
+    """
+    Архив процесса (сервер, пачки конвейера): схема проверяется один раз на файл,
+    а не в каждом запросе и каждой пачке. Новый объект - только для другого пути
+    """
+    path = path or ARCHIVE_PATH
+    with _shared_lock:
+        archive = _shared.get(path)
+        if archive is None:
+            archive = _shared[path] = NewsArchive(path)
+        return archive
+
+
+def archive_news(source, news_data):
+    """
+    Запись результатов парсера в архив с назначением сюжетов.
+    Ошибка архива не должна мешать сохранению Excel, поэтому возвращает [] при сбое.
+    """
+    try:
+        return shared_archive().ingest(source, news_data)
+    except Exception as e:
+        print(f"[WARN] Не удалось записать новости в архив: {e}")
+        return []
+
+
+def archive_records(records):
+    """
+    Запись списка NewsRecord в архив (по источникам записей), номер сюжета - в record.cluster
+    """
+    groups = {}
+    for record in records:
+        groups.setdefault(record.source, []).append(record)
+    for source, group in groups.items():
+        news_data = {
+            'name': [record.title for record in group],
+            'link': [record.url for record in group],
+            'date': [record.raw_date for record in group],
+            'published_at': [record.published_at for record in group],
+            'tags': [record.tags or [] for record in group],
+        }
+        for record, cluster in zip(group, archive_news(source, news_data)):
+            record.cluster = cluster
+    return records
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Выгрузка сюжетов из архива новостей")
+    parser.add_argument("output", nargs="?", help="Путь к Excel-файлу")
+    parser.add_argument("--hours", type=int, default=24, help="Период, часов (по умолчанию 24)")
+    parser.add_argument("--tag", help="Только сюжеты с этим тегом")
+    parser.add_argument("--rebuild-rollups", action="store_true", help="Пересчитать сводки публикаций по часам и дням")
+    args = parser.parse_args()
+    if args.rebuild_rollups:
+        NewsArchive().rebuild_rollups()
+    elif args.output:
+        NewsArchive().export_stories(args.output, since_hours=args.hours, tag=args.tag)
+    else:
+        parser.error("укажите путь к Excel-файлу или --rebuild-rollups")
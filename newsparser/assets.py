@@ -0,0 +1,132 @@
+import hashlib
+import os
+import sys
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+if os.name == "nt":
+    CACHE_DIR = os.path.join(os.environ.get("LOCALAPPDATA", os.path.expanduser("~")), "NewsParser", "cache")
+else:
+    CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "newsparser")
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Уменьшенные копии, подготовленные перед сборкой (python -m newsparser.assets) и вложенные в exe
+PRESCALED_DIR = os.path.join(PROJECT_DIR, "assets", "prescaled")
+
+LOGO_CANDIDATES = ("SEV.png", "SEV.PNG")
+LOGO_SIZE = 150
+LOADING_GIF = "loading.gif"
+LOADING_SIZE = 100
+
+
+def find_asset(names):
+    """Первый существующий файл из списка (относительно текущей папки и корня проекта)"""
+    for base in (os.getcwd(), PROJECT_DIR):
+        for name in names:
+            path = os.path.join(base, name)
+            if os.path.isfile(path):
+                return path
+    return None
+
+
+_digests = {}
+
+
+def content_digest(src):
+    """
+    Хэш содержимого файла. В onefile-сборке ресурсы распаковываются в новую временную папку
+    при каждом запуске, поэтому ключ кэша не может зависеть от пути или времени изменения.
+    """
+    stat = os.stat(src)
+    marker = (os.path.abspath(src), stat.st_size, stat.st_mtime_ns)
+    if marker not in _digests:
+        digest = hashlib.blake2b(digest_size=8)
+        with open(src, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        _digests[marker] = digest.hexdigest()
+    return _digests[marker]
+
+
+def cache_path(src, tag, cache_dir=CACHE_DIR):
+    """
+    Путь к кэшированной производной файла src. Ключ - содержимое исходника и tag,
+    поэтому при замене картинки кэш пересобирается сам, а перенос файла его не сбрасывает.
+    """
+    stem, ext = os.path.splitext(os.path.basename(src))
+    return os.path.join(cache_dir, f"{stem}-{tag}-{content_digest(src)}{ext.lower()}")
+
+
+def find_prescaled(src, tag):
+    """Готовая производная: вложенная в сборку (PRESCALED_DIR) или из кэша пользователя, иначе None"""
+    for cache_dir in (PRESCALED_DIR, CACHE_DIR):
+        path = cache_path(src, tag, cache_dir)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def prescaled_gif(src, size, cache_dir=CACHE_DIR):
+    """
+    Уменьшенная копия анимации (нужен Pillow). Без Pillow возвращает None,
+    и масштабирование остаётся на QMovie.
+    """
+    existing = find_prescaled(src, f"{size}x{size}")
+    if existing:
+        return existing
+    if Image is None:
+        return None
+
+    target = cache_path(src, f"{size}x{size}", cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    with Image.open(src) as image:
+        frames, durations = [], []
+        try:
+            while True:
+                frame = image.convert("RGBA")
+                frame.thumbnail((size, size), Image.LANCZOS)
+                frames.append(frame)
+                durations.append(image.info.get("duration", 100))
+                image.seek(image.tell() + 1)
+        except EOFError:
+            pass
+
+    tmp = target + ".tmp"
+    frames[0].save(tmp, format="GIF", save_all=True, append_images=frames[1:],
+                   duration=durations, loop=0, disposal=2)
+    os.replace(tmp, target)
+    return target
+
+
+def prescaled_png(src, size, cache_dir=CACHE_DIR):
+    """Уменьшенная копия логотипа через Pillow (для сборки), иначе None"""
+    existing = find_prescaled(src, f"{size}x{size}")
+    if existing:
+        return existing
+    if Image is None:
+        return None
+
+    target = cache_path(src, f"{size}x{size}", cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    with Image.open(src) as image:
+        image.thumbnail((size, size), Image.LANCZOS)
+        tmp = target + ".tmp"
+        image.save(tmp, format="PNG")
+    os.replace(tmp, target)
+    return target
+
+
+if __name__ == "__main__":
+    # Подготовка ресурсов перед сборкой build.bat: копии кладутся в PRESCALED_DIR и вкладываются в exe
+    logo = find_asset(LOGO_CANDIDATES)
+    gif = find_asset((LOADING_GIF,))
+    if Image is None:
+        print("[WARN] Pillow не установлен, ресурсы будут масштабироваться при запуске")
+        sys.exit(0)
+    if logo:
+        print(f"[INFO] Логотип: {prescaled_png(logo, LOGO_SIZE, PRESCALED_DIR)}")
+    if gif:
+        print(f"[INFO] Анимация: {prescaled_gif(gif, LOADING_SIZE, PRESCALED_DIR)}")
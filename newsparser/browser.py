@@ -0,0 +1,320 @@
+import json
+import os
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import datetime
+
+from newsparser import assets, profiles
+
+CACHE_FILE = os.path.join(assets.CACHE_DIR, "browser.json")
+
+# Пакетный запуск (newsparser.cli) включает безоконный Chrome для всех парсеров
+HEADLESS = os.environ.get("NEWSPARSER_HEADLESS") == "1"
+
+# Общий Chrome (host:port отладки): парсеры подключаются к нему и работают каждый в своей вкладке,
+# вместо того чтобы запускать собственный браузер на сотни мегабайт
+SHARED_ADDRESS = os.environ.get("NEWSPARSER_SHARED_BROWSER")
+SHARED_PROFILE = os.path.join(assets.PROJECT_DIR, "data", "shared-chrome")
+SHARED_START_TIMEOUT = 20
+# Фоновые вкладки не должны замедляться: страницы источников загружаются одновременно
+SHARED_FLAGS = [
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--disable-background-timer-throttling",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-renderer-backgrounding",
+    "--disable-features=CalculateNativeWinOcclusion",
+]
+
+_VERSION_RE = re.compile(r"(\d+)\.\d+\.\d+\.\d+")
+
+
+def _run_version(path):
+    """Версия из вывода `<бинарник> --version` (None, если не удалось)"""
+    try:
+        output = subprocess.run([path, "--version"], capture_output=True, text=True, timeout=15).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = _VERSION_RE.search(output or "")
+    return match.group(0) if match else None
+
+
+def _browser_version(path):
+    """
+    Версия Chrome. На Windows chrome.exe --version ничего не печатает,
+    поэтому версия берётся из имени папки рядом с бинарником (Application/124.0.6367.91/).
+    """
+    if os.name == "nt":
+        folder = os.path.dirname(path)
+        try:
+            for name in os.listdir(folder):
+                if _VERSION_RE.fullmatch(name):
+                    return name
+        except OSError:
+            return None
+        return None
+    return _run_version(path)
+
+
+def _major(version):
+    return int(version.split(".")[0]) if version else None
+
+
+def _selenium_manager_paths():
+    """Пути chromedriver и Chrome через Selenium Manager (API отличается между версиями Selenium 4)"""
+    from selenium.webdriver.common.selenium_manager import SeleniumManager
+
+    manager = SeleniumManager()
+    if hasattr(manager, "binary_paths"):
+        paths = manager.binary_paths(["--browser", "chrome"])
+        return paths.get("driver_path"), paths.get("browser_path")
+
+    from selenium.webdriver import ChromeOptions
+    driver_path = manager.driver_location(ChromeOptions())
+    return driver_path, None
+
+
+def _find_browser():
+    for name in ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome"):
+        path = shutil.which(name)
+        if path:
+            return path
+    if os.name == "nt":
+        for base in (os.environ.get("PROGRAMFILES"), os.environ.get("PROGRAMFILES(X86)"),
+                     os.environ.get("LOCALAPPDATA")):
+            if base:
+                path = os.path.join(base, "Google", "Chrome", "Application", "chrome.exe")
+                if os.path.isfile(path):
+                    return path
+    return None
+
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except (OSError, TypeError):
+        return None
+
+
+def resolve():
+    """
+    Поиск пары chromedriver/Chrome, проверка версий и запись результата в кэш.
+    Выполняется один раз; парсеры дальше берут готовые пути из кэша.
+    """
+    info = {"ok": False, "driver_path": None, "browser_path": None,
+            "driver_version": None, "browser_version": None, "error": None,
+            "resolved_at": datetime.now().isoformat(timespec="seconds")}
+    try:
+        try:
+            driver_path, browser_path = _selenium_manager_paths()
+        except Exception as e:
+            # Без Selenium Manager (или без сети) пробуем то, что уже лежит в PATH
+            driver_path, browser_path = shutil.which("chromedriver"), None
+            if driver_path is None:
+                raise RuntimeError(f"chromedriver не найден: {e}")
+        browser_path = browser_path or _find_browser()
+
+        info.update(driver_path=driver_path, browser_path=browser_path,
+                    driver_version=_run_version(driver_path),
+                    browser_version=_browser_version(browser_path) if browser_path else None,
+                    browser_mtime=_mtime(browser_path))
+
+        driver_major, browser_major = _major(info["driver_version"]), _major(info["browser_version"])
+        if driver_major and browser_major and driver_major != browser_major:
+            info["error"] = (f"Версия chromedriver {info['driver_version']} не подходит "
+                             f"к Chrome {info['browser_version']}")
+        else:
+            info["ok"] = True
+    except Exception as e:
+        info["error"] = str(e)
+
+    # Парсеры могут проверять браузер одновременно - файл кэша заменяется атомарно
+    os.makedirs(assets.CACHE_DIR, exist_ok=True)
+    tmp_path = f"{CACHE_FILE}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(info, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, CACHE_FILE)
+    return info
+
+
+def cached():
+    """
+    Результат из кэша, если он ещё действителен: бинарники на месте,
+    Chrome не обновлялся (время изменения не поменялось).
+    """
+    try:
+        with open(CACHE_FILE, encoding="utf-8") as f:
+            info = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not info.get("ok") or not info.get("driver_path") or not os.path.isfile(info["driver_path"]):
+        return None
+    if info.get("browser_path") and _mtime(info["browser_path"]) != info.get("browser_mtime"):
+        return None
+    return info
+
+
+def status(refresh=False):
+    """Состояние браузера для /health и стартового экрана"""
+    info = None if refresh else cached()
+    if info is None:
+        info = resolve()
+    return info
+
+
+def configure(options, profile=None):
+    """
+    Готовый к запуску Service с путём к chromedriver из кэша (без поиска Selenium Manager
+    при каждом запуске). Если пару найти не удалось, возвращается обычный Service,
+    и Selenium ищет драйвер сам, как раньше.
+
+    profile - имя источника: Chrome запускается с его постоянным профилем (cookies согласий
+    и HTTP-кэш сайта переживают запуск, см. newsparser.profiles).
+    """
+    from selenium.webdriver.chrome.service import Service
+
+    if SHARED_ADDRESS:
+        # Подключение к общему Chrome: аргументы запуска и путь к браузеру не нужны
+        options.debugger_address = SHARED_ADDRESS
+        info = status()
+        return Service(executable_path=info["driver_path"]) if info.get("ok") else Service()
+    if HEADLESS and not any(arg.startswith("--headless") for arg in options.arguments):
+        options.add_argument("--headless=new")
+    if profile and not any(arg.startswith("--user-data-dir") for arg in options.arguments):
+        lease = profiles.acquire(profile)
+        if lease is not None:
+            for arg in lease.arguments():
+                options.add_argument(arg)
+    info = status()
+    if not info.get("ok"):
+        print(f"[WARN] Проверка браузера: {info.get('error')}")
+        return Service()
+    if info.get("browser_path"):
+        options.binary_location = info["browser_path"]
+    return Service(executable_path=info["driver_path"])
+
+
+def isolate(driver):
+    """
+    В режиме общего Chrome - отдельный контекст браузера (свои cookies и кэш, как инкогнито)
+    с новой вкладкой для этого парсера; driver.quit() закрывает только его.
+    Без общего Chrome ничего не делает.
+    """
+    if not SHARED_ADDRESS:
+        return driver
+    original_quit = driver.quit
+    try:
+        context = driver.execute_cdp_cmd("Target.createBrowserContext", {"disposeOnDetach": True})["browserContextId"]
+        target = driver.execute_cdp_cmd("Target.createTarget",
+                                        {"url": "about:blank", "browserContextId": context})["targetId"]
+        driver.switch_to.window(target)
+
+        def close_own():
+            driver.execute_cdp_cmd("Target.disposeBrowserContext", {"browserContextId": context})
+    except Exception as e:
+        # Старый Chrome без контекстов через страницу: обычная вкладка в общем профиле
+        print(f"[WARN] Отдельный контекст браузера недоступен ({e}), используется вкладка")
+        driver.switch_to.new_window("tab")
+
+        def close_own():
+            driver.close()
+
+    def quit():
+        try:
+            close_own()
+        except Exception as e:
+            print(f"[WARN] Не удалось закрыть вкладку в общем браузере: {e}")
+        # Chrome запущен не этим драйвером: quit завершает только chromedriver
+        original_quit()
+
+    driver.quit = quit
+    return driver
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class SharedBrowser:
+    """
+    Один Chrome с портом отладки на несколько парсеров. Пока открыт, дочерние процессы
+    получают его адрес в NEWSPARSER_SHARED_BROWSER (см. env()) и подключаются к нему.
+
+        with SharedBrowser(headless=True) as shared:
+            run_parser(..., env=shared.env())
+    """
+
+    def __init__(self, headless=True, port=None, profile=SHARED_PROFILE):
+        self.headless = headless
+        self.port = port
+        self.profile = profile
+        self.process = None
+
+    @property
+    def address(self):
+        return f"127.0.0.1:{self.port}"
+
+    def env(self):
+        return {"NEWSPARSER_SHARED_BROWSER": self.address}
+
+    def start(self):
+        from newsparser.proctree import popen_group
+
+        info = status()
+        browser_path = info.get("browser_path") or _find_browser()
+        if not browser_path:
+            raise RuntimeError(f"Chrome не найден: {info.get('error')}")
+        self.port = self.port or _free_port()
+        os.makedirs(self.profile, exist_ok=True)
+        args = [browser_path, f"--remote-debugging-port={self.port}", f"--user-data-dir={self.profile}"] + SHARED_FLAGS
+        if self.headless:
+            args.append("--headless=new")
+        self.process = popen_group(args + ["about:blank"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        deadline = time.monotonic() + SHARED_START_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Общий Chrome завершился при запуске (код {self.process.returncode})")
+            try:
+                with urllib.request.urlopen(f"http://{self.address}/json/version", timeout=2) as response:
+                    version = json.loads(response.read().decode("utf-8")).get("Browser")
+                # В stderr: stdout вызывающего (cli) - поток событий JSON lines
+                print(f"[INFO] Общий браузер {version} запущен на {self.address}", file=sys.stderr)
+                return self
+            except (OSError, ValueError):
+                time.sleep(0.25)
+        self.stop()
+        raise RuntimeError(f"Общий Chrome не ответил на {self.address} за {SHARED_START_TIMEOUT} с")
+
+    def stop(self):
+        from newsparser.proctree import kill_tree
+
+        if self.process is not None and self.process.poll() is None:
+            kill_tree(self.process)
+        self.process = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+if __name__ == "__main__":
+    info = status(refresh="--refresh" in sys.argv)
+    if "--json" in sys.argv:
+        print(json.dumps(info, ensure_ascii=False))
+    else:
+        state = "OK" if info["ok"] else "ОШИБКА"
+        print(f"[{state}] chromedriver {info.get('driver_version')} ({info.get('driver_path')}), "
+              f"Chrome {info.get('browser_version')} ({info.get('browser_path')})")
+        if info.get("error"):
+            print(info["error"])
+    sys.exit(0 if info["ok"] else 1)
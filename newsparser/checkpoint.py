@@ -0,0 +1,172 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from newsparser import assets
+from newsparser.proctree import kill_tree
+from newsparser.records import NewsRecord
+
+CHECKPOINTS_DIR = os.path.join(assets.PROJECT_DIR, "data", "checkpoints")
+
+# Записи незавершённого запуска старше этого срока при следующем запуске не подхватываются
+MAX_AGE_HOURS = 12
+# fsync журнала раз в FSYNC_EVERY записей (flush в ОС - после каждой)
+FSYNC_EVERY = 20
+
+# Одна команда WebDriver дольше HANG_TIMEOUT секунд считается зависанием Chrome
+PAGE_LOAD_TIMEOUT = 60
+HANG_TIMEOUT = 90
+WATCH_INTERVAL = 5
+
+
+class Checkpoint:
+    """
+    Журнал собранных новостей одного источника (только дозапись, JSON lines).
+
+    Каждая новость пишется в журнал сразу после сбора, поэтому ни ошибка,
+    ни снятие процесса не теряют уже собранное. Если запуск упал, его записи
+    подхватываются следующим запуском; после успешного сохранения журнал удаляется.
+    """
+
+    def __init__(self, source, root=CHECKPOINTS_DIR):
+        self.source = source
+        self.path = os.path.join(root, f"{source}.jsonl")
+        self.run_id = datetime.now().strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}"
+        self.partial = False
+        # Ctrl+C или SystemExit во время сбора: пробрасывается из complete(), когда стоки уже сохранены
+        self.interrupted = None
+        self.items = []
+        self._file = None
+        self._unsynced = 0
+        self._command_started = None
+        self._watch_stop = threading.Event()
+        self.recovered = self._load()
+
+    def _load(self):
+        """Записи прошлых незавершённых запусков (обрезанная последняя строка пропускается)"""
+        if not os.path.exists(self.path):
+            return []
+        oldest = (datetime.now() - timedelta(hours=MAX_AGE_HOURS)).isoformat(timespec="seconds")
+        items, seen = [], set()
+        with open(self.path, encoding="utf-8") as f:
+            for raw in f:
+                try:
+                    item = json.loads(raw)
+                except ValueError:
+                    continue
+                key = item.get("link") or item.get("name")
+                if item.get("ts", "") < oldest or key in seen:
+                    continue
+                seen.add(key)
+                items.append(item)
+        if items:
+            print(f"[INFO] Найден журнал незавершённого запуска: {len(items)} новостей будут добавлены к результату")
+        return items
+
+    def record(self, title, link=None, date=None, source=None):
+        """Запись новости в журнал сразу после сбора"""
+        item = {"run": self.run_id, "ts": datetime.now().isoformat(timespec="seconds"),
+                "name": title, "link": link, "date": date}
+        if source and source != self.source:
+            item["source"] = source
+        self.items.append(item)
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+            # Обрезанная строка после аварии не должна склеиться с новой записью
+            if self._file.tell() > 0:
+                self._file.write("\n")
+        self._file.write(json.dumps(item, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self._unsynced += 1
+        if self._unsynced >= FSYNC_EVERY:
+            self._sync()
+
+    def _sync(self):
+        if self._file is not None:
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def stream(self, records):
+        """
+        Пропускает поток записей extract_news, журналируя каждую.
+        Если поток оборвался ошибкой, уже выданное остаётся результатом (self.partial = True);
+        если не собрано ничего, ошибка пробрасывается дальше. Прерывание (KeyboardInterrupt)
+        обрабатывается так же, но запоминается и пробрасывается из complete() после сохранения.
+        В конце добавляются записи прошлого незавершённого запуска, которых не было в этом.
+        """
+        present = set()
+        try:
+            for record in records:
+                self.record(record.title, record.url, record.raw_date, record.source)
+                present.add(record.url or record.title)
+                yield record
+        except GeneratorExit:
+            raise
+        except BaseException as e:
+            self._sync()
+            if not self.items and not self.recovered:
+                raise
+            if not isinstance(e, Exception):
+                self.interrupted = e
+            print(f"[ERROR] Сбор прерван: {str(e) or type(e).__name__}")
+            print(f"[WARN] Сохраняем частичный результат: {len(self.items)} новостей этого запуска")
+            self.partial = True
+
+        added = 0
+        for item in self.recovered:
+            if (item.get("link") or item.get("name")) in present:
+                continue
+            added += 1
+            yield NewsRecord(item.get("source") or self.source, item.get("name"), item.get("link"), item.get("date"))
+        if added:
+            print(f"[INFO] Добавлено новостей из журнала прошлого запуска: {added}")
+
+    def complete(self):
+        """Результат сохранён полностью - журнал больше не нужен; прерванный запуск прерывается здесь"""
+        self.close()
+        if not self.partial and os.path.exists(self.path):
+            os.remove(self.path)
+        if self.interrupted is not None:
+            raise self.interrupted
+
+    def close(self):
+        self._watch_stop.set()
+        if self._file is not None:
+            self._sync()
+            self._file.close()
+            self._file = None
+
+    def guard(self, driver, timeout=HANG_TIMEOUT):
+        """
+        Защита от зависшего Chrome: таймаут загрузки страницы и сторожевой поток,
+        который завершает chromedriver с браузером, если одна команда висит дольше timeout.
+        Зависшая команда тогда падает с ошибкой, и собранное сохраняется как частичный результат.
+        """
+        driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+        original_execute = driver.execute
+
+        def guarded_execute(driver_command, params=None):
+            self._command_started = time.monotonic()
+            try:
+                return original_execute(driver_command, params)
+            finally:
+                self._command_started = None
+
+        driver.execute = guarded_execute
+        process = getattr(getattr(driver, "service", None), "process", None)
+
+        def watch():
+            while not self._watch_stop.wait(WATCH_INTERVAL):
+                started = self._command_started
+                if started is None or time.monotonic() - started < timeout:
+                    continue
+                print(f"[ERROR] Команда WebDriver не отвечает {timeout} с, завершаем Chrome")
+                if process is not None:
+                    kill_tree(process, timeout=2)
+                return
+
+        threading.Thread(target=watch, name="chrome-watchdog", daemon=True).start()
+        return driver
@@ -0,0 +1,325 @@
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from newsparser import assets, browser
+from newsparser.metrics import parse_metrics_line
+from newsparser.proctree import kill_tree, popen_group
+from newsparser.records import LIMIT_ENV, parse_record_line
+
+PARSERS_DIR = os.path.join(assets.PROJECT_DIR, "parsers")
+PYTHON_EXE = os.environ.get("PYTHON_EXE", sys.executable)
+
+FORMATS = ("jsonl", "csv", "xlsx")
+COLUMNS = ("source", "title", "url", "published_at", "raw_date", "tags")
+
+EXIT_OK = 0
+EXIT_FAILED = 1        # хотя бы один источник завершился ошибкой или частично
+EXIT_USAGE = 2         # неверные аргументы (так же завершается argparse)
+EXIT_NOTHING = 3       # ни один источник ничего не собрал
+EXIT_BROWSER = 4       # не удалось запустить общий браузер (--shared-browser)
+
+# Строки лога парсера, которые попадают в result при ошибке
+ERROR_TAIL = 20
+
+
+def available_sources():
+    """Имена источников: parsers/*_news.py без расширения"""
+    return sorted(name[:-3] for name in os.listdir(PARSERS_DIR) if name.endswith("_news.py"))
+
+
+def in_window(record, since):
+    """Запись не старше since (datetime); записи без распознанной даты не отбрасываются - их время неизвестно"""
+    if since is None or not record.get("published_at"):
+        return True
+    try:
+        return datetime.fromisoformat(record["published_at"]) >= since
+    except ValueError:
+        return True
+
+
+def run_parser(source, on_record, on_progress=None, on_log=None, timeout=None, headless=True, should_stop=None,
+               env=None):
+    """
+    Запуск parsers/<source>.py отдельным процессом с разбором его stdout:
+    записи [RECORD] -> on_record(dict), строки Progress -> on_progress(int), остальное -> on_log(str).
+    should_stop() проверяется раз в секунду (например, потеря аренды задания): True - процесс завершается.
+    env - дополнительные переменные окружения (например, адрес общего браузера).
+    Возвращает {"status", "exit_code", "tail", "metrics"}.
+    """
+    env = dict(os.environ, PYTHONIOENCODING="utf-8", PYTHONUNBUFFERED="1", **(env or {}))
+    if headless:
+        env["NEWSPARSER_HEADLESS"] = "1"
+    process = popen_group(
+        [PYTHON_EXE, os.path.join(PARSERS_DIR, f"{source}.py")],
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        text=True, encoding="utf-8", errors="replace", bufsize=1, env=env,
+    )
+
+    # Сторож: таймаут и внешняя отмена завершают парсер вместе с Chrome
+    stop_reason = None
+    finished = threading.Event()
+
+    def watch():
+        nonlocal stop_reason
+        deadline = time.monotonic() + timeout if timeout else None
+        while not finished.wait(1.0):
+            if deadline is not None and time.monotonic() >= deadline:
+                stop_reason = "timeout"
+            elif should_stop is not None and should_stop():
+                stop_reason = "cancelled"
+            if stop_reason:
+                kill_tree(process)
+                return
+
+    if timeout or should_stop:
+        threading.Thread(target=watch, name=f"watch-{source}", daemon=True).start()
+
+    tail = deque(maxlen=ERROR_TAIL)
+    run_metrics = None
+    last_progress = -1
+    try:
+        for line in iter(process.stdout.readline, ''):
+            line = line.strip()
+            if not line:
+                continue
+            record = parse_record_line(line)
+            if record is not None:
+                on_record(record)
+                continue
+            parsed = parse_metrics_line(line)
+            if parsed is not None:
+                run_metrics = parsed
+                continue
+            if "Progress:" in line:
+                try:
+                    percent = int(line.split("Progress:")[1].split("%")[0].strip())
+                except ValueError:
+                    continue
+                if percent != last_progress and on_progress is not None:
+                    last_progress = percent
+                    on_progress(percent)
+                continue
+            tail.append(line)
+            if on_log is not None:
+                on_log(line)
+        return_code = process.wait()
+    finally:
+        finished.set()
+        if process.poll() is None:
+            kill_tree(process)
+
+    if stop_reason:
+        status = stop_reason
+    elif run_metrics is not None:
+        status = run_metrics.get("status", "failed")
+    else:
+        status = "success" if return_code == 0 else "failed"
+    return {"status": status, "exit_code": return_code, "tail": list(tail), "metrics": run_metrics}
+
+
+class _Output:
+    """Потоковая запись записей одного источника в jsonl / csv / xlsx"""
+
+    def __init__(self, path, fmt):
+        self.path = path
+        self.fmt = fmt
+        self.count = 0
+        if fmt == "xlsx":
+            from openpyxl import Workbook
+
+            # write_only: строки сразу уходят в файл, а не копятся в памяти
+            self._workbook = Workbook(write_only=True)
+            self._sheet = self._workbook.create_sheet("Новости")
+            self._sheet.append(list(COLUMNS))
+        else:
+            self._file = open(path, "w", encoding="utf-8-sig" if fmt == "csv" else "utf-8", newline="")
+            if fmt == "csv":
+                self._csv = csv.writer(self._file)
+                self._csv.writerow(COLUMNS)
+
+    def write(self, record):
+        self.count += 1
+        if self.fmt == "jsonl":
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            return
+        row = [record.get(column) for column in COLUMNS]
+        row[-1] = ", ".join(record.get("tags") or [])
+        if self.fmt == "csv":
+            self._csv.writerow(row)
+        else:
+            self._sheet.append(row)
+
+    def close(self):
+        if self.fmt == "xlsx":
+            self._workbook.save(self.path)
+        else:
+            self._file.close()
+
+
+class BatchRunner:
+    """Запуск набора источников с ограничением параллельности; события - JSON lines в stream"""
+
+    def __init__(self, output_dir, fmt="jsonl", limit=None, since_hours=None, jobs=1,
+                 timeout=None, headless=True, verbose=False, stream=None, shared_browser=False):
+        self.output_dir = output_dir
+        self.fmt = fmt
+        self.limit = limit
+        self.since = datetime.now() - timedelta(hours=since_hours) if since_hours else None
+        self.jobs = max(1, jobs)
+        self.timeout = timeout
+        self.headless = headless
+        self.verbose = verbose
+        self.stream = stream or sys.stdout
+        self.shared_browser = shared_browser
+        self.env = {}
+        self._lock = threading.Lock()
+        self.stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+
+    def emit(self, event, **fields):
+        line = json.dumps({"event": event, "ts": datetime.now().isoformat(timespec="seconds"), **fields},
+                          ensure_ascii=False)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def run_source(self, source):
+        """Один источник: процесс парсера, запись результата в файл, событие result"""
+        started = time.monotonic()
+        path = os.path.join(self.output_dir, f"{source}_{self.stamp}.{self.fmt}")
+        self.emit("start", source=source)
+        output = _Output(path, self.fmt)
+        skipped = 0
+
+        def on_record(record):
+            nonlocal skipped
+            if (self.limit is None or output.count < self.limit) and in_window(record, self.since):
+                output.write(record)
+            else:
+                skipped += 1
+
+        def on_log(line):
+            if self.verbose:
+                self.emit("log", source=source, line=line)
+
+        env = dict(self.env)
+        if self.limit is not None and self.since is None:
+            # Парсер сам останавливается на limit; с --since часть записей отсеется, поэтому только здесь
+            env[LIMIT_ENV] = str(self.limit)
+        try:
+            run = run_parser(source, on_record,
+                             on_progress=lambda percent: self.emit("progress", source=source, percent=percent),
+                             on_log=on_log, timeout=self.timeout, headless=self.headless, env=env)
+        finally:
+            output.close()
+
+        if run["status"] != "success" and output.count == 0:
+            os.remove(path)
+            path = None
+        result = {
+            "source": source,
+            "status": run["status"],
+            "items": output.count,
+            "skipped": skipped,
+            "file": path,
+            "exit_code": run["exit_code"],
+            "duration": round(time.monotonic() - started, 3),
+        }
+        if run["status"] not in ("success", "partial"):
+            result["error"] = run["tail"]
+        self.emit("result", **result)
+        return result
+
+    def run(self, sources):
+        os.makedirs(self.output_dir, exist_ok=True)
+        started = time.monotonic()
+        shared = None
+        if self.shared_browser:
+            # Один Chrome на все источники: парсеры работают в отдельных контекстах-вкладках
+            try:
+                shared = browser.SharedBrowser(headless=self.headless).start()
+            except (RuntimeError, OSError) as e:
+                self.emit("summary", sources=0, items=0, failed=list(sources), error=f"общий браузер: {e}",
+                          duration=round(time.monotonic() - started, 3), exit_code=EXIT_BROWSER)
+                return EXIT_BROWSER
+            self.env = shared.env()
+        try:
+            with ThreadPoolExecutor(max_workers=min(self.jobs, len(sources))) as pool:
+                results = list(pool.map(self.run_source, sources))
+        finally:
+            if shared is not None:
+                shared.stop()
+
+        failed = [r["source"] for r in results if r["status"] != "success"]
+        total = sum(r["items"] for r in results)
+        if total == 0:
+            code = EXIT_NOTHING
+        elif failed:
+            code = EXIT_FAILED
+        else:
+            code = EXIT_OK
+        self.emit("summary", sources=len(results), items=total, failed=failed,
+                  duration=round(time.monotonic() - started, 3), exit_code=code)
+        return code
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m newsparser.cli",
+        description="Пакетный запуск парсеров новостей без интерфейса (cron, CI). "
+                    "Записи каждого источника пишутся в файл по мере сбора, "
+                    "в stdout - JSON lines: start, progress, result, summary.",
+        epilog="Коды выхода: 0 - все источники успешно, 1 - есть ошибки или частичные результаты, "
+               "2 - неверные аргументы, 3 - ничего не собрано, 4 - не запустился общий браузер "
+               "(--shared-browser; событие summary с полем error). "
+               "Пример: python -m newsparser.cli all --jobs 3 --format csv --since 6")
+    parser.add_argument("sources", nargs="*", help="Имена источников (например TASS_news) или all")
+    parser.add_argument("--list", action="store_true", help="Показать доступные источники и выйти")
+    parser.add_argument("--limit", type=int, help="Не больше N записей от каждого источника")
+    parser.add_argument("--since", type=float, metavar="HOURS",
+                        help="Только новости за последние HOURS часов (записи без даты сохраняются)")
+    parser.add_argument("--format", choices=FORMATS, default="jsonl", help="Формат файлов результата")
+    parser.add_argument("--output-dir", default=os.path.join(os.getcwd(), "batch_output"),
+                        help="Папка для файлов результата (по умолчанию ./batch_output)")
+    parser.add_argument("--jobs", type=int, default=1, help="Сколько источников собирать параллельно")
+    parser.add_argument("--timeout", type=float, metavar="SECONDS", help="Ограничение времени на источник")
+    parser.add_argument("--headed", action="store_true", help="Показывать окно Chrome (по умолчанию без окна)")
+    parser.add_argument("--shared-browser", action="store_true",
+                        help="Один Chrome на все источники: каждый парсер в своей вкладке (--jobs - число вкладок)")
+    parser.add_argument("--verbose", action="store_true", help="Передавать строки лога парсеров событиями log")
+    args = parser.parse_args(argv)
+
+    known = available_sources()
+    if args.list:
+        print(json.dumps({"event": "sources", "sources": known}, ensure_ascii=False))
+        return EXIT_OK
+
+    sources = known if args.sources == ["all"] else args.sources
+    unknown = [name for name in sources if name not in known]
+    if not sources or unknown:
+        parser.print_usage(sys.stderr)
+        message = f"неизвестные источники: {', '.join(unknown)}" if unknown else "не указаны источники"
+        print(f"{parser.prog}: error: {message}; доступны: {', '.join(known)}", file=sys.stderr)
+        return EXIT_USAGE
+    if args.limit is not None and args.limit < 1 or args.jobs < 1:
+        parser.error("--limit и --jobs должны быть не меньше 1")
+    # not x > 0, а не x <= 0: так отсекается и nan
+    if args.since is not None and not args.since > 0 or args.timeout is not None and not args.timeout > 0:
+        parser.error("--since и --timeout должны быть больше 0")
+
+    runner = BatchRunner(args.output_dir, fmt=args.format, limit=args.limit, since_hours=args.since,
+                         jobs=args.jobs, timeout=args.timeout, headless=not args.headed, verbose=args.verbose,
+                         shared_browser=args.shared_browser)
+    return runner.run(sources)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
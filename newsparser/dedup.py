@@ -0,0 +1,81 @@
+import random
+import re
+import zlib
+from array import array
+
+# 72 перестановки MinHash = 24 полосы LSH по 3 значения.
+# Для схожести 0.5 пара попадает в кандидаты с вероятностью ~96%,
+# для несвязанных заголовков (схожесть ~0.05) - примерно в 0.3% случаев.
+NUM_PERM = 72
+BANDS = 24
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 4
+SIMILARITY_THRESHOLD = 0.5
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = 0xFFFFFFFF
+
+_WORD_RE = re.compile(r"[0-9a-zа-я]+")
+
+
+def _permutations(count, seed=42):
+    """Детерминированные коэффициенты перестановок: сигнатуры совместимы между процессами и запусками"""
+    rnd = random.Random(seed)
+    return [(rnd.randrange(1, _MERSENNE_PRIME), rnd.randrange(0, _MERSENNE_PRIME)) for _ in range(count)]
+
+
+_PERMUTATIONS = _permutations(NUM_PERM)
+
+
+def normalize_title(title):
+    """Нижний регистр, ё -> е, только буквы и цифры через одиночный пробел"""
+    text = (title or "").lower().replace("ё", "е")
+    return " ".join(_WORD_RE.findall(text))
+
+
+def shingles(title, size=SHINGLE_SIZE):
+    """
+    Множество хэшей символьных n-грамм нормализованного заголовка.
+    Символьные шинглы устойчивее словесных к русским окончаниям.
+    """
+    text = normalize_title(title)
+    if not text:
+        return set()
+    if len(text) <= size:
+        return {zlib.crc32(text.encode("utf-8"))}
+    return {zlib.crc32(text[i:i + size].encode("utf-8")) for i in range(len(text) - size + 1)}
+
+
+def minhash(title):
+    """MinHash-сигнатура заголовка (array из NUM_PERM 32-битных значений)"""
+    hashes = shingles(title)
+    if not hashes:
+        return array("I", [_MAX_HASH] * NUM_PERM)
+    return array("I", [
+        min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    ])
+
+
+def band_keys(signature):
+    """Ключи полос LSH: (номер полосы, хэш значений полосы)"""
+    keys = []
+    for band in range(BANDS):
+        chunk = signature[band * ROWS:(band + 1) * ROWS]
+        keys.append((band, zlib.crc32(chunk.tobytes())))
+    return keys
+
+
+def similarity(sig_a, sig_b):
+    """Оценка коэффициента Жаккара по доле совпавших значений сигнатур"""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+
+def signature_to_bytes(signature):
+    return signature.tobytes()
+
+
+def signature_from_bytes(data):
+    signature = array("I")
+    signature.frombytes(data)
+    return signature
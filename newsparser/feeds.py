@@ -0,0 +1,132 @@
+import json
+import os
+import urllib.error
+import urllib.request
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+
+from newsparser import assets, ratelimit
+
+# Ленты сайтов, которые парсятся через Chrome: опрос RSS намного дешевле рендеринга страниц
+FEEDS = {
+    "RIA_rss": "https://ria.ru/export/rss2/archive/index.xml",
+    "TASS_rss": "https://tass.ru/rss/v2.xml",
+    "INTERFAX_rss": "https://www.interfax.ru/rss.asp",
+    "RGru_rss": "https://rg.ru/xml/index.xml",
+}
+
+FIXTURES_DIR = os.path.join(assets.PROJECT_DIR, "newsparser", "fixtures", "feeds")
+STATE_PATH = os.path.join(assets.PROJECT_DIR, "data", "feeds_state.json")
+
+HTTP_TIMEOUT = 15
+USER_AGENT = "Mozilla/5.0 (compatible; NewsParser feed reader)"
+DATE_FORMAT = "%d-%m-%Y %H:%M"
+
+
+def _local(tag):
+    """Имя тега без пространства имён"""
+    return tag.rsplit("}", 1)[-1]
+
+
+def normalize_date(value):
+    """RFC 822 (RSS) или ISO 8601 (Atom) -> «дд-мм-гггг чч:мм»; нераспознанное возвращается как есть"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        parsed = None
+    if parsed is None:
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return value
+    # Время с часовым поясом переводится в местное, как на страницах сайтов
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone()
+    return parsed.strftime(DATE_FORMAT)
+
+
+def parse_feed(stream):
+    """
+    Потоковый разбор RSS 2.0 / Atom: записи (заголовок, ссылка, дата) выдаются по мере чтения,
+    обработанные элементы сразу освобождаются.
+    """
+    for _, element in ET.iterparse(stream, events=("end",)):
+        name = _local(element.tag)
+        if name not in ("item", "entry"):
+            continue
+
+        title = link = date = None
+        for child in element:
+            child_name = _local(child.tag)
+            if child_name == "title":
+                title = " ".join((child.text or "").split())
+            elif child_name == "link":
+                # RSS: <link>url</link>; Atom: <link rel="alternate" href="url"/>
+                href = child.get("href")
+                if href and child.get("rel", "alternate") == "alternate":
+                    link = href
+                elif child.text and child.text.strip():
+                    link = child.text.strip()
+            elif child_name in ("pubDate", "published", "updated", "date") and date is None:
+                date = child.text
+        element.clear()
+
+        if title:
+            yield title, link, normalize_date(date)
+
+
+def load_state(path=STATE_PATH):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except ValueError:
+        return {}
+
+
+def save_state(state, path=STATE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def fixture_url(source):
+    """Локальная копия ленты для работы без сети"""
+    return "file:" + urllib.request.pathname2url(os.path.join(FIXTURES_DIR, f"{source}.xml"))
+
+
+def fetch_feed(url, state):
+    """
+    Условный GET ленты (If-None-Match / If-Modified-Since).
+    Возвращает (записи, изменилась ли лента). При 304 отдаются записи прошлого опроса,
+    чтобы выгрузка оставалась полной. state[url] обновляется на месте.
+    """
+    cached = state.get(url, {})
+    headers = {"User-Agent": USER_AGENT}
+    if cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
+
+    request = urllib.request.Request(url, headers=headers)
+    ratelimit.acquire(url)
+    try:
+        with urllib.request.urlopen(request, timeout=HTTP_TIMEOUT) as response:
+            entries = list(parse_feed(response))
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return [tuple(entry) for entry in cached.get("entries", [])], False
+        ratelimit.penalize_error(url, e)
+        raise
+
+    state[url] = {"etag": etag, "last_modified": last_modified, "entries": entries}
+    return entries, True
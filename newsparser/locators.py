@@ -0,0 +1,229 @@
+import json
+import os
+import re
+import time
+
+from newsparser import assets
+
+# Необязательный файл с селекторами, которые проверяются раньше встроенных:
+# {"TASS_news": {"item": [["css selector", "a.new-card"]]}} - починка без правки парсера
+SELECTORS_PATH = os.environ.get("NEWSPARSER_SELECTORS") or os.path.join(assets.PROJECT_DIR, "selectors.json")
+
+# Ожидание первой страницы: жёсткий предел и запас после document.readyState == complete.
+# Если страница загрузилась, а ни один селектор не нашёл элементов за GRACE секунд - вёрстка сменилась
+PAGE_TIMEOUT = 15
+GRACE = 4
+POLL = 0.25
+# Подряд ненайденных обязательных полей (без единого успеха), после которых сбор прекращается
+MISS_LIMIT = 5
+
+# Классы CSS-модулей с хэшем сборки (tass_pkg_link-v5WdK, PageRubricContent_listItem__KVIae):
+# при новой сборке меняется только хэш, поэтому запасной вариант - совпадение по префиксу
+_HASHED_CLASS_RE = re.compile(r"^(.*?(?:__|-))(?=[A-Za-z0-9]*[A-Z0-9])[A-Za-z0-9]{5}$")
+
+# Роли элементов на страницах сайтов: упорядоченные варианты (способ поиска Selenium, значение).
+# Первым идёт селектор, с которым парсер писался, дальше - структурные и атрибутные запасные
+SITES = {
+    "TASS_news": {
+        "item": [
+            ("class name", "tass_pkg_link-v5WdK"),
+            ("css selector", "#infinite_listing a[href^='/ekonomika/']"),
+            ("css selector", "a[href^='/ekonomika/'][class*='link']"),
+        ],
+        "title": [
+            ("class name", "tass_pkg_title-xVUT1"),
+            ("css selector", "[class*='title']"),
+            ("css selector", "span"),
+        ],
+        "date": [
+            ("class name", "tass_pkg_marker-JPOGl"),
+            ("css selector", "[class*='marker']"),
+            ("tag name", "time"),
+        ],
+        "more": [
+            ("xpath", "//*[@id='infinite_listing']/button"),
+            ("css selector", "#infinite_listing button"),
+        ],
+    },
+    "RGru_news": {
+        "page": [
+            ("class name", "Page_main__CL9dG"),
+            ("tag name", "main"),
+        ],
+        "item": [
+            ("class name", "PageRubricContent_listItem__KVIae"),
+            ("css selector", "main [class*='listItem']"),
+            ("css selector", "main article"),
+        ],
+        "link": [
+            ("tag name", "a"),
+        ],
+        "title": [
+            ("class name", "ItemOfListStandard_title__Ajjlf"),
+            ("css selector", "[class*='_title']"),
+        ],
+        "date": [
+            ("class name", "ItemOfListStandard_datetime__GstJi"),
+            ("css selector", "[class*='datetime']"),
+            ("tag name", "time"),
+        ],
+    },
+}
+
+# Частые классы страницы для диагноза: повторяющиеся элементы обычно и есть новый список новостей
+_PAGE_CLASSES_JS = """
+const counts = {};
+for (const el of document.querySelectorAll('[class]')) {
+    for (const name of el.classList) counts[name] = (counts[name] || 0) + 1;
+}
+return Object.entries(counts).filter(e => e[1] >= 5).sort((a, b) => b[1] - a[1]).slice(0, 12);
+"""
+
+_overrides = None
+
+
+class SelectorDrift(RuntimeError):
+    """Ни один селектор роли не нашёл элементов: вёрстка сайта изменилась"""
+
+
+def expand(candidates):
+    """Варианты роли с добавленным поиском по префиксу после каждого класса с хэшем сборки"""
+    expanded = []
+    for by, value in candidates:
+        expanded.append((by, value))
+        match = _HASHED_CLASS_RE.match(value) if by == "class name" else None
+        if match:
+            expanded.append(("css selector", f"[class*='{match.group(1)}']"))
+    return expanded
+
+
+def _load_overrides():
+    global _overrides
+    if _overrides is None:
+        _overrides = {}
+        if os.path.exists(SELECTORS_PATH):
+            try:
+                with open(SELECTORS_PATH, encoding="utf-8") as f:
+                    _overrides = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"[WARN] Не удалось прочитать селекторы {SELECTORS_PATH}: {e}")
+    return _overrides
+
+
+def candidates(source, role):
+    """Варианты поиска роли: сначала из selectors.json, затем встроенные"""
+    extra = [tuple(pair) for pair in _load_overrides().get(source, {}).get(role, [])]
+    return expand(extra + list(SITES.get(source, {}).get(role, [])))
+
+
+class Locator:
+    """
+    Поиск элементов сайта по ролям с запасными селекторами и быстрым отказом.
+
+    wait() ждёт первую страницу не дольше GRACE секунд после её загрузки и при нуле совпадений
+    у всех вариантов бросает SelectorDrift с диагнозом вместо десятков WebDriverWait по таймауту.
+    Сработавший вариант запоминается: следующие поиски роли начинаются с него.
+    """
+
+    def __init__(self, driver, source):
+        self.driver = driver
+        self.source = source
+        self._chosen = {}
+        self._hits = {}
+        self._misses = {}
+
+    def _ordered(self, role):
+        options = candidates(self.source, role)
+        chosen = self._chosen.get(role)
+        if chosen in options:
+            options.remove(chosen)
+            options.insert(0, chosen)
+        return options
+
+    def chosen(self, role):
+        """Вариант (способ, значение), который последним нашёл элементы роли, или None"""
+        return self._chosen.get(role)
+
+    def _choose(self, role, option):
+        if self._chosen.get(role) == option:
+            return
+        primary = candidates(self.source, role)[0]
+        if option != primary and role not in self._chosen:
+            print(f"[WARN] {self.source}: селектор «{role}» {primary[1]!r} не сработал, "
+                  f"используется запасной {option[1]!r}")
+        self._chosen[role] = option
+
+    def _find_all(self, context, role):
+        for option in self._ordered(role):
+            try:
+                found = context.find_elements(*option)
+            except Exception:
+                # Невалидный для этой страницы XPath/CSS - просто следующий вариант
+                continue
+            if found:
+                self._choose(role, option)
+                return found
+        return []
+
+    def find_all(self, role):
+        """Все элементы роли на странице (первый вариант, давший совпадения), без ожидания"""
+        return self._find_all(self.driver, role)
+
+    def wait(self, role, timeout=PAGE_TIMEOUT, grace=GRACE, required=True):
+        """
+        Ожидание элементов роли на загружающейся странице. Нет совпадений за grace секунд после
+        загрузки документа (или за timeout) - SelectorDrift, если required, иначе пустой список.
+        """
+        started = time.monotonic()
+        loaded_at = None
+        while True:
+            found = self.find_all(role)
+            if found:
+                return found
+            now = time.monotonic()
+            if loaded_at is None and self._ready():
+                loaded_at = now
+            if now - started >= timeout or (loaded_at is not None and now - loaded_at >= grace):
+                break
+            time.sleep(POLL)
+        if required:
+            raise SelectorDrift(self.diagnose(role, time.monotonic() - started))
+        return []
+
+    def find(self, element, role, required=True):
+        """
+        Первый элемент роли внутри element или None. Если обязательное поле не находится
+        MISS_LIMIT раз подряд и ни разу не находилось - SelectorDrift (поля в карточке сменились).
+        """
+        found = self._find_all(element, role)
+        if found:
+            self._hits[role] = self._hits.get(role, 0) + 1
+            return found[0]
+        self._misses[role] = self._misses.get(role, 0) + 1
+        if required and not self._hits.get(role) and self._misses[role] >= MISS_LIMIT:
+            raise SelectorDrift(self.diagnose(role, None, scope="карточках новостей"))
+        return None
+
+    def _ready(self):
+        try:
+            return self.driver.execute_script("return document.readyState") == "complete"
+        except Exception:
+            return False
+
+    def diagnose(self, role, waited, scope="странице"):
+        """Текст для лога: что искали, где, и какие повторяющиеся классы есть на странице"""
+        lines = [f"{self.source}: ни один селектор роли «{role}» не нашёл элементов на {scope}"
+                 + (f" за {waited:.1f} с" if waited is not None else "") + " - вероятно, сменилась вёрстка сайта."]
+        try:
+            lines.append(f"  Страница: {self.driver.current_url} ({self.driver.title!r})")
+        except Exception:
+            pass
+        lines.append("  Проверены: " + "; ".join(f"{by}={value!r}" for by, value in candidates(self.source, role)))
+        try:
+            frequent = self.driver.execute_script(_PAGE_CLASSES_JS) or []
+        except Exception:
+            frequent = []
+        if frequent:
+            lines.append("  Частые классы на странице: " + ", ".join(f"{name} ({count})" for name, count in frequent))
+        lines.append(f"  Новый селектор можно добавить в {SELECTORS_PATH} без правки парсера.")
+        return "\n".join(lines)
@@ -0,0 +1,321 @@
+import gzip
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from newsparser.proctree import pid_alive
+
+LOGS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logs")
+
+LEVEL_PREFIXES = ("INFO", "WARN", "ERROR", "DEBUG", "SUCCESS")
+
+
+def detect_level(line):
+    """Определение уровня по префиксу вида [INFO] / [WARN] / [ERROR]"""
+    stripped = line.lstrip()
+    if stripped.startswith("["):
+        prefix = stripped[1:stripped.find("]")] if "]" in stripped else ""
+        if prefix in LEVEL_PREFIXES:
+            return prefix
+    if "ОШИБКА" in stripped or "Ошибка" in stripped:
+        return "ERROR"
+    return "INFO"
+
+
+class RunLogStore:
+    """
+    Хранилище логов запусков парсеров.
+
+    Строки пишутся буферизованно в JSON lines (одна запись на строку, с job_id и источником)
+    в активный сегмент процесса. При превышении размера сегмент сжимается в .jsonl.gz,
+    старые сегменты удаляются по возрасту и суммарному объёму. SQLite-индекс хранит,
+    в каких сегментах лежат строки каждого запуска.
+    """
+
+    def __init__(self, root=LOGS_DIR, max_segment_bytes=5 * 1024 * 1024,
+                 max_total_bytes=200 * 1024 * 1024, max_age_days=30,
+                 buffer_lines=200, flush_interval=1.0):
+        self.root = root
+        self.max_segment_bytes = max_segment_bytes
+        self.max_total_bytes = max_total_bytes
+        self.max_age_days = max_age_days
+        self.buffer_lines = buffer_lines
+        self.flush_interval = flush_interval
+
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._active_name = f"active-{os.getpid()}.jsonl"
+        self._active_file = None
+        self._active_jobs = set()
+        self._rotations = 0
+
+        os.makedirs(self.root, exist_ok=True)
+        self._index_path = os.path.join(self.root, "index.sqlite3")
+        self._init_index()
+        self.cleanup()
+
+    # --- Индекс ---
+
+    def _connect(self):
+        conn = sqlite3.connect(self._index_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_index(self):
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS runs (
+                    job_id TEXT PRIMARY KEY,
+                    source TEXT,
+                    started TEXT,
+                    finished TEXT,
+                    status TEXT,
+                    lines INTEGER DEFAULT 0
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS segments (
+                    job_id TEXT,
+                    segment TEXT,
+                    PRIMARY KEY (job_id, segment)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_runs_source ON runs(source, started)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_segments_segment ON segments(segment)")
+
+    # --- Запись ---
+
+    def open_run(self, source, job_id=None):
+        """Регистрация нового запуска, возвращает логгер для его строк"""
+        job_id = job_id or uuid.uuid4().hex[:12]
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO runs (job_id, source, started, status) VALUES (?, ?, ?, ?)",
+                (job_id, source, datetime.now().isoformat(timespec="seconds"), "running"),
+            )
+        return RunLogger(self, job_id, source)
+
+    def _append(self, job_id, source, line):
+        record = {
+            "ts": datetime.now().isoformat(timespec="milliseconds"),
+            "job": job_id,
+            "source": source,
+            "level": detect_level(line),
+            "msg": line,
+        }
+        with self._lock:
+            self._buffer.append(json.dumps(record, ensure_ascii=False))
+            self._active_jobs.add(job_id)
+            if (len(self._buffer) >= self.buffer_lines
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+
+        if self._active_file is None:
+            self._active_file = open(os.path.join(self.root, self._active_name), "a", encoding="utf-8")
+        self._active_file.write("\n".join(self._buffer) + "\n")
+        self._active_file.flush()
+        self._buffer.clear()
+
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO segments (job_id, segment) VALUES (?, ?)",
+                [(job, self._active_name) for job in self._active_jobs],
+            )
+        self._active_jobs.clear()
+
+        if self._active_file.tell() >= self.max_segment_bytes:
+            self._rotate_locked()
+
+    def _rotate_locked(self):
+        """Сжатие активного сегмента и перенос ссылок индекса на архив"""
+        if self._active_file is not None:
+            self._active_file.close()
+            self._active_file = None
+
+        active_path = os.path.join(self.root, self._active_name)
+        if not os.path.exists(active_path) or os.path.getsize(active_path) == 0:
+            return
+
+        self._rotations += 1
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        segment_name = f"seg-{stamp}-{os.getpid()}-{self._rotations}.jsonl.gz"
+        with open(active_path, "rb") as src, gzip.open(os.path.join(self.root, segment_name), "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(active_path)
+
+        with self._connect() as conn:
+            conn.execute("UPDATE segments SET segment = ? WHERE segment = ?", (segment_name, self._active_name))
+        # Долго работающий сервер держит лимиты хранения не только при старте
+        self.cleanup()
+
+    def _finish(self, job_id, status, lines):
+        self.flush()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE runs SET finished = ?, status = ?, lines = ? WHERE job_id = ?",
+                (datetime.now().isoformat(timespec="seconds"), status, lines, job_id),
+            )
+
+    def close(self):
+        """Сброс буфера и сжатие активного сегмента (вызывается при завершении процесса)"""
+        with self._lock:
+            self._flush_locked()
+            self._rotate_locked()
+
+    # --- Хранение ---
+
+    def _roll_stale_active(self):
+        """
+        Активные сегменты процессов, которые завершились аварийно (close() не вызван):
+        сжимаются в обычные сегменты с исходным временем изменения, их незавершённые запуски
+        помечаются interrupted
+        """
+        for name in os.listdir(self.root):
+            if not (name.startswith("active-") and name.endswith(".jsonl")):
+                continue
+            try:
+                pid = int(name[len("active-"):-len(".jsonl")])
+            except ValueError:
+                continue
+            if pid == os.getpid() or pid_alive(pid):
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                stat = os.stat(path)
+                if stat.st_size == 0:
+                    os.remove(path)
+                    continue
+                stamp = datetime.fromtimestamp(stat.st_mtime).strftime("%Y%m%d-%H%M%S")
+                segment_name = f"seg-{stamp}-{pid}-stale.jsonl.gz"
+                segment_path = os.path.join(self.root, segment_name)
+                with open(path, "rb") as src, gzip.open(segment_path, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+                os.utime(segment_path, (stat.st_atime, stat.st_mtime))
+                os.remove(path)
+            except OSError:
+                continue
+            with self._connect() as conn:
+                conn.execute("UPDATE segments SET segment = ? WHERE segment = ?", (segment_name, name))
+                conn.execute("""
+                    UPDATE runs SET status = 'interrupted'
+                    WHERE status = 'running' AND job_id IN (SELECT job_id FROM segments WHERE segment = ?)
+                """, (segment_name,))
+
+    def cleanup(self):
+        """
+        Сжатие брошенных активных сегментов, удаление сегментов старше max_age_days
+        и самых старых при превышении max_total_bytes
+        """
+        self._roll_stale_active()
+        now = time.time()
+        segments = []
+        for name in os.listdir(self.root):
+            if not name.startswith("seg-"):
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            segments.append((stat.st_mtime, stat.st_size, name))
+
+        segments.sort()
+        total = sum(size for _, size, _ in segments)
+        removed = []
+        for mtime, size, name in segments:
+            expired = now - mtime > self.max_age_days * 86400
+            if not expired and total <= self.max_total_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.root, name))
+            except OSError:
+                continue
+            total -= size
+            removed.append(name)
+
+        if removed:
+            with self._connect() as conn:
+                conn.executemany("DELETE FROM segments WHERE segment = ?", [(name,) for name in removed])
+                conn.execute("DELETE FROM runs WHERE job_id NOT IN (SELECT job_id FROM segments) AND status != 'running'")
+        return removed
+
+    # --- Поиск ---
+
+    def runs(self, source=None, limit=50):
+        """Последние запуски (опционально по источнику)"""
+        query = "SELECT * FROM runs"
+        params = []
+        if source:
+            query += " WHERE source = ?"
+            params.append(source)
+        query += " ORDER BY started DESC LIMIT ?"
+        params.append(limit)
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(query, params)]
+
+    def get_run(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM runs WHERE job_id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def read_run(self, job_id, level=None, contains=None):
+        """Строки одного запуска: читаются только сегменты из индекса"""
+        self.flush()
+        with self._connect() as conn:
+            names = [row["segment"] for row in conn.execute(
+                "SELECT segment FROM segments WHERE job_id = ? ORDER BY segment", (job_id,))]
+
+        # Сегменты читаются в порядке записи
+        paths = [os.path.join(self.root, name) for name in names]
+        paths = sorted((p for p in paths if os.path.exists(p)), key=os.path.getmtime)
+        for path in paths:
+            name = os.path.basename(path)
+            opener = gzip.open if name.endswith(".gz") else open
+            with opener(path, "rt", encoding="utf-8") as f:
+                for raw in f:
+                    # Быстрая отсечка до разбора JSON
+                    if job_id not in raw:
+                        continue
+                    try:
+                        record = json.loads(raw)
+                    except ValueError:
+                        continue
+                    if record.get("job") != job_id:
+                        continue
+                    if level and record.get("level") != level:
+                        continue
+                    if contains and contains not in record.get("msg", ""):
+                        continue
+                    yield record
+
+
+class RunLogger:
+    """Логгер одного запуска"""
+
+    def __init__(self, store, job_id, source):
+        self.store = store
+        self.job_id = job_id
+        self.source = source
+        self.lines = 0
+
+    def write(self, line):
+        self.lines += 1
+        self.store._append(self.job_id, self.source, line)
+
+    def finish(self, status="finished"):
+        self.store._finish(self.job_id, status, self.lines)
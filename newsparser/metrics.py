@@ -0,0 +1,267 @@
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from newsparser import profiles
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Маркер строки с итоговыми метриками в stdout парсера
+METRICS_MARKER = "[METRICS] "
+
+PHASE_TITLES = {
+    "chrome_launch": "Запуск Chrome",
+    "replay": "Запросы без браузера",
+    "page_load": "Загрузка страницы",
+    "scroll": "Прокрутка и ожидание",
+    "harvest": "Сбор данных из DOM",
+    "tagging": "Теги по словарю",
+    "archive": "Архив и сюжеты",
+    "save": "Сохранение в Excel",
+    "checkpoint": "Журнал запуска",
+    "alerts": "Уведомления",
+    "canonicalize": "Нормализация ссылок",
+    "dates": "Нормализация дат",
+    "dedup": "Повторы в запуске",
+    "announce": "Вывод записей",
+    "diff": "Сравнение со снимком",
+}
+
+
+def _process_peak_rss():
+    """Пиковый RSS текущего процесса в байтах (None, если определить нельзя)"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux отдаёт килобайты, macOS - байты
+        return peak if sys.platform == "darwin" else peak * 1024
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss)
+    return None
+
+
+class RunMetrics:
+    """
+    Метрики одного запуска парсера: длительность фаз, число команд WebDriver,
+    объём загруженных данных, количество новостей и пиковый RSS.
+    В конце запуска печатаются одной строкой с маркером [METRICS].
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.commands = {}
+        self.bytes_downloaded = 0
+        self.items = 0
+        self.browser_peak_rss = None
+        self._browser_pid = None
+        self._lock = threading.Lock()
+        # Открытые span: [время, которое не засчитывается фазе]
+        self._open_spans = []
+
+    @contextmanager
+    def span(self, phase):
+        """
+        Замер длительности фазы (повторные замеры одной фазы суммируются).
+        Время, пока extract_news стоит на yield внутри фазы, из неё вычитается (exclude)
+        """
+        start = time.perf_counter()
+        excluded = [0.0]
+        self._open_spans.append(excluded)
+        try:
+            yield
+        finally:
+            self._open_spans.remove(excluded)
+            self.add_time(phase, time.perf_counter() - start - excluded[0])
+            self._sample_browser_rss()
+
+    def exclude(self, elapsed):
+        """Время работы стадий конвейера над выданной записью: не засчитывается открытым фазам сбора"""
+        for excluded in self._open_spans:
+            excluded[0] += elapsed
+
+    def add_time(self, phase, elapsed, count=1):
+        """Время, замеренное вне span (стадии конвейера записей), суммируется с фазой phase"""
+        with self._lock:
+            total, calls = self.phases.get(phase, (0.0, 0))
+            self.phases[phase] = (total + elapsed, calls + count)
+
+    def instrument_driver(self, driver):
+        """Подсчёт всех команд WebDriver (включая команды элементов) по имени"""
+        original_execute = driver.execute
+
+        def counted_execute(driver_command, params=None):
+            with self._lock:
+                self.commands[driver_command] = self.commands.get(driver_command, 0) + 1
+            return original_execute(driver_command, params)
+
+        driver.execute = counted_execute
+        service = getattr(driver, "service", None)
+        process = getattr(service, "process", None)
+        self._browser_pid = getattr(process, "pid", None)
+        return driver
+
+    def record_page_bytes(self, driver):
+        """Добавляет объём переданных данных текущей страницы по Resource Timing API"""
+        try:
+            transferred = driver.execute_script("""
+                return performance.getEntriesByType('navigation')
+                    .concat(performance.getEntriesByType('resource'))
+                    .reduce((sum, e) => sum + (e.transferSize || 0), 0);
+            """)
+            self.bytes_downloaded += int(transferred or 0)
+        except Exception as e:
+            print(f"[WARN] Не удалось получить объём загруженных данных: {e}")
+
+    def set_items(self, count):
+        self.items = count
+
+    def _sample_browser_rss(self):
+        """Суммарный RSS chromedriver и Chrome (только если установлен psutil)"""
+        if psutil is None or not self._browser_pid:
+            return
+        try:
+            root = psutil.Process(self._browser_pid)
+            rss = sum(p.memory_info().rss for p in [root] + root.children(recursive=True))
+        except psutil.Error:
+            return
+        self.browser_peak_rss = max(self.browser_peak_rss or 0, rss)
+
+    def to_dict(self, status="success"):
+        return {
+            "source": self.source,
+            "status": status,
+            "duration": round(time.perf_counter() - self.started, 3),
+            "phases": {name: {"seconds": round(total, 3), "count": count}
+                       for name, (total, count) in self.phases.items()},
+            "commands": dict(self.commands),
+            "bytes_downloaded": self.bytes_downloaded,
+            "items": self.items,
+            "peak_rss": _process_peak_rss(),
+            "browser_peak_rss": self.browser_peak_rss,
+        }
+
+    def report(self, status="success"):
+        """Печать итоговых метрик для server.py / main.py"""
+        if status == "success":
+            profiles.mark_clean(self.source)
+        print("\n" + METRICS_MARKER + json.dumps(self.to_dict(status), ensure_ascii=False), flush=True)
+
+
+def parse_metrics_line(line):
+    """Возвращает словарь метрик, если строка содержит маркер [METRICS], иначе None"""
+    pos = line.find(METRICS_MARKER)
+    if pos == -1:
+        return None
+    try:
+        return json.loads(line[pos + len(METRICS_MARKER):])
+    except ValueError:
+        return None
+
+
+def _format_bytes(value):
+    if value is None:
+        return "—"
+    for unit in ("Б", "КБ", "МБ"):
+        if value < 1024:
+            return f"{value:.0f} {unit}"
+        value /= 1024
+    return f"{value:.1f} ГБ"
+
+
+def format_summary(metrics):
+    """Текстовая таблица метрик запуска для консоли"""
+    duration = metrics.get("duration") or 0
+    lines = [f"=== Метрики запуска {metrics.get('source')} ({metrics.get('status')}) ===",
+             f"{'Фаза':<24}{'Время, с':>10}{'Доля':>8}{'Раз':>6}"]
+    for phase, data in sorted(metrics.get("phases", {}).items(), key=lambda kv: -kv[1]["seconds"]):
+        share = data["seconds"] / duration * 100 if duration else 0
+        title = PHASE_TITLES.get(phase, phase)
+        lines.append(f"{title:<24}{data['seconds']:>10.2f}{share:>7.0f}%{data['count']:>6}")
+    lines.append(f"{'Всего':<24}{duration:>10.2f}")
+
+    commands = metrics.get("commands", {})
+    top = ", ".join(f"{name}={count}" for name, count in
+                    sorted(commands.items(), key=lambda kv: -kv[1])[:5])
+    lines.append(f"Команд WebDriver: {sum(commands.values())}" + (f" ({top})" if top else ""))
+    lines.append(f"Загружено: {_format_bytes(metrics.get('bytes_downloaded'))}, "
+                 f"новостей: {metrics.get('items', 0)}")
+    lines.append(f"Пиковый RSS: парсер {_format_bytes(metrics.get('peak_rss'))}, "
+                 f"браузер {_format_bytes(metrics.get('browser_peak_rss'))}")
+    return "\n".join(lines)
+
+
+class MetricsRegistry:
+    """Накопитель метрик всех запусков для эндпоинта /metrics в формате Prometheus"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.runs = {}
+        self.phase_seconds = {}
+        self.phase_count = {}
+        self.commands = {}
+        self.bytes_downloaded = {}
+        self.items = {}
+        self.last_duration = {}
+        self.last_peak_rss = {}
+        self.last_browser_peak_rss = {}
+
+    @staticmethod
+    def _inc(store, key, value=1):
+        store[key] = store.get(key, 0) + value
+
+    def observe(self, metrics):
+        source = metrics.get("source", "unknown")
+        with self._lock:
+            self._inc(self.runs, (source, metrics.get("status", "unknown")))
+            for phase, data in metrics.get("phases", {}).items():
+                self._inc(self.phase_seconds, (source, phase), data["seconds"])
+                self._inc(self.phase_count, (source, phase), data["count"])
+            for command, count in metrics.get("commands", {}).items():
+                self._inc(self.commands, (source, command), count)
+            self._inc(self.bytes_downloaded, (source,), metrics.get("bytes_downloaded", 0))
+            self._inc(self.items, (source,), metrics.get("items", 0))
+            self.last_duration[(source,)] = metrics.get("duration", 0)
+            if metrics.get("peak_rss") is not None:
+                self.last_peak_rss[(source,)] = metrics["peak_rss"]
+            if metrics.get("browser_peak_rss") is not None:
+                self.last_browser_peak_rss[(source,)] = metrics["browser_peak_rss"]
+
+    def render(self):
+        """Текст в формате Prometheus exposition"""
+        families = [
+            ("parser_runs_total", "counter", "Количество запусков парсеров", ("source", "status"), self.runs),
+            ("parser_phase_seconds_total", "counter", "Суммарное время фаз парсинга", ("source", "phase"), self.phase_seconds),
+            ("parser_phase_spans_total", "counter", "Количество замеров фаз парсинга", ("source", "phase"), self.phase_count),
+            ("parser_webdriver_commands_total", "counter", "Команды WebDriver", ("source", "command"), self.commands),
+            ("parser_downloaded_bytes_total", "counter", "Объём загруженных страницами данных", ("source",), self.bytes_downloaded),
+            ("parser_items_total", "counter", "Собранные новости", ("source",), self.items),
+            ("parser_last_run_duration_seconds", "gauge", "Длительность последнего запуска", ("source",), self.last_duration),
+            ("parser_last_peak_rss_bytes", "gauge", "Пиковый RSS процесса парсера в последнем запуске", ("source",), self.last_peak_rss),
+            ("parser_last_browser_peak_rss_bytes", "gauge", "Пиковый RSS браузера в последнем запуске", ("source",), self.last_browser_peak_rss),
+        ]
+        out = []
+        with self._lock:
+            for name, kind, help_text, labels, values in families:
+                out.append(f"# HELP {name} {help_text}")
+                out.append(f"# TYPE {name} {kind}")
+                for key, value in sorted(values.items()):
+                    label_str = ",".join(f'{label}="{_escape_label(v)}"' for label, v in zip(labels, key))
+                    out.append(f"{name}{{{label_str}}} {value}")
+        return "\n".join(out) + "\n"
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
@@ -0,0 +1,384 @@
+import os
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+
+from newsparser import dedup
+from newsparser.archive import archive_records
+from newsparser.records import announce, canonical_url
+from newsparser.snapshots import diff_records
+from newsparser.tagging import load_tagger
+from newsparser.workqueue import worker_mode
+
+try:
+    from openpyxl import Workbook
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+    from openpyxl.worksheet.hyperlink import Hyperlink
+except ImportError:
+    Workbook = None
+
+# Записей в пачке архива: одна транзакция SQLite на пачку, а не на запись
+ARCHIVE_BATCH = 50
+# Неполная пачка архива записывается через столько секунд: номер сюжета нужен строкам [RECORD] сразу
+ARCHIVE_FLUSH_SECONDS = 1.0
+# Дата публикации дальше в будущем - ошибка распознавания или часов сайта
+MAX_FUTURE = timedelta(days=1)
+
+
+def batched(records, size, interval=None):
+    """
+    Списки по size записей из потока (последний может быть короче). С interval пачка
+    отдаётся и неполной, если с её первой записи прошло interval секунд (проверяется
+    при поступлении следующей записи)
+    """
+    records = iter(records)
+    if interval is None:
+        while True:
+            batch = list(islice(records, size))
+            if not batch:
+                return
+            yield batch
+    batch = []
+    started = 0.0
+    for record in records:
+        if not batch:
+            started = time.monotonic()
+        batch.append(record)
+        if len(batch) >= size or time.monotonic() - started >= interval:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Stage:
+    """
+    Стадия конвейера записей. Обрабатывает поток по одной записи (process_one, None - запись
+    отбрасывается) или, при batch_size > 1, пачками (process_batch; batch_interval - предел
+    в секундах, сколько пачка копится). finish() вызывается после того, как весь поток
+    прошёл без ошибки: там стоки сохраняют результат.
+    """
+
+    name = "stage"
+    batch_size = 1
+    batch_interval = None
+
+    def process(self, records):
+        if self.batch_size <= 1:
+            for record in records:
+                record = self.process_one(record)
+                if record is not None:
+                    yield record
+            return
+        for batch in batched(records, self.batch_size, self.batch_interval):
+            yield from self.process_batch(batch)
+
+    def process_one(self, record):
+        return record
+
+    def process_batch(self, batch):
+        return [record for record in map(self.process_one, batch) if record is not None]
+
+    def finish(self):
+        pass
+
+
+class Transform(Stage):
+    """Стадия из готового генератора записей (checkpoint.stream, alerts.stream, announce...)"""
+
+    def __init__(self, name, func):
+        self.name = name
+        self.func = func
+
+    def process(self, records):
+        return self.func(records)
+
+
+class CanonicalizeURLs(Stage):
+    """Ссылки в каноническом виде: метки рекламы не делают одну новость двумя записями архива и снимка"""
+
+    name = "canonicalize"
+
+    def process_one(self, record):
+        record.url = canonical_url(record.url)
+        return record
+
+
+class NormalizeDates(Stage):
+    """
+    Даты публикации дальше MAX_FUTURE в будущем (ошибка сайта или распознавания) сбрасываются в None.
+    Текст даты разбирается один раз, в NewsRecord.
+    """
+
+    name = "dates"
+
+    def __init__(self, now=None):
+        self.now = now or datetime.now()
+
+    def process_one(self, record):
+        if record.published_at is not None and record.published_at > self.now + MAX_FUTURE:
+            record.published_at = None
+        return record
+
+
+class Deduplicate(Stage):
+    """Повторы внутри запуска (одна новость в ленте дважды): по ссылке, без неё - по заголовку"""
+
+    name = "dedup"
+
+    def __init__(self):
+        self.seen = set()
+        self.dropped = 0
+
+    def process_one(self, record):
+        url = record.url if record.url and str(record.url).startswith("http") else None
+        key = url or dedup.normalize_title(record.title)
+        if key in self.seen:
+            self.dropped += 1
+            return None
+        self.seen.add(key)
+        return record
+
+    def finish(self):
+        if self.dropped:
+            print(f"[INFO] Пропущено повторов в ленте: {self.dropped}")
+
+
+class Filter(Stage):
+    """Только записи, для которых predicate(record) истинно"""
+
+    def __init__(self, predicate, name="filter"):
+        self.predicate = predicate
+        self.name = name
+        self.dropped = 0
+
+    def process_one(self, record):
+        if self.predicate(record):
+            return record
+        self.dropped += 1
+        return None
+
+    def finish(self):
+        if self.dropped:
+            print(f"[INFO] Отфильтровано записей ({self.name}): {self.dropped}")
+
+
+class Tagging(Stage):
+    """Теги по словарю (record.tags); без словаря или при ошибке записи проходят без тегов"""
+
+    name = "tagging"
+
+    def __init__(self):
+        try:
+            self.tagger = load_tagger()
+        except Exception as e:
+            print(f"[WARN] Не удалось проставить теги: {e}")
+            self.tagger = None
+
+    def process_one(self, record):
+        if self.tagger is not None:
+            record.tags = self.tagger.tags(record.title)
+        return record
+
+
+class Archive(Stage):
+    """Запись в архив пачками по мере сбора, номер сюжета - в record.cluster"""
+
+    name = "archive"
+    batch_size = ARCHIVE_BATCH
+    batch_interval = ARCHIVE_FLUSH_SECONDS
+
+    def process_batch(self, batch):
+        return archive_records(batch)
+
+
+class DiffSink(Stage):
+    """
+    Сравнение ленты с прошлым снимком (строки [CHANGE]). Снятые записи определяются
+    по позициям во всей ленте, поэтому сравнение - в finish(); partial - функция,
+    которая к концу потока знает, был ли запуск частичным (checkpoint.partial)
+    """
+
+    name = "diff"
+
+    def __init__(self, partial=None):
+        self.partial = partial or (lambda: False)
+        self.records = []
+
+    def process_one(self, record):
+        self.records.append(record)
+        return record
+
+    def finish(self):
+        diff_records(self.records, partial=self.partial())
+        self.records = []
+
+
+class ExcelSink(Stage):
+    """
+    Excel-файл parsed_excels/<file_name>: строки дописываются в книгу openpyxl по мере потока
+    (без промежуточных столбцов и DataFrame), ширина столбцов и сохранение - в finish().
+    date_header=None - без столбца даты. «Сюжет» и «Теги» остаются, только если хоть у одной записи они есть.
+    """
+
+    name = "save"
+
+    def __init__(self, file_name, date_header="Дата публикации", source_column=False):
+        self.file_name = file_name
+        self.columns = [("Название", lambda record: record.title), ("Ссылка", lambda record: record.url)]
+        if date_header:
+            self.columns.append((date_header, lambda record: record.raw_date))
+        if source_column:
+            self.columns.append(("Источник", lambda record: record.source))
+        self.columns += [
+            ("Сюжет", lambda record: record.cluster),
+            ("Теги", lambda record: ", ".join(record.tags) if record.tags is not None else None),
+        ]
+        self.workbook = None
+        self.sheet = None
+        self.widths = [len(header) for header, _ in self.columns]
+        self.used = set()
+        self.rows = 0
+
+    def _open(self):
+        if Workbook is None:
+            raise RuntimeError("для сохранения в Excel нужен openpyxl (pip install openpyxl)")
+        self.workbook = Workbook()
+        self.sheet = self.workbook.active
+        self.sheet.title = "Новости"
+        self.sheet.append([header for header, _ in self.columns])
+
+    def process_one(self, record):
+        if self.workbook is None:
+            self._open()
+        row = [value(record) for _, value in self.columns]
+        self.sheet.append(row)
+        self.rows += 1
+        for index, value in enumerate(row):
+            if value is not None:
+                self.widths[index] = max(self.widths[index], len(str(value)))
+                self.used.add(self.columns[index][0])
+
+        cell = self.sheet.cell(row=self.rows + 1, column=2)
+        if cell.value and isinstance(cell.value, str) and cell.value.startswith("http"):
+            cell.hyperlink = Hyperlink(ref=cell.coordinate, target=cell.value, tooltip="Перейти по ссылке")
+            cell.font = Font(color="0000EE", underline="single")
+        return record
+
+    def finish(self):
+        if self.workbook is None:
+            print("[WARN] Нет данных для сохранения, сохраняется пустая таблица")
+            self._open()
+        # Справа налево: удаление столбца сдвигает следующие
+        for index in range(len(self.columns) - 1, -1, -1):
+            if self.columns[index][0] in ("Сюжет", "Теги") and self.columns[index][0] not in self.used:
+                self.sheet.delete_cols(index + 1)
+                del self.widths[index]
+        for index, width in enumerate(self.widths, start=1):
+            self.sheet.column_dimensions[get_column_letter(index)].width = width + 2
+
+        save_dir = os.path.join(os.getcwd(), "parsed_excels")
+        os.makedirs(save_dir, exist_ok=True)
+        full_output_path = os.path.join(save_dir, self.file_name)
+        self.workbook.save(full_output_path)
+        print(f"[INFO] Данные сохранены в файл '{full_output_path}' ({self.rows} новостей)")
+
+
+class Pipeline:
+    """
+    Упорядоченные стадии над потоком записей extract_news. Записи идут по генераторам
+    от стадии к стадии и нигде не собираются в общий список (кроме стоков, которым он нужен).
+
+    Время каждой стадии замеряется на её next(): из него вычитается время предыдущей,
+    так что в метрики попадает собственная работа стадии, включая finish(). Время, пока
+    источник стоит на yield, вычитается из его открытых фаз (metrics.span("harvest") и др.).
+    """
+
+    def __init__(self, stages, metrics=None):
+        self.stages = list(stages)
+        self.metrics = metrics
+        # Накопленное время next() источника и каждой стадии (включая всё, что выше по потоку)
+        self._inclusive = [0.0] * (len(self.stages) + 1)
+        self._finish = [0.0] * len(self.stages)
+
+    def _timed(self, records, index):
+        records = iter(records)
+        while True:
+            start = time.perf_counter()
+            try:
+                record = next(records)
+            except StopIteration:
+                self._inclusive[index] += time.perf_counter() - start
+                return
+            except BaseException:
+                self._inclusive[index] += time.perf_counter() - start
+                raise
+            self._inclusive[index] += time.perf_counter() - start
+            paused = time.perf_counter()
+            yield record
+            if index == 0 and self.metrics is not None:
+                self.metrics.exclude(time.perf_counter() - paused)
+
+    def stream(self, records):
+        """Генератор записей после всех стадий (finish() стадий не вызывается)"""
+        records = self._timed(records, 0)
+        for index, stage in enumerate(self.stages, start=1):
+            records = self._timed(stage.process(records), index)
+        return records
+
+    def run(self, records):
+        """Прогон потока через все стадии и завершение стоков; возвращает число записей на выходе"""
+        count = 0
+        for _ in self.stream(records):
+            count += 1
+        for index, stage in enumerate(self.stages):
+            start = time.perf_counter()
+            stage.finish()
+            self._finish[index] += time.perf_counter() - start
+        if self.metrics is not None:
+            self.metrics.set_items(count)
+            for stage, seconds in self.timings().items():
+                self.metrics.add_time(stage, seconds)
+        return count
+
+    def timings(self):
+        """Собственное время стадий в секундах по именам"""
+        result = {}
+        for index, stage in enumerate(self.stages):
+            own = self._inclusive[index + 1] - self._inclusive[index] + self._finish[index]
+            result[stage.name] = result.get(stage.name, 0.0) + max(0.0, own)
+        return result
+
+
+def news_pipeline(metrics, checkpoint, file_name, alerts=None, date_header="Дата публикации",
+                  source_column=False, extra_stages=()):
+    """
+    Стандартный конвейер парсера: журнал запуска, ссылки и даты, повторы, уведомления, теги,
+    архив, вывод [RECORD] (после архива - с номером сюжета), сравнение со снимком и Excel.
+    Новая обработка для всех источников добавляется сюда; extra_stages - дополнительные
+    стадии одного парсера перед архивом.
+
+    Под рабочим очереди (NEWSPARSER_WORKER_MODE=1) остаются только сбор и подготовка записей:
+    рабочий пересылает их координатору, который один пишет в архив.
+    """
+    local = not worker_mode()
+    stages = [
+        Transform("checkpoint", checkpoint.stream),
+        CanonicalizeURLs(),
+        NormalizeDates(),
+        Deduplicate(),
+    ]
+    if alerts is not None and local:
+        stages.append(Transform("alerts", alerts.stream))
+    stages.append(Tagging())
+    stages += list(extra_stages)
+    if local:
+        stages.append(Archive())
+    stages.append(Transform("announce", announce))
+    if local:
+        stages += [
+            DiffSink(partial=lambda: checkpoint.partial),
+            ExcelSink(file_name, date_header=date_header, source_column=source_column),
+        ]
+    return Pipeline(stages, metrics)
@@ -0,0 +1,112 @@
+import os
+import signal
+import subprocess
+import time
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+IS_WINDOWS = os.name == "nt"
+
+# Сколько ждать мягкого завершения дерева процессов перед принудительным
+KILL_DEADLINE = 5.0
+
+
+def popen_group(args, **kwargs):
+    """
+    Запуск процесса в отдельной группе, чтобы потом можно было завершить
+    его вместе с потомками (chromedriver и Chrome).
+    """
+    if IS_WINDOWS:
+        kwargs["creationflags"] = kwargs.get("creationflags", 0) | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs["start_new_session"] = True
+    return subprocess.Popen(args, **kwargs)
+
+
+def pid_alive(pid):
+    """Жив ли процесс pid (без psutil на Windows - через OpenProcess, os.kill там завершил бы процесс)"""
+    if psutil is not None:
+        return psutil.pid_exists(pid)
+    if IS_WINDOWS:
+        import ctypes
+
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            # Нет доступа - процесс есть, но чужой
+            return kernel32.GetLastError() == 5
+        try:
+            code = ctypes.c_ulong()
+            kernel32.GetExitCodeProcess(handle, ctypes.byref(code))
+            return code.value == 259  # STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _descendants(pid):
+    """Все потомки процесса (только если установлен psutil)"""
+    if psutil is None:
+        return []
+    try:
+        return psutil.Process(pid).children(recursive=True)
+    except psutil.Error:
+        return []
+
+
+def _wait(process, deadline):
+    try:
+        process.wait(timeout=max(0.0, deadline - time.monotonic()))
+        return True
+    except subprocess.TimeoutExpired:
+        return False
+
+
+def _signal_group(process, sig):
+    try:
+        os.killpg(process.pid, sig)
+    except (ProcessLookupError, PermissionError):
+        if process.poll() is None:
+            process.send_signal(sig)
+
+
+def kill_tree(process, timeout=KILL_DEADLINE):
+    """
+    Завершение процесса и всех его потомков.
+    Сначала мягко (SIGTERM / taskkill), по истечении timeout - принудительно.
+    """
+    deadline = time.monotonic() + timeout
+    # Потомков запоминаем заранее: после смерти родителя их уже не найти по дереву
+    children = _descendants(process.pid)
+
+    if IS_WINDOWS:
+        subprocess.run(["taskkill", "/PID", str(process.pid), "/T"],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if not _wait(process, deadline):
+            subprocess.run(["taskkill", "/PID", str(process.pid), "/T", "/F"],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    else:
+        # Процесс запущен с start_new_session, поэтому номер группы равен его pid
+        _signal_group(process, signal.SIGTERM)
+        _wait(process, deadline)
+        # Группа добивается даже если лидер уже вышел: потомки могли остаться
+        _signal_group(process, signal.SIGKILL)
+
+    # Chrome может выйти из группы процессов - добиваем оставшихся потомков по списку
+    for child in children:
+        try:
+            if child.is_running():
+                child.kill()
+        except psutil.Error:
+            continue
+
+    _wait(process, time.monotonic() + 1.0)
@@ -0,0 +1,235 @@
+import atexit
+import json
+import os
+import shutil
+import sys
+import time
+from datetime import datetime
+
+from newsparser import assets
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+PROFILES_DIR = os.path.join(assets.PROJECT_DIR, "data", "profiles")
+ENABLED = os.environ.get("NEWSPARSER_PROFILES", "1") != "0"
+
+# Профиль больше MAX_SIZE_MB пересоздаётся; дисковый кэш Chrome ограничен CACHE_SIZE_MB
+MAX_SIZE_MB = 400
+CACHE_SIZE_MB = 200
+# Столько запусков подряд без штатного завершения (Chrome убит, сбой) - профиль считается испорченным
+MAX_DIRTY = 3
+
+# Файлы, которыми Chrome помечает профиль занятым; после аварийного завершения мешают запуску
+_SINGLETON_FILES = ("SingletonLock", "SingletonCookie", "SingletonSocket")
+
+_leases = {}
+
+
+class ProfileLease:
+    """
+    Постоянный профиль Chrome источника (data/profiles/<источник>/chrome): cookies согласий
+    и HTTP-кэш сайта сохраняются между запусками.
+
+    Профиль занят одним процессом: блокировка файла .lock без ожидания. Параллельный запуск
+    того же источника получает None от acquire() и работает с чистым временным профилем,
+    а не портит общий. meta.json хранит счётчик незавершённых запусков и отметку о согласии с cookie.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.root = os.path.join(PROFILES_DIR, source)
+        self.chrome_dir = os.path.join(self.root, "chrome")
+        self.meta_path = os.path.join(self.root, "meta.json")
+        self._lock_file = None
+        self.meta = {}
+
+    def _try_lock(self):
+        os.makedirs(self.root, exist_ok=True)
+        self._lock_file = open(os.path.join(self.root, ".lock"), "a+")
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            elif msvcrt is not None:
+                self._lock_file.seek(0)
+                msvcrt.locking(self._lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            self._lock_file.close()
+            self._lock_file = None
+            return False
+
+    def _read_meta(self):
+        try:
+            with open(self.meta_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_meta(self):
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.meta_path)
+
+    def size_mb(self):
+        total = 0
+        for folder, _, files in os.walk(self.chrome_dir):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(folder, name))
+                except OSError:
+                    pass
+        return total / (1024 * 1024)
+
+    def reset(self, reason):
+        """Удаление профиля: следующий запуск начнётся с чистого (согласие с cookie тоже сбрасывается)"""
+        print(f"[WARN] Профиль браузера {self.source} пересоздан: {reason}")
+        shutil.rmtree(self.chrome_dir, ignore_errors=True)
+        self.meta = {"created_at": datetime.now().isoformat(timespec="seconds"), "resets": self.meta.get("resets", 0) + 1,
+                     "last_reset_reason": reason}
+
+    def acquire(self):
+        if not self._try_lock():
+            return False
+        self.meta = self._read_meta()
+        if self.meta.get("dirty", 0) >= MAX_DIRTY:
+            self.reset(f"{self.meta['dirty']} запуска подряд завершились аварийно")
+        elif os.path.isdir(self.chrome_dir):
+            size = self.size_mb()
+            if size > MAX_SIZE_MB:
+                self.reset(f"размер {size:.0f} МБ больше {MAX_SIZE_MB} МБ")
+        # Блокировка у нас, значит метки занятости остались от упавшего Chrome
+        for name in _SINGLETON_FILES:
+            try:
+                os.remove(os.path.join(self.chrome_dir, name))
+            except OSError:
+                pass
+        os.makedirs(self.chrome_dir, exist_ok=True)
+        self.meta.setdefault("created_at", datetime.now().isoformat(timespec="seconds"))
+        # Снимается mark_clean() после успешного запуска: не снят - запуск оборвался или упал
+        self.meta["dirty"] = self.meta.get("dirty", 0) + 1
+        self.meta["runs"] = self.meta.get("runs", 0) + 1
+        self.meta["last_run"] = datetime.now().isoformat(timespec="seconds")
+        self._write_meta()
+        return True
+
+    def mark_clean(self):
+        self.meta["dirty"] = 0
+        self._write_meta()
+
+    def release(self):
+        """Снятие блокировки; счётчик dirty остаётся, если запуск не отметился успешным"""
+        if self._lock_file is None:
+            return
+        try:
+            self._write_meta()
+        finally:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def arguments(self):
+        return [f"--user-data-dir={self.chrome_dir}", f"--disk-cache-size={CACHE_SIZE_MB * 1024 * 1024}"]
+
+
+def acquire(source):
+    """
+    Профиль источника на время процесса (освобождается при выходе) или None:
+    профили выключены (NEWSPARSER_PROFILES=0) или профиль занят параллельным запуском
+    """
+    if not ENABLED:
+        return None
+    if source in _leases:
+        return _leases[source]
+    lease = ProfileLease(source)
+    try:
+        acquired = lease.acquire()
+    except OSError as e:
+        print(f"[WARN] Профиль браузера {source} недоступен: {e}")
+        return None
+    if not acquired:
+        print(f"[INFO] Профиль браузера {source} занят другим запуском, используется временный")
+        return None
+    _leases[source] = lease
+    atexit.register(lease.release)
+    return lease
+
+
+def mark_clean(source):
+    """Запуск источника завершился успешно (metrics.report): профиль не считается испорченным"""
+    lease = _leases.get(source)
+    if lease is not None:
+        lease.mark_clean()
+
+
+def has_consent(source):
+    """Согласие с cookie уже дано в постоянном профиле этого запуска"""
+    lease = _leases.get(source)
+    return bool(lease and lease.meta.get("consent"))
+
+
+def mark_consent(source):
+    lease = _leases.get(source)
+    if lease is not None:
+        lease.meta["consent"] = datetime.now().isoformat(timespec="seconds")
+        lease._write_meta()
+
+
+def forget_consent(source):
+    """Баннер согласия снова показан (cookie истекла или сброшена сайтом)"""
+    lease = _leases.get(source)
+    if lease is not None and lease.meta.pop("consent", None):
+        lease._write_meta()
+
+
+def accept_consent(driver, source, by, value, wait=1.0):
+    """
+    Закрытие баннера согласия с cookie (кнопка по локатору by/value).
+    В постоянном профиле согласие уже сохранено: баннер не ждём и только проверяем,
+    не показан ли он снова. Возвращает True, если кнопка была нажата.
+    """
+    remembered = has_consent(source)
+    if not remembered:
+        time.sleep(wait)
+    buttons = driver.find_elements(by, value)
+    if not buttons:
+        if not remembered:
+            print("[INFO] Cookie-уведомление не найдено")
+        mark_consent(source)
+        return False
+    if remembered:
+        forget_consent(source)
+    try:
+        buttons[0].click()
+    except Exception as e:
+        print(f"[WARN] Не удалось закрыть cookie-уведомление: {e}")
+        return False
+    print("[INFO] Приняли cookie-уведомление")
+    time.sleep(wait)
+    mark_consent(source)
+    return True
+
+
+if __name__ == "__main__":
+    # Состояние профилей: python -m newsparser.profiles [--reset <источник>]
+    if len(sys.argv) == 3 and sys.argv[1] == "--reset":
+        lease = ProfileLease(sys.argv[2])
+        if not lease.acquire():
+            print(f"Профиль {sys.argv[2]} сейчас используется")
+            sys.exit(1)
+        lease.reset("по запросу")
+        lease.mark_clean()
+        lease.release()
+        sys.exit(0)
+    if os.path.isdir(PROFILES_DIR):
+        for name in sorted(os.listdir(PROFILES_DIR)):
+            lease = ProfileLease(name)
+            meta = lease._read_meta()
+            print(f"{name:<24} {lease.size_mb():>7.1f} МБ  запусков {meta.get('runs', 0):<5} "
+                  f"согласие: {'да' if meta.get('consent') else 'нет'}  сбросов: {meta.get('resets', 0)}")
@@ -0,0 +1,236 @@
+import json
+import os
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+from newsparser import assets
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+STATE_DIR = os.path.join(assets.PROJECT_DIR, "data", "ratelimit")
+# Необязательный файл с бюджетами сайтов: {"tass.ru": {"rate": 2, "burst": 10}, ...}
+LIMITS_PATH = os.environ.get("NEWSPARSER_RATELIMITS") or os.path.join(assets.PROJECT_DIR, "ratelimits.json")
+ENABLED = os.environ.get("NEWSPARSER_RATELIMIT", "1") != "0"
+
+# Бюджет по умолчанию: запросов в секунду и размер «пачки» сверх среднего темпа
+DEFAULT_RATE = 1.0
+DEFAULT_BURST = 5
+LIMITS = {
+    "tass.ru": {"rate": 2.0, "burst": 10},
+    "ria.ru": {"rate": 2.0, "burst": 10},
+    "1prime.ru": {"rate": 1.0, "burst": 5},
+    "interfax.ru": {"rate": 1.0, "burst": 5},
+    "rg.ru": {"rate": 1.0, "burst": 5},
+    "mashnews.ru": {"rate": 0.5, "burst": 3},
+}
+
+# Пауза для всех процессов после ответа 429/503 (Retry-After, если сайт его прислал)
+PENALTY = 60
+MAX_PENALTY = 900
+# Максимальный шаг ожидания: блокировка файла не держится во время сна
+MAX_SLEEP = 5
+
+# Команды WebDriver, после которых браузер идёт на сайт
+_PAGE_COMMANDS = {"get", "refresh", "clickElement"}
+_SCRIPT_REQUEST_RE = re.compile(r"\.click\(|scrollTo\(|scrollBy\(")
+
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+_limits = None
+
+
+def domain_of(url):
+    """Домен без www. и порта; поддомены считаются отдельно только при своём бюджете"""
+    host = (urlsplit(url).hostname or url).lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def _load_limits():
+    global _limits
+    if _limits is None:
+        _limits = {domain: dict(budget) for domain, budget in LIMITS.items()}
+        if os.path.exists(LIMITS_PATH):
+            try:
+                with open(LIMITS_PATH, encoding="utf-8") as f:
+                    _limits.update(json.load(f))
+            except (OSError, ValueError) as e:
+                print(f"[WARN] Не удалось прочитать бюджеты сайтов {LIMITS_PATH}: {e}")
+    return _limits
+
+
+def budget(domain):
+    """(запросов в секунду, размер пачки) для домена или ближайшего родительского домена"""
+    limits = _load_limits()
+    parts = domain.split(".")
+    for i in range(len(parts) - 1):
+        entry = limits.get(".".join(parts[i:]))
+        if entry:
+            return float(entry.get("rate", DEFAULT_RATE)), float(entry.get("burst", DEFAULT_BURST))
+    return DEFAULT_RATE, float(DEFAULT_BURST)
+
+
+class _DomainLock:
+    """
+    Эксклюзивная блокировка состояния домена: между процессами - через файл
+    (fcntl / msvcrt), между потоками одного процесса - обычным Lock.
+    Состояние ведра хранится в том же файле.
+    """
+
+    def __init__(self, domain):
+        self.path = os.path.join(STATE_DIR, f"{domain}.json")
+        with _thread_locks_guard:
+            self._thread_lock = _thread_locks.setdefault(domain, threading.Lock())
+        self._file = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        try:
+            os.makedirs(STATE_DIR, exist_ok=True)
+            self._file = open(self.path, "a+", encoding="utf-8")
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            elif msvcrt is not None:
+                self._file.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        # LK_LOCK сам повторяет попытки ~10 с, затем сдаётся - ждём дальше
+                        continue
+        except BaseException:
+            self._release()
+            raise
+        return self
+
+    def read(self):
+        self._file.seek(0)
+        try:
+            return json.loads(self._file.read() or "{}")
+        except ValueError:
+            return {}
+
+    def write(self, state):
+        self._file.seek(0)
+        self._file.truncate()
+        self._file.write(json.dumps(state))
+        self._file.flush()
+
+    def _release(self):
+        if self._file is not None:
+            if fcntl is None and msvcrt is not None:
+                self._file.seek(0)
+                try:
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+                except OSError:
+                    pass
+            self._file.close()
+            self._file = None
+        self._thread_lock.release()
+
+    def __exit__(self, *exc):
+        self._release()
+
+
+def acquire(url, tokens=1):
+    """
+    Получение разрешения на запрос к сайту (блокирует, пока в ведре домена нет токенов
+    или действует пауза после 429/503). Ведро общее для всех процессов парсеров.
+    Возвращает время ожидания в секундах.
+    """
+    if not ENABLED or not url or url.startswith("file:"):
+        return 0.0
+    domain = domain_of(url)
+    rate, burst = budget(domain)
+    waited = 0.0
+    while True:
+        with _DomainLock(domain) as lock:
+            state = lock.read()
+            now = time.time()
+            blocked_until = state.get("blocked_until", 0)
+            if blocked_until > now:
+                delay = blocked_until - now
+            else:
+                elapsed = max(0.0, now - state.get("updated", now))
+                available = min(burst, state.get("tokens", burst) + elapsed * rate)
+                if available >= tokens:
+                    lock.write({"tokens": available - tokens, "updated": now, "blocked_until": blocked_until})
+                    return waited
+                lock.write({"tokens": available, "updated": now, "blocked_until": blocked_until})
+                delay = (tokens - available) / rate
+        delay = min(delay, MAX_SLEEP)
+        time.sleep(delay)
+        waited += delay
+
+
+def penalize(url, retry_after=None):
+    """
+    Сайт ответил 429/503: все процессы делают паузу по домену, ведро опустошается.
+    retry_after - значение заголовка Retry-After (секунды), если есть.
+    """
+    if not ENABLED or not url:
+        return
+    try:
+        seconds = float(retry_after) if retry_after else PENALTY
+    except ValueError:
+        seconds = PENALTY
+    seconds = min(max(seconds, 1.0), MAX_PENALTY)
+    domain = domain_of(url)
+    with _DomainLock(domain) as lock:
+        state = lock.read()
+        now = time.time()
+        blocked_until = max(state.get("blocked_until", 0), now + seconds)
+        lock.write({"tokens": 0.0, "updated": now, "blocked_until": blocked_until})
+    print(f"[WARN] {domain} ограничивает запросы: пауза {int(seconds)} с для всех парсеров")
+
+
+def penalize_error(url, error):
+    """penalize() для HTTPError с кодом 429/503; остальные ошибки не трогает"""
+    if getattr(error, "code", None) in (429, 503):
+        headers = getattr(error, "headers", None)
+        penalize(url, headers.get("Retry-After") if headers is not None else None)
+
+
+def throttle(driver):
+    """
+    Лимит для Selenium: загрузки страниц, клики и прокрутки (которые подгружают ленту)
+    ждут токен домена текущей страницы. Вызывается после checkpoint.guard, чтобы ожидание
+    в очереди не считалось зависанием Chrome.
+    """
+    original_execute = driver.execute
+    current = {"url": None}
+
+    def throttled_execute(driver_command, params=None):
+        if driver_command == "get" and params:
+            current["url"] = params.get("url")
+        if driver_command in _PAGE_COMMANDS or (
+                driver_command in ("executeScript", "executeAsyncScript") and params
+                and _SCRIPT_REQUEST_RE.search(params.get("script", ""))):
+            acquire(current["url"])
+        return original_execute(driver_command, params)
+
+    driver.execute = throttled_execute
+    return driver
+
+
+if __name__ == "__main__":
+    # Текущее состояние вёдер: python -m newsparser.ratelimit
+    if not os.path.isdir(STATE_DIR):
+        print("Запросов ещё не было")
+    for name in sorted(os.listdir(STATE_DIR)) if os.path.isdir(STATE_DIR) else []:
+        domain = name[:-len(".json")]
+        with _DomainLock(domain) as lock:
+            state = lock.read()
+        rate, burst = budget(domain)
+        pause = max(0, state.get("blocked_until", 0) - time.time())
+        note = f", пауза ещё {int(pause)} с" if pause else ""
+        print(f"{domain}: {rate:g} запр/с, пачка {burst:g}, токенов {state.get('tokens', burst):.1f}{note}")
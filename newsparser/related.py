@@ -0,0 +1,265 @@
+import heapq
+import math
+import threading
+from array import array
+from datetime import datetime, timedelta
+
+from newsparser import dedup
+from newsparser.archive import shared_archive
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = None
+    sparse = None
+
+# Хэширование n-грамм в пространство фиксированной размерности: словарь не нужен,
+# новые заголовки добавляются без перестройки индекса
+DIM = 1 << 20
+DEFAULT_HOURS = 21 * 24
+TOP_K = 10
+MAX_K = 100
+MIN_SCORE = 0.2
+# Запросы считаются пачками: столбцы матрицы сходства для QUERY_BATCH заголовков за одно умножение
+QUERY_BATCH = 16
+REFRESH_BATCH = 5000
+# Прирост индекса, после которого нормы строк пересчитываются по новым IDF (до этого IDF почти не меняются)
+NORM_REFRESH = 0.05
+# Без NumPy/SciPy: n-граммы из большей доли заголовков не просматриваются (их вес IDF и так мал)
+FALLBACK_MAX_DF = 0.05
+
+
+def features(title, dim=DIM):
+    """Номера признаков заголовка: символьные 4-граммы (те же, что у MinHash в dedup) по модулю dim"""
+    return sorted({h % dim for h in dedup.shingles(title)})
+
+
+def _timestamp(value):
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class RelatedIndex:
+    """
+    TF-IDF по хэшированным символьным n-граммам всех заголовков архива, косинусная близость.
+
+    Индекс дополняется инкрементально: refresh() читает только записи с id больше последнего
+    проиндексированного. С NumPy/SciPy строки лежат в разреженной CSC-матрице: для пачки запросов
+    берутся только столбцы их n-грамм, и сходство со всеми заголовками - одно умножение.
+    Без них - инвертированный индекс на чистом Python (медленнее, нормы строк приблизительные).
+    """
+
+    def __init__(self, archive=None, dim=DIM):
+        self.archive = archive or shared_archive()
+        self.dim = dim
+        self.last_id = 0
+        self.ids = array("q")
+        self.times = array("d")
+        self.sources = array("I")
+        self.source_names = []
+        self._source_index = {}
+        self._lock = threading.Lock()
+        if np is not None:
+            self.df = np.zeros(dim, dtype=np.int64)
+            self._matrix = None
+            self._tail = None
+            self._pending = []
+            self._norms = None
+            self._idf2 = None
+        else:
+            self.df = {}
+            self.postings = {}
+            self.row_norms = array("d")
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _idf(self, df, total):
+        return math.log((1.0 + total) / (1.0 + df)) + 1.0
+
+    def _source_id(self, name):
+        if name not in self._source_index:
+            self._source_index[name] = len(self.source_names)
+            self.source_names.append(name)
+        return self._source_index[name]
+
+    def refresh(self):
+        """Добавление в индекс записей, появившихся в архиве с прошлого вызова"""
+        added = 0
+        while True:
+            rows = self.archive.after_id(self.last_id, REFRESH_BATCH)
+            if not rows:
+                return added
+            indptr, indices = [0], []
+            for row in rows:
+                self.last_id = row["id"]
+                row_features = features(row["title"], self.dim)
+                if not row_features:
+                    continue
+                self.ids.append(row["id"])
+                self.times.append(_timestamp(row["collected_at"]))
+                self.sources.append(self._source_id(row["source"]))
+                if np is not None:
+                    indices.extend(row_features)
+                    indptr.append(len(indices))
+                else:
+                    self._add_postings(len(self.ids) - 1, row_features)
+                added += 1
+            if np is not None and len(indptr) > 1:
+                indices = np.asarray(indices, dtype=np.int32)
+                self._pending.append(sparse.csr_matrix(
+                    (np.ones(len(indices), dtype=np.float32), indices, np.asarray(indptr, dtype=np.int64)),
+                    shape=(len(indptr) - 1, self.dim)))
+                # Признаки строки уникальны, поэтому bincount - это число заголовков с признаком
+                self.df += np.bincount(indices, minlength=self.dim)
+
+    def _add_postings(self, row, row_features):
+        total = len(self.ids)
+        norm = 0.0
+        for feature in row_features:
+            self.df[feature] = self.df.get(feature, 0) + 1
+            self.postings.setdefault(feature, array("I")).append(row)
+            norm += self._idf(self.df[feature], total) ** 2
+        # Норма считается по IDF на момент добавления: для запасного режима этого достаточно
+        self.row_norms.append(math.sqrt(norm))
+
+    def _prepare(self):
+        """
+        Новые строки копятся в небольшой CSR-матрице «хвоста» с нормами по текущим IDF.
+        Когда хвост дорастает до NORM_REFRESH от основной матрицы, он вливается в неё,
+        а IDF и нормы всех строк пересчитываются - так одна новая запись не копирует весь индекс.
+        """
+        if self._pending:
+            blocks = ([self._tail] if self._tail is not None else []) + self._pending
+            self._tail = sparse.vstack(blocks, format="csr")
+            self._pending = []
+        main_rows = self._matrix.shape[0] if self._matrix is not None else 0
+        if self._tail is not None and self._tail.shape[0] > NORM_REFRESH * main_rows:
+            blocks = ([self._matrix] if self._matrix is not None else []) + [self._tail]
+            self._matrix = sparse.vstack(blocks, format="csc")
+            self._tail = None
+            rows = self._matrix.shape[0]
+            idf = np.log((1.0 + rows) / (1.0 + self.df)) + 1.0
+            self._idf2 = (idf * idf).astype(np.float32)
+            self._norms = np.sqrt(self._matrix @ self._idf2).astype(np.float32)
+        elif self._tail is not None and len(self._norms) < len(self.ids):
+            tail_norms = np.sqrt(self._tail[len(self._norms) - main_rows:] @ self._idf2).astype(np.float32)
+            self._norms = np.concatenate([self._norms, tail_norms])
+        self._times = np.frombuffer(self.times.tobytes(), dtype=np.float64)
+        self._sources = np.frombuffer(self.sources.tobytes(), dtype=np.uint32)
+
+    def search(self, titles, k=TOP_K, since_hours=DEFAULT_HOURS, exclude_source=None, exclude_ids=(),
+               min_score=MIN_SCORE):
+        """
+        Ближайшие заголовки архива для каждого из titles: список списков (id записи, сходство).
+        exclude_source - не показывать публикации того же издания.
+        """
+        k = max(1, min(k, MAX_K))
+        with self._lock:
+            self.refresh()
+            if not self.ids:
+                return [[] for _ in titles]
+            cutoff = (datetime.now() - timedelta(hours=since_hours)).timestamp() if since_hours else 0.0
+            excluded_source = self._source_index.get(exclude_source, -1) if exclude_source else -1
+            excluded = set(exclude_ids)
+            query_features = [features(title, self.dim) for title in titles]
+            if np is not None:
+                self._prepare()
+                return self._search_vectorized(query_features, k, cutoff, excluded_source, excluded, min_score)
+            return [self._search_postings(fs, k, cutoff, excluded_source, excluded, min_score)
+                    for fs in query_features]
+
+    def _search_vectorized(self, query_features, k, cutoff, excluded_source, excluded, min_score):
+        allowed = self._times >= cutoff
+        if excluded_source >= 0:
+            allowed &= self._sources != excluded_source
+        results = []
+        for start in range(0, len(query_features), QUERY_BATCH):
+            batch = query_features[start:start + QUERY_BATCH]
+            columns = sorted(set().union(*batch))
+            if not columns:
+                results.extend([] for _ in batch)
+                continue
+            position = {feature: i for i, feature in enumerate(columns)}
+            weights = np.zeros((len(columns), len(batch)), dtype=np.float32)
+            for j, fs in enumerate(batch):
+                for feature in fs:
+                    weights[position[feature], j] = self._idf2[feature]
+            # Только столбцы n-грамм запросов: (строки x n-граммы) @ (n-граммы x запросы)
+            dots = np.asarray(self._matrix[:, columns] @ weights)
+            if self._tail is not None:
+                dots = np.vstack([dots, np.asarray(self._tail[:, columns] @ weights)])
+            query_norms = np.sqrt(weights.sum(axis=0))
+            for j in range(len(batch)):
+                if query_norms[j] == 0:
+                    results.append([])
+                    continue
+                scores = dots[:, j] / (self._norms * query_norms[j] + 1e-9)
+                candidates = np.flatnonzero(allowed & (scores >= min_score))
+                if len(candidates) > k + len(excluded):
+                    top = np.argpartition(scores[candidates], -(k + len(excluded)))[-(k + len(excluded)):]
+                    candidates = candidates[top]
+                ranked = candidates[np.argsort(-scores[candidates])]
+                found = [(int(self.ids[row]), float(scores[row])) for row in ranked
+                         if int(self.ids[row]) not in excluded]
+                results.append(found[:k])
+        return results
+
+    def _search_postings(self, query_features, k, cutoff, excluded_source, excluded, min_score):
+        total = len(self.ids)
+        weights = {}
+        for feature in query_features:
+            df = self.df.get(feature, 0)
+            if df and df <= max(1, FALLBACK_MAX_DF * total):
+                weights[feature] = self._idf(df, total) ** 2
+        query_norm = math.sqrt(sum(self._idf(self.df.get(f, 0), total) ** 2 for f in query_features))
+        scores = {}
+        for feature, weight in weights.items():
+            for row in self.postings[feature]:
+                scores[row] = scores.get(row, 0.0) + weight
+        found = []
+        for row, dot in scores.items():
+            score = dot / (query_norm * self.row_norms[row] + 1e-9)
+            if (score >= min_score and self.times[row] >= cutoff and self.sources[row] != excluded_source
+                    and self.ids[row] not in excluded):
+                found.append((score, row))
+        return [(self.ids[row], score) for score, row in heapq.nlargest(k, found)]
+
+    def related(self, title=None, record_id=None, k=TOP_K, since_hours=DEFAULT_HOURS, other_sources=True,
+                min_score=MIN_SCORE):
+        """
+        Похожие публикации для заголовка или записи архива (record_id): записи архива с полем score.
+        Для записи по умолчанию показываются только другие издания.
+        """
+        exclude_source, exclude_ids = None, ()
+        if record_id is not None:
+            record = self.archive.by_ids([record_id]).get(record_id)
+            if record is None:
+                return None
+            title = record["title"]
+            exclude_ids = (record_id,)
+            exclude_source = record["source"] if other_sources else None
+        matches = self.search([title or ""], k=k, since_hours=since_hours, exclude_source=exclude_source,
+                              exclude_ids=exclude_ids, min_score=min_score)[0]
+        records = self.archive.by_ids(match_id for match_id, _ in matches)
+        result = []
+        for match_id, score in matches:
+            if match_id in records:
+                result.append(dict(records[match_id], score=round(score, 4)))
+        return result
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_index():
+    """Индекс процесса сервера: строится при первом запросе, дальше только дополняется"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = RelatedIndex()
+        return _shared
@@ -0,0 +1,513 @@
+import json
+import os
+import re
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from html.parser import HTMLParser
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+from newsparser import assets, ratelimit
+from newsparser.records import NewsRecord
+
+ENDPOINTS_PATH = os.path.join(assets.PROJECT_DIR, "data", "endpoints.json")
+
+# NEWSPARSER_REPLAY=0 отключает прямые запросы (всегда собирать через браузер)
+ENABLED = os.environ.get("NEWSPARSER_REPLAY", "1") != "0"
+
+WORKERS = 8
+HTTP_TIMEOUT = 10
+MAX_PAGES = 100
+# Эндпоинт сохраняется, только если его ответ разбирается хотя бы в столько записей со ссылками
+MIN_RECORDS = 5
+# Отвергнутый шаблон (не прошёл проверку или перестал отвечать) не изучается снова столько дней
+REJECT_DAYS = 7
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/124.0 Safari/537.36")
+
+# Ключи JSON-ответов, в которых обычно лежат заголовок, ссылка и дата
+TITLE_KEYS = ("title", "headline", "name")
+LINK_KEYS = ("url", "link", "href", "slug")
+DATE_KEYS = ("published_dt", "publish_date", "published_at", "date", "datetime", "time")
+
+# Части CSS-селектора Locator, которые переносятся на ссылки в ответе эндпоинта
+_CSS_CLASS_RE = re.compile(r"\.([\w-]+)")
+_CSS_CLASS_CONTAINS_RE = re.compile(r"\[class\*=['\"]?([^'\"\]]+)['\"]?\]")
+_CSS_HREF_PREFIX_RE = re.compile(r"\[href\^=['\"]?([^'\"\]]+)['\"]?\]")
+
+
+# --- Запись XHR в браузере ---
+
+def enable_capture(options):
+    """Включает performance-лог Chrome (события CDP Network) для записи запросов страницы"""
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return options
+
+
+def captured_requests(driver):
+    """GET-запросы XHR/Fetch из performance-лога (лог при чтении очищается)"""
+    urls = []
+    try:
+        entries = driver.get_log("performance")
+    except Exception as e:
+        print(f"[WARN] Performance-лог недоступен: {e}")
+        return urls
+    for entry in entries:
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, ValueError):
+            continue
+        if message.get("method") != "Network.requestWillBeSent":
+            continue
+        params = message.get("params", {})
+        request = params.get("request", {})
+        if params.get("type") in ("XHR", "Fetch") and request.get("method") == "GET":
+            urls.append(request.get("url"))
+    return urls
+
+
+# --- Поиск шаблона пагинации ---
+
+def _components(url):
+    """Изменяемые части URL: сегменты пути и параметры запроса"""
+    parts = urlsplit(url)
+    segments = parts.path.split("/")
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    items = [(("path", i), value) for i, value in enumerate(segments)]
+    items += [(("query", name), value) for name, value in query]
+    return parts, segments, query, items
+
+
+def _template(url, key):
+    """URL с {page} на месте изменяемой части"""
+    parts, segments, query, _ = _components(url)
+    kind, name = key
+    if kind == "path":
+        segments = list(segments)
+        segments[name] = "{page}"
+        return urlunsplit((parts.scheme, parts.netloc, "/".join(segments), parts.query, ""))
+    query = [(k, "{page}" if k == name else v) for k, v in query]
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query, safe="{}"), ""))
+
+
+def learn_candidates(urls):
+    """
+    Возможные шаблоны пагинации по запросам кнопки «Загрузить ещё», от самого частого запроса.
+    Среди запросов к одному адресу ищется единственная меняющаяся часть:
+    - числа с постоянным шагом -> "offset", страницы можно запрашивать параллельно;
+    - иначе (дата, id последней новости) -> "cursor", следующий адрес берётся из ответа.
+    """
+    groups = {}
+    for url in urls:
+        parts = urlsplit(url)
+        # Числовые сегменты пути не входят в ключ группы: они могут быть номером страницы
+        path_key = "/".join("#" if segment.isdigit() else segment for segment in parts.path.split("/"))
+        groups.setdefault((parts.netloc, path_key), []).append(url)
+
+    candidates = []
+    for group in groups.values():
+        unique = list(dict.fromkeys(group))
+        if len(unique) < 2:
+            continue
+        values = {}
+        for url in unique:
+            for key, value in _components(url)[3]:
+                values.setdefault(key, []).append(value)
+        changing = [key for key, vals in values.items()
+                    if len(vals) == len(unique) and len(set(vals)) == len(unique)]
+        if not changing:
+            continue
+        observed = values[changing[0]]
+        if len(changing) == 1 and all(v.isdigit() for v in observed):
+            numbers = sorted(int(v) for v in observed)
+            steps = {b - a for a, b in zip(numbers, numbers[1:])}
+            pattern = {"template": _template(unique[0], changing[0]), "kind": "offset",
+                       "start": numbers[0], "step": min(steps)}
+        else:
+            pattern = {"template": unique[0], "kind": "cursor", "path": urlsplit(unique[0]).path}
+        pattern["requests"] = len(unique)
+        candidates.append(pattern)
+    candidates.sort(key=lambda pattern: pattern["requests"], reverse=True)
+    return candidates
+
+
+def learn_pattern(urls):
+    """Самый частый шаблон пагинации (без проверки ответа) или None"""
+    candidates = learn_candidates(urls)
+    return candidates[0] if candidates else None
+
+
+def pattern_key(pattern):
+    """
+    Ключ шаблона для списка отвергнутых: у курсорного в адресе меняется курсор,
+    поэтому он опознаётся по хосту и пути
+    """
+    if pattern["kind"] == "offset":
+        return pattern["template"]
+    parts = urlsplit(pattern["template"])
+    return parts.netloc + parts.path
+
+
+def verify_pattern(pattern, page_url, link_class=None, link_selector=None):
+    """Запрос первой порции по шаблону: в ответе не меньше MIN_RECORDS записей с заголовком и ссылкой"""
+    if pattern["kind"] == "offset":
+        url = pattern["template"].replace("{page}", str(pattern["start"]))
+    else:
+        url = pattern["template"]
+    try:
+        text = _get(url, page_url)
+    except Exception as e:
+        print(f"[INFO] Запрос {url} не прошёл проверку: {e}")
+        return False
+    records = extract_records(text, page_url, link_class, link_selector)
+    found = sum(1 for title, link, _ in records if title and link)
+    if found < MIN_RECORDS:
+        print(f"[INFO] Запрос {url} не похож на ленту новостей (записей: {found}, нужно {MIN_RECORDS})")
+        return False
+    return True
+
+
+def _rejections(entry):
+    """Действующие отказы записи endpoints.json: {ключ шаблона: когда отвергнут}"""
+    now = datetime.now()
+    rejected = {}
+    for key, stamp in (entry or {}).get("rejected", {}).items():
+        try:
+            if (now - datetime.fromisoformat(stamp)).days < REJECT_DAYS:
+                rejected[key] = stamp
+        except (TypeError, ValueError):
+            continue
+    return rejected
+
+
+def load_endpoints(path=None):
+    path = path or ENDPOINTS_PATH
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except ValueError:
+        return {}
+
+
+def _save_endpoints(endpoints, path=None):
+    path = path or ENDPOINTS_PATH
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(endpoints, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def learn(driver, source, link_class=None, link_selector=None):
+    """
+    Изучение эндпоинта по запросам, записанным за сессию. Кандидаты проверяются запросом
+    (verify_pattern), первый прошедший сохраняется для следующих запусков; не прошедшие
+    запоминаются в "rejected" записи источника и REJECT_DAYS дней не проверяются снова.
+    link_selector - селектор, которым новости нашлись на странице (Locator.chosen("item")):
+    сохраняется с шаблоном, чтобы ответы разбирались по актуальной вёрстке
+    """
+    urls = captured_requests(driver)
+    candidates = learn_candidates(urls)
+    if not candidates:
+        print(f"[INFO] Эндпоинт подгрузки не найден (XHR-запросов: {len(urls)})")
+        return None
+
+    endpoints = load_endpoints()
+    rejected = _rejections(endpoints.get(source))
+    page_url = driver.current_url
+    pattern = None
+    for candidate in candidates:
+        key = pattern_key(candidate)
+        if key in rejected:
+            continue
+        if verify_pattern(candidate, page_url, link_class, link_selector):
+            pattern = candidate
+            break
+        rejected[key] = datetime.now().isoformat(timespec="seconds")
+
+    if pattern is None:
+        print(f"[INFO] Эндпоинт подгрузки не найден: ни один из {len(candidates)} запросов не отдаёт новости")
+        endpoints[source] = {"rejected": rejected}
+        _save_endpoints(endpoints)
+        return None
+    pattern["link_class"] = link_class
+    pattern["link_selector"] = list(link_selector) if link_selector else None
+    pattern["learned_at"] = datetime.now().isoformat(timespec="seconds")
+    if rejected:
+        pattern["rejected"] = rejected
+    endpoints[source] = pattern
+    _save_endpoints(endpoints)
+    print(f"[INFO] Изучен эндпоинт подгрузки ({pattern['kind']}): {pattern['template']}")
+    return pattern
+
+
+def forget(source, reject=True):
+    """Сброс изученного эндпоинта; reject - шаблон попадает в отвергнутые и не изучается снова сразу"""
+    endpoints = load_endpoints()
+    entry = endpoints.get(source)
+    if entry is None:
+        return
+    rejected = _rejections(entry)
+    if reject and "template" in entry:
+        rejected[pattern_key(entry)] = datetime.now().isoformat(timespec="seconds")
+    if rejected:
+        endpoints[source] = {"rejected": rejected}
+    else:
+        del endpoints[source]
+    _save_endpoints(endpoints)
+
+
+# --- Разбор ответов ---
+
+def link_matcher(selector):
+    """
+    Условия для <a> в ответе эндпоинта по селектору, которым Locator нашёл новости на странице:
+    ("class name", X) - точный класс, CSS - классы, [class*=...] и [href^=...] последнего шага
+    (предки вроде #infinite_listing во фрагменте ответа не проверить). None - без условий.
+    """
+    if not selector:
+        return None
+    by, value = selector
+    if by == "class name":
+        return {"classes": [value]}
+    if by != "css selector":
+        return None
+    last = value.split()[-1] if value.split() else ""
+    tag = re.match(r"^[a-z][a-z0-9]*", last)
+    if tag and tag.group(0) != "a":
+        return None
+    matcher = {
+        "classes": _CSS_CLASS_RE.findall(re.sub(r"\[[^\]]*\]", "", last)),
+        "class_contains": _CSS_CLASS_CONTAINS_RE.findall(last),
+        "href_prefix": _CSS_HREF_PREFIX_RE.findall(last),
+    }
+    matcher = {key: values for key, values in matcher.items() if values}
+    return matcher or None
+
+
+class _ListingParser(HTMLParser):
+    """
+    Ссылки на новости из HTML-фрагмента: <a>, подходящие под link_matcher (если задан),
+    или с текстом не короче 20 символов. Дата - из <time datetime> или элемента
+    с "date" в классе; привязывается к соседней ссылке того же блока.
+    """
+
+    def __init__(self, base_url, matcher=None):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.matcher = matcher
+        self.records = []
+        self._anchor = None
+        self._date_tag = None
+        self._date_nesting = 0
+        self._date_text = []
+        self._pending_date = None
+
+    def _attach_date(self, value):
+        value = (value or "").strip()
+        if not value:
+            return
+        if self.records and self.records[-1][2] is None:
+            self.records[-1][2] = value
+        else:
+            self._pending_date = value
+
+    def handle_starttag(self, tag, attrs):
+        if tag == self._date_tag:
+            self._date_nesting += 1
+        attrs = dict(attrs)
+        classes = (attrs.get("class") or "").split()
+        if tag == "a" and attrs.get("href"):
+            if self._matches(attrs["href"], classes):
+                self._anchor = {"href": attrs["href"], "text": []}
+        elif tag == "time" and attrs.get("datetime"):
+            self._attach_date(attrs["datetime"])
+        elif self._date_tag is None and (attrs.get("data-type") == "date" or any("date" in c for c in classes)):
+            self._date_tag = tag
+            self._date_nesting = 1
+            self._date_text = []
+
+    def _matches(self, href, classes):
+        if self.matcher is None:
+            return True
+        if not all(name in classes for name in self.matcher.get("classes", ())):
+            return False
+        if not all(any(part in name for name in classes) for part in self.matcher.get("class_contains", ())):
+            return False
+        path = urlsplit(urljoin(self.base_url, href)).path
+        return all(href.startswith(prefix) or path.startswith(prefix)
+                   for prefix in self.matcher.get("href_prefix", ()))
+
+    def handle_endtag(self, tag):
+        if tag == "a" and self._anchor is not None:
+            title = " ".join("".join(self._anchor["text"]).split())
+            if self.matcher is not None or len(title) >= 20:
+                self.records.append([title, urljoin(self.base_url, self._anchor["href"]), self._pending_date])
+                self._pending_date = None
+            self._anchor = None
+        if tag == self._date_tag:
+            self._date_nesting -= 1
+            if self._date_nesting == 0:
+                self._attach_date("".join(self._date_text))
+                self._date_tag = None
+
+    def handle_data(self, data):
+        if self._anchor is not None:
+            self._anchor["text"].append(data)
+        if self._date_tag is not None:
+            self._date_text.append(data)
+
+
+def _json_records(node, base_url, out):
+    if isinstance(node, dict):
+        title = next((node[k] for k in TITLE_KEYS if isinstance(node.get(k), str)), None)
+        link = next((node[k] for k in LINK_KEYS if isinstance(node.get(k), str)), None)
+        if title and link:
+            date = next((node[k] for k in DATE_KEYS if node.get(k)), None)
+            out.append([title.strip(), urljoin(base_url, link), str(date) if date else None])
+            return
+        for value in node.values():
+            _json_records(value, base_url, out)
+    elif isinstance(node, list):
+        for value in node:
+            _json_records(value, base_url, out)
+
+
+def extract_records(text, base_url, link_class=None, link_selector=None):
+    """
+    Записи [заголовок, ссылка, дата] из ответа (JSON или HTML-фрагмент). Ссылки HTML отбираются
+    по link_selector (способ и значение поиска Selenium) или, короче, по классу link_class
+    """
+    stripped = text.lstrip()
+    if stripped[:1] in ("{", "["):
+        try:
+            records = []
+            _json_records(json.loads(stripped), base_url, records)
+            return records
+        except ValueError:
+            pass
+    if link_selector is None and link_class:
+        link_selector = ("class name", link_class)
+    parser = _ListingParser(base_url, link_matcher(link_selector))
+    parser.feed(text)
+    parser.close()
+    return parser.records
+
+
+# --- Прямые запросы ---
+
+def _get(url, referer=None):
+    request = urllib.request.Request(url, headers={
+        "User-Agent": USER_AGENT,
+        "X-Requested-With": "XMLHttpRequest",
+        "Referer": referer or url,
+    })
+    ratelimit.acquire(url)
+    try:
+        with urllib.request.urlopen(request, timeout=HTTP_TIMEOUT) as response:
+            charset = response.headers.get_content_charset() or "utf-8"
+            return response.read().decode(charset, errors="replace")
+    except urllib.error.HTTPError as e:
+        ratelimit.penalize_error(url, e)
+        raise
+
+
+def _next_cursor_url(text, pattern, base_url):
+    """Адрес следующей порции в ответе: первая ссылка на тот же путь эндпоинта"""
+    match = re.search(re.escape(pattern["path"]) + r"\?[^\"'\s<>]+", text.replace("&amp;", "&"))
+    return urljoin(base_url, match.group(0)) if match else None
+
+
+def fetch_news(source, page_url, limit, link_class=None, max_pages=MAX_PAGES, link_selector=None):
+    """
+    Сбор новостей без браузера по изученному эндпоинту.
+    Возвращает список NewsRecord или None, если эндпоинт не изучен или больше не отвечает
+    (тогда парсер идёт обычным путём через Selenium и изучает эндпоинт заново).
+    Шаблон отвергается, только если запросы к эндпоинту были и не дали новостей
+    (или сайт ответил на них ошибкой 4xx); сетевой сбой лишь сбрасывает его до следующего изучения.
+    """
+    if not ENABLED:
+        return None
+    pattern = load_endpoints().get(source)
+    if pattern is None or "template" not in pattern:
+        return None
+    # Сохранённый при изучении селектор новее переданного парсером
+    link_class = pattern.get("link_class", link_class)
+    link_selector = pattern.get("link_selector") or link_selector
+
+    started = time.perf_counter()
+    news = []
+    seen = set()
+
+    def add(records):
+        added = 0
+        for title, link, date in records:
+            if len(news) >= limit or not title or link in seen:
+                continue
+            seen.add(link)
+            news.append(NewsRecord(source, title, link, date))
+            added += 1
+        return added
+
+    try:
+        first_page = _get(page_url)
+        add(extract_records(first_page, page_url, link_class, link_selector))
+        from_endpoint = 0
+        requested = 0
+
+        if pattern["kind"] == "offset":
+            page = pattern["start"]
+            with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+                last_page = pattern["start"] + max_pages * pattern["step"]
+                while len(news) < limit and page < last_page:
+                    urls = [pattern["template"].replace("{page}", str(p))
+                            for p in range(page, min(page + WORKERS * pattern["step"], last_page), pattern["step"])]
+                    page += WORKERS * pattern["step"]
+                    requested += len(urls)
+                    texts = list(pool.map(lambda u: _get(u, page_url), urls))
+                    wave = sum(add(extract_records(text, page_url, link_class, link_selector)) for text in texts)
+                    from_endpoint += wave
+                    if wave == 0:
+                        break
+        else:
+            # Курсорная пагинация последовательна: адрес следующей порции есть только в предыдущей
+            text = first_page
+            for _ in range(max_pages):
+                if len(news) >= limit:
+                    break
+                next_url = _next_cursor_url(text, pattern, page_url)
+                if next_url is None:
+                    break
+                requested += 1
+                text = _get(next_url, page_url)
+                added = add(extract_records(text, page_url, link_class, link_selector))
+                from_endpoint += added
+                if added == 0:
+                    break
+    except urllib.error.HTTPError as e:
+        print(f"[WARN] Прямые запросы к эндпоинту не удались: {e}")
+        # 4xx - адрес больше не обслуживается; 429 и 5xx - временная перегрузка сайта
+        forget(source, reject=400 <= e.code < 500 and e.code != 429)
+        return None
+    except OSError as e:
+        # Таймаут, сброс соединения, DNS: эндпоинт не виноват, отвергать его на REJECT_DAYS незачем
+        print(f"[WARN] Прямые запросы к эндпоинту не удались (сеть): {e}")
+        forget(source, reject=False)
+        return None
+    except Exception as e:
+        print(f"[WARN] Прямые запросы к эндпоинту не удались: {e}")
+        forget(source)
+        return None
+
+    if requested and from_endpoint == 0:
+        print("[WARN] Эндпоинт подгрузки не вернул новостей, изучаем его заново через браузер")
+        forget(source)
+        return None
+
+    print(f"[INFO] Собрано без браузера: {len(news)} новостей "
+          f"за {time.perf_counter() - started:.2f} с")
+    return news
@@ -0,0 +1,267 @@
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from newsparser import assets, browser, cli
+from newsparser.snapshots import NEW, parse_change_line
+
+STATE_PATH = os.path.join(assets.PROJECT_DIR, "data", "schedule.json")
+
+# Границы интервала опроса источника, секунды
+MIN_INTERVAL = 120
+MAX_INTERVAL = 2 * 3600
+DEFAULT_INTERVAL = 15 * 60
+# Запуск назначается, когда вероятность хотя бы одной новой записи (поток Пуассона) достигает TARGET
+TARGET_PROBABILITY = 0.8
+# Сколько последних моментов появления новых записей хранить на источник
+HISTORY = 40
+# Всплеск: средний интервал последних BURST_WINDOW записей меньше BURST_FACTOR от обычного
+BURST_WINDOW = 4
+BURST_FACTOR = 0.33
+# Запуск принёс столько новых записей, что часть могла уйти за пределы первой страницы
+SATURATED_SHARE = 0.5
+# Пустой запуск удлиняет следующий интервал (оценка темпа устарела или источник затих)
+EMPTY_BACKOFF = 1.5
+FAILURE_BACKOFF = 2.0
+TICK = 5
+
+
+def load_state(path=STATE_PATH):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except ValueError:
+        return {}
+
+
+def save_state(state, path=STATE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def _mean_gap(arrivals):
+    gaps = [b - a for a, b in zip(arrivals, arrivals[1:]) if b > a]
+    return sum(gaps) / len(gaps) if gaps else None
+
+
+def plan_interval(entry, now=None):
+    """
+    Интервал до следующего запуска источника по истории появления новых записей.
+
+    Средний промежуток между новыми записями g даёт темп потока 1/g; чтобы новая запись
+    появилась с вероятностью TARGET_PROBABILITY, ждать нужно -g * ln(1 - TARGET).
+    При всплеске берётся темп последних записей, после пустых запусков и ошибок интервал растёт.
+    Возвращает (секунды, причина).
+    """
+    now = now or time.time()
+    arrivals = entry.get("arrivals") or []
+    gap = _mean_gap(arrivals)
+    if gap is None:
+        interval, reason = DEFAULT_INTERVAL, "мало истории"
+    else:
+        recent = _mean_gap(arrivals[-(BURST_WINDOW + 1):])
+        if recent is not None and len(arrivals) > BURST_WINDOW + 1 and recent < BURST_FACTOR * gap \
+                and now - arrivals[-1] < gap:
+            gap, reason = recent, "всплеск"
+        else:
+            reason = "темп"
+        interval = -gap * math.log(1 - TARGET_PROBABILITY)
+    if entry.get("saturated"):
+        interval, reason = interval / 2, "страница заполнена новыми"
+    if entry.get("failures"):
+        interval *= FAILURE_BACKOFF ** min(entry["failures"], 6)
+        reason = f"ошибки: {entry['failures']}"
+    elif entry.get("empty_runs"):
+        interval *= EMPTY_BACKOFF ** min(entry["empty_runs"], 6)
+        reason += f", пустых запусков: {entry['empty_runs']}"
+    return max(MIN_INTERVAL, min(MAX_INTERVAL, interval)), reason
+
+
+def observe(entry, started, finished, new_items, total, status):
+    """
+    Учёт результата запуска в истории источника. new_items - моменты появления новых записей
+    (время публикации или None, если дата неизвестна или вне промежутка с прошлого запуска).
+    """
+    if status not in ("success", "partial"):
+        entry["failures"] = entry.get("failures", 0) + 1
+        return entry
+    entry["failures"] = 0
+    if "last_run" not in entry:
+        # Первый запуск расписания: «новые» записи отсчитаны от снимка неизвестной давности
+        # (например, запуска из интерфейса), промежуток их появления неизвестен - в историю не идут
+        entry["last_run"] = finished
+        return entry
+    previous = entry["last_run"]
+    arrivals = entry.get("arrivals") or []
+    known = [published for published in new_items if published and previous <= published <= finished]
+    unknown = len(new_items) - len(known)
+    # Записи без даты распределяются по промежутку равномерно: одинаковые метки дали бы нулевые интервалы
+    step = (finished - previous) / (unknown + 1)
+    arrivals += known + [previous + step * (i + 1) for i in range(unknown)]
+    entry["arrivals"] = sorted(arrivals)[-HISTORY:]
+    entry["empty_runs"] = 0 if new_items else entry.get("empty_runs", 0) + 1
+    entry["saturated"] = bool(total) and len(new_items) >= SATURATED_SHARE * total
+    entry["last_run"] = finished
+    return entry
+
+
+class AdaptiveScheduler:
+    """
+    Непрерывный сбор: каждый источник запускается, когда у него вероятно появилась новая запись.
+    Новые записи определяются стадией сравнения снимков (строки [CHANGE] парсера),
+    история и расписание хранятся в data/schedule.json и переживают перезапуск.
+    """
+
+    def __init__(self, sources, jobs=1, headless=True, timeout=None, env=None, path=STATE_PATH):
+        self.sources = sources
+        self.jobs = max(1, jobs)
+        self.headless = headless
+        self.timeout = timeout
+        self.env = env or {}
+        self.path = path
+        self.state = load_state(path)
+        self._lock = threading.Lock()
+        self._running = set()
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def due(self, now=None):
+        now = now or time.time()
+        with self._lock:
+            return [source for source in self.sources
+                    if source not in self._running and self.state.get(source, {}).get("next_run", 0) <= now]
+
+    def run_source(self, source):
+        started = time.time()
+        records, changes = {}, []
+
+        def on_record(record):
+            records[record.get("url") or record.get("title")] = record
+
+        def on_log(line):
+            change = parse_change_line(line)
+            if change is not None and change.get("kind") == NEW:
+                changes.append(change)
+
+        try:
+            run = cli.run_parser(source, on_record, on_log=on_log, timeout=self.timeout,
+                                 headless=self.headless, env=self.env, should_stop=self._stop.is_set)
+            status = run["status"]
+        except Exception as e:
+            print(f"[ERROR] {source}: {e}")
+            status = "failed"
+        finished = time.time()
+        if status == "cancelled":
+            # Остановка расписания - не сбой источника: история и интервал не меняются
+            with self._lock:
+                self._running.discard(source)
+            return
+
+        new_items = []
+        for change in changes:
+            record = records.get(change.get("url") or change.get("title")) or {}
+            try:
+                new_items.append(datetime.fromisoformat(record["published_at"]).timestamp())
+            except (KeyError, TypeError, ValueError):
+                new_items.append(None)
+
+        with self._lock:
+            entry = observe(self.state.setdefault(source, {}), started, finished, new_items, len(records), status)
+            interval, reason = plan_interval(entry, finished)
+            entry["interval"] = round(interval)
+            entry["next_run"] = finished + interval
+            entry["reason"] = reason
+            save_state(self.state, self.path)
+            self._running.discard(source)
+        print(f"[INFO] {source}: {status}, новых {len(new_items)} из {len(records)}; "
+              f"следующий запуск через {interval / 60:.1f} мин ({reason})", flush=True)
+
+    def run(self):
+        print(f"[INFO] Адаптивное расписание: {len(self.sources)} источников, параллельно {self.jobs}")
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            try:
+                while not self._stop.is_set():
+                    for source in self.due():
+                        with self._lock:
+                            if len(self._running) >= self.jobs:
+                                break
+                            self._running.add(source)
+                        pool.submit(self.run_source, source)
+                    self._stop.wait(TICK)
+            except KeyboardInterrupt:
+                # Парсеры в своей группе процессов Ctrl+C не получают: останавливает их сторож run_parser,
+                # иначе выход из пула ждал бы окончания каждого сбора
+                self.stop()
+                raise
+
+    def plan(self):
+        """Текущее расписание: интервал, причина и время следующего запуска по источникам"""
+        rows = []
+        for source in self.sources:
+            entry = self.state.get(source, {})
+            interval, reason = plan_interval(entry)
+            next_run = entry.get("next_run")
+            rows.append({
+                "source": source,
+                "interval": entry.get("interval", round(interval)),
+                "reason": entry.get("reason", reason),
+                "arrivals": len(entry.get("arrivals") or []),
+                "next_run": datetime.fromtimestamp(next_run).isoformat(timespec="seconds") if next_run else None,
+            })
+        return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m newsparser.scheduler",
+        description="Непрерывный сбор с интервалом опроса по темпу публикаций каждого источника.",
+        epilog=f"Интервал: от {MIN_INTERVAL} с до {MAX_INTERVAL} с; при всплеске - по темпу последних записей. "
+               "Пример: python -m newsparser.scheduler all --jobs 2 --shared-browser")
+    parser.add_argument("sources", nargs="*", default=["all"], help="Имена источников или all")
+    parser.add_argument("--jobs", type=int, default=1, help="Сколько источников собирать одновременно")
+    parser.add_argument("--timeout", type=float, metavar="SECONDS", help="Ограничение времени на запуск")
+    parser.add_argument("--headed", action="store_true", help="Показывать окно Chrome")
+    parser.add_argument("--shared-browser", action="store_true", help="Один Chrome на все источники")
+    parser.add_argument("--plan", action="store_true", help="Показать текущее расписание и выйти")
+    args = parser.parse_args(argv)
+
+    known = cli.available_sources()
+    sources = known if args.sources == ["all"] else args.sources
+    unknown = [name for name in sources if name not in known]
+    if unknown:
+        parser.error(f"неизвестные источники: {', '.join(unknown)}; доступны: {', '.join(known)}")
+
+    if args.plan:
+        for row in AdaptiveScheduler(sources).plan():
+            print(f"{row['source']:<24} {row['interval'] / 60:>6.1f} мин  {row['next_run'] or 'сразу':<20} "
+                  f"{row['reason']} (записей в истории: {row['arrivals']})")
+        return 0
+
+    shared = browser.SharedBrowser(headless=not args.headed).start() if args.shared_browser else None
+    scheduler = AdaptiveScheduler(sources, jobs=args.jobs, headless=not args.headed, timeout=args.timeout,
+                                  env=shared.env() if shared else None)
+    try:
+        scheduler.run()
+    except KeyboardInterrupt:
+        print("[INFO] Расписание остановлено")
+    finally:
+        if shared is not None:
+            shared.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+from newsparser import assets
+from newsparser.records import canonical_url
+
+SNAPSHOTS_PATH = os.path.join(assets.PROJECT_DIR, "data", "snapshots.sqlite3")
+
+# Строка stdout парсера с одним изменением ленты: сервер пересылает её как SSE-событие change
+CHANGE_MARKER = "[CHANGE] "
+
+NEW = "new"
+REMOVED = "removed"
+RETITLED = "retitled"
+
+
+def title_hash(title):
+    """64-битный хэш нормализованного заголовка: сравнение без хранения копий текста в снимке"""
+    normalized = " ".join((title or "").lower().replace("ё", "е").split())
+    return int.from_bytes(hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+
+def item_key(url, title):
+    """
+    Ключ записи ленты: каноническая ссылка, а без неё - хэш заголовка
+    (правку такой записи не отличить от новой)
+    """
+    if url and str(url).startswith("http"):
+        return canonical_url(url)
+    return f"title:{title_hash(title)}"
+
+
+class SnapshotStore:
+    """
+    Снимки лент источников и изменения между запусками (SQLite).
+
+    items - только последнее состояние ленты (ключ, хэш заголовка, позиция); changes - дельты:
+    новые, снятые и переименованные записи. Полные копии лент не хранятся, а «что изменилось
+    с прошлого запуска» - выборка дельт последнего запуска по индексу.
+    """
+
+    def __init__(self, path=SNAPSHOTS_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = self.connect()
+        try:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS items (
+                    source TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    title_hash INTEGER NOT NULL,
+                    position INTEGER NOT NULL,
+                    first_seen TEXT NOT NULL,
+                    PRIMARY KEY (source, key)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS runs (
+                    id INTEGER PRIMARY KEY,
+                    source TEXT NOT NULL,
+                    run_at TEXT NOT NULL,
+                    total INTEGER NOT NULL,
+                    new INTEGER NOT NULL,
+                    removed INTEGER NOT NULL,
+                    retitled INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_runs_source ON runs(source, id);
+                CREATE TABLE IF NOT EXISTS changes (
+                    run_id INTEGER NOT NULL,
+                    kind TEXT NOT NULL,
+                    url TEXT,
+                    title TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_changes_run ON changes(run_id);
+            """)
+        finally:
+            conn.close()
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def diff(self, source, records, partial=False):
+        """
+        Сравнение ленты запуска с прошлым снимком за один проход, обновление снимка и запись дельт.
+        Возвращает список изменений {"kind", "source", "url", "title"} (у снятых title нет - снимок хранит только хэш).
+
+        Снятой считается только запись, пропавшая из середины ленты: записи ниже последней
+        сохранившейся просто ушли за пределы первых N новостей. У частичного запуска
+        снятые не определяются совсем - лента собрана не полностью.
+        """
+        now = datetime.now().isoformat(timespec="seconds")
+        current = {}
+        for position, record in enumerate(records):
+            key = item_key(record.url, record.title)
+            if key not in current:
+                current[key] = (title_hash(record.title), position, record)
+
+        conn = self.connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            previous = {}
+            migrated = []
+            for row in conn.execute("SELECT key, title_hash, position, first_seen FROM items WHERE source = ?",
+                                    (source,)).fetchall():
+                # Снимки до канонических ссылок: ключ переводится в ту же форму, что и у текущей ленты
+                key = canonical_url(row["key"])
+                if key != row["key"]:
+                    migrated.append(row)
+                previous.setdefault(key, (row["title_hash"], row["position"]))
+            if migrated:
+                conn.executemany("DELETE FROM items WHERE source = ? AND key = ?",
+                                 [(source, row["key"]) for row in migrated])
+                conn.executemany("""
+                    INSERT OR IGNORE INTO items (source, key, title_hash, position, first_seen) VALUES (?, ?, ?, ?, ?)
+                """, [(source, canonical_url(row["key"]), row["title_hash"], row["position"], row["first_seen"])
+                      for row in migrated])
+            changes, upserts = [], []
+            for key, (hashed, position, record) in current.items():
+                before = previous.get(key)
+                if before is None:
+                    if previous:
+                        # Первый снимок источника - только точка отсчёта, а не сотня «новых» записей
+                        changes.append({"kind": NEW, "source": source, "url": record.url, "title": record.title})
+                elif before[0] != hashed:
+                    changes.append({"kind": RETITLED, "source": source, "url": record.url, "title": record.title})
+                upserts.append((source, key, hashed, position, now))
+
+            gone = [(key, position) for key, (_, position) in previous.items() if key not in current]
+            if gone and not partial:
+                kept = [previous[key][1] for key in current if key in previous]
+                last_kept = max(kept) if kept else -1
+                for key, position in gone:
+                    if position < last_kept:
+                        changes.append({"kind": REMOVED, "source": source,
+                                        "url": None if key.startswith("title:") else key, "title": None})
+            if not partial:
+                conn.executemany("DELETE FROM items WHERE source = ? AND key = ?", [(source, key) for key, _ in gone])
+            conn.executemany("""
+                INSERT INTO items (source, key, title_hash, position, first_seen) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (source, key) DO UPDATE SET title_hash = excluded.title_hash, position = excluded.position
+            """, upserts)
+
+            counts = {kind: sum(1 for change in changes if change["kind"] == kind) for kind in (NEW, REMOVED, RETITLED)}
+            run_id = conn.execute("""
+                INSERT INTO runs (source, run_at, total, new, removed, retitled) VALUES (?, ?, ?, ?, ?, ?)
+            """, (source, now, len(current), counts[NEW], counts[REMOVED], counts[RETITLED])).lastrowid
+            conn.executemany("INSERT INTO changes (run_id, kind, url, title) VALUES (?, ?, ?, ?)",
+                             [(run_id, change["kind"], change["url"], change["title"]) for change in changes])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return changes
+
+    def latest(self, source=None, runs=1):
+        """Изменения последних runs запусков (каждого источника или одного source)"""
+        conn = self.connect()
+        try:
+            if source:
+                run_rows = conn.execute("SELECT * FROM runs WHERE source = ? ORDER BY id DESC LIMIT ?",
+                                        (source, runs)).fetchall()
+            else:
+                run_rows = conn.execute("""
+                    SELECT id, source, run_at, total, new, removed, retitled FROM (
+                        SELECT *, ROW_NUMBER() OVER (PARTITION BY source ORDER BY id DESC) AS n FROM runs
+                    ) WHERE n <= ? ORDER BY id DESC
+                """, (runs,)).fetchall()
+            result = []
+            for run in run_rows:
+                entry = dict(run)
+                entry["changes"] = [dict(row) for row in conn.execute(
+                    "SELECT kind, url, title FROM changes WHERE run_id = ?", (run["id"],))]
+                result.append(entry)
+            return result
+        finally:
+            conn.close()
+
+
+def diff_records(records, partial=False):
+    """
+    Стадия после сбора: сравнение записей каждого источника с прошлым снимком и печать
+    изменений строками [CHANGE] {json}. Ошибка снимков не должна мешать сохранению Excel.
+    """
+    groups = {}
+    for record in records:
+        groups.setdefault(record.source, []).append(record)
+    try:
+        store = SnapshotStore()
+        changes = []
+        for source, group in groups.items():
+            changes += store.diff(source, group, partial=partial)
+    except Exception as e:
+        print(f"[WARN] Не удалось сравнить ленту с прошлым снимком: {e}")
+        return []
+    for change in changes:
+        print(CHANGE_MARKER + json.dumps(change, ensure_ascii=False), flush=True)
+    if changes:
+        print("[INFO] Изменения с прошлого запуска: " + ", ".join(
+            f"{kind} {sum(1 for c in changes if c['kind'] == kind)}" for kind in (NEW, RETITLED, REMOVED)))
+    return changes
+
+
+def parse_change_line(line):
+    """Словарь изменения, если строка содержит маркер [CHANGE], иначе None"""
+    if not line.startswith(CHANGE_MARKER):
+        return None
+    try:
+        return json.loads(line[len(CHANGE_MARKER):])
+    except ValueError:
+        return None
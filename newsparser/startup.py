@@ -0,0 +1,36 @@
+import os
+import sys
+import time
+
+
+class StartupProfiler:
+    """
+    Замеры холодного старта приложения: время импорта модулей и этапов инициализации.
+    Включается флагом --profile-startup или переменной окружения NEWSPARSER_PROFILE_STARTUP.
+    """
+
+    def __init__(self, t0=None, enabled=None):
+        self.t0 = t0 if t0 is not None else time.perf_counter()
+        if enabled is None:
+            enabled = "--profile-startup" in sys.argv or bool(os.environ.get("NEWSPARSER_PROFILE_STARTUP"))
+        self.enabled = enabled
+        self.marks = []
+        self._last = self.t0
+
+    def mark(self, name):
+        """Отметка окончания этапа"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.marks.append((name, now - self._last, now - self.t0))
+        self._last = now
+
+    def report(self):
+        """Таблица этапов: длительность и время от старта, мс"""
+        lines = ["=== Профиль запуска ===", f"{'Этап':<36}{'Этап, мс':>10}{'С начала, мс':>14}"]
+        for name, step, total in self.marks:
+            lines.append(f"{name:<36}{step * 1000:>10.1f}{total * 1000:>14.1f}")
+        return "\n".join(lines)
+
+    def total_ms(self):
+        return self.marks[-1][2] * 1000 if self.marks else 0.0
@@ -0,0 +1,154 @@
+import json
+import os
+import pickle
+from collections import deque
+
+from newsparser import assets
+
+TAGS_PATH = os.environ.get("NEWSPARSER_TAGS", os.path.join(assets.PROJECT_DIR, "tags.json"))
+
+# Сколько букв окончания допускается после русского слова словаря:
+# «Газпром» -> «Газпрома», «Газпромом»; «Роснефть» -> «Роснефти», «Роснефтью»
+MAX_SUFFIX = 3
+_SOFT_ENDINGS = "аяоеьйыиую"
+_CYRILLIC = set("абвгдежзийклмнопрстуфхцчшщъыьэюя")
+
+
+def normalize(text):
+    """Нижний регистр и ё -> е. Длина строки не меняется, позиции совпадений сохраняются"""
+    return (text or "").lower().replace("ё", "е")
+
+
+def _pattern_variant(pattern):
+    """
+    Нормализованный шаблон и флаг «допускается окончание».
+    Окончание разрешено для русских слов длиннее 3 букв (последняя гласная/ь/й отбрасывается),
+    тикеры и латиница ищутся только целым словом. Явная «*» в конце - основа без окончания.
+    """
+    text = normalize(pattern.strip())
+    if text.endswith("*"):
+        return text[:-1], True
+    last_word = text.split()[-1] if text.split() else ""
+    if len(last_word) > 3 and all(ch in _CYRILLIC for ch in last_word):
+        if text[-1] in _SOFT_ENDINGS:
+            text = text[:-1]
+        return text, True
+    return text, False
+
+
+class Tagger:
+    """
+    Тегирование заголовков по словарю (автомат Ахо-Корасик).
+
+    Все шаблоны словаря компилируются в один автомат, поэтому заголовок
+    просматривается один раз независимо от числа шаблонов.
+    Словарь: {"Тег": ["шаблон", ...]}, например {"Сбербанк": ["Сбербанк", "Сбер", "SBER"]}.
+    """
+
+    def __init__(self, dictionary):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [()]
+        # Шаблон: (длина, тег, допускается окончание)
+        self.patterns = []
+
+        for tag, patterns in dictionary.items():
+            for pattern in patterns:
+                text, stem = _pattern_variant(pattern)
+                if text:
+                    self._add(text, (len(text), tag, stem))
+        self._build()
+
+    def _add(self, text, pattern):
+        node = 0
+        for ch in text:
+            nxt = self.goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(())
+            node = nxt
+        self.output[node] = self.output[node] + (len(self.patterns),)
+        self.patterns.append(pattern)
+
+    def _build(self):
+        """Ссылки неудач в ширину; выходы узла дополняются выходами суффиксов"""
+        # Дети корня ссылаются на корень (fail уже 0)
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self.goto[node].items():
+                queue.append(child)
+                state = self.fail[node]
+                while state and ch not in self.goto[state]:
+                    state = self.fail[state]
+                self.fail[child] = self.goto[state].get(ch, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def tags(self, title):
+        """Отсортированный список тегов заголовка"""
+        text = normalize(title)
+        goto, fail, output, patterns = self.goto, self.fail, self.output, self.patterns
+        found = set()
+        node = 0
+        for pos, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if not output[node]:
+                continue
+            for pattern_id in output[node]:
+                length, tag, stem = patterns[pattern_id]
+                if tag in found:
+                    continue
+                start = pos - length + 1
+                # Совпадение должно начинаться с начала слова
+                if start > 0 and text[start - 1].isalnum():
+                    continue
+                end = pos + 1
+                if stem:
+                    while end < len(text) and text[end].isalnum() and end - pos - 1 < MAX_SUFFIX:
+                        end += 1
+                if end < len(text) and text[end].isalnum():
+                    continue
+                found.add(tag)
+        return sorted(found)
+
+
+_tagger = None
+
+
+def load_tagger(path=TAGS_PATH):
+    """
+    Тегер по словарю из файла. Скомпилированный автомат кэшируется на диске
+    и пересобирается при изменении словаря. Без словаря возвращает None.
+    """
+    global _tagger
+    if _tagger is not None and path == TAGS_PATH:
+        return _tagger
+    if not os.path.isfile(path):
+        return None
+
+    cached = assets.cache_path(path, "automaton", assets.CACHE_DIR) + ".pickle"
+    tagger = None
+    if os.path.exists(cached):
+        try:
+            with open(cached, "rb") as f:
+                tagger = pickle.load(f)
+        except Exception:
+            tagger = None
+    if tagger is None:
+        with open(path, encoding="utf-8") as f:
+            tagger = Tagger(json.load(f))
+        try:
+            os.makedirs(assets.CACHE_DIR, exist_ok=True)
+            with open(cached, "wb") as f:
+                pickle.dump(tagger, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError as e:
+            print(f"[WARN] Не удалось сохранить кэш словаря тегов: {e}")
+
+    if path == TAGS_PATH:
+        _tagger = tagger
+    return tagger
@@ -0,0 +1,242 @@
+import argparse
+import os
+import socket
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from newsparser import browser, cli, workqueue
+from newsparser.records import LIMIT_ENV
+
+# Пауза между опросами пустой очереди
+IDLE_SECONDS = 5
+# Записи уходят в хранилище пачками, чтобы долгий сбор не держал всё в памяти
+PUSH_BATCH = 200
+
+
+def _window(params):
+    """
+    Окно дат задания: since (часы) или from/to (ISO-даты, догрузка за прошлый период).
+    Парсеры читают ленты сайтов, а не архив по датам, поэтому окно - фильтр по published_at.
+    """
+    start = end = None
+    if params.get("since"):
+        start = datetime.now() - timedelta(hours=float(params["since"]))
+    if params.get("from"):
+        start = datetime.fromisoformat(params["from"])
+    if params.get("to"):
+        end = datetime.fromisoformat(params["to"])
+    return start, end
+
+
+def _in_range(record, start, end):
+    if not cli.in_window(record, start):
+        return False
+    if end is None or not record.get("published_at"):
+        return True
+    try:
+        return datetime.fromisoformat(record["published_at"]) <= end
+    except ValueError:
+        return True
+
+
+class Worker:
+    """
+    Рабочий распределённого сбора: берёт задания из очереди (SQLite или координатор server.py),
+    запускает парсер и отправляет записи в общий архив. Пока парсер работает, аренда
+    продлевается пульсом; если аренда потеряна (рабочий завис, задание выдано другому) - парсер останавливается.
+    """
+
+    def __init__(self, queue, worker_id=None, slots=1, lease_seconds=workqueue.LEASE_SECONDS,
+                 headless=True, once=False, shared_browser=False):
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.slots = max(1, slots)
+        self.lease_seconds = lease_seconds
+        self.headless = headless
+        self.once = once
+        self.shared_browser = shared_browser
+        self.env = {workqueue.WORKER_MODE_ENV: "1"}
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def run_job(self, job, slot_id):
+        job_id, source, params = job["id"], job["source"], job["params"]
+        print(f"[INFO] {slot_id}: задание {job_id} ({source}), попытка {job['attempts']}")
+        if source not in cli.available_sources():
+            self.queue.fail(job_id, slot_id, f"Неизвестный источник: {source}", retry=False)
+            print(f"[ERROR] {slot_id}: неизвестный источник {source}")
+            return
+
+        start, end = _window(params)
+        limit = params.get("limit")
+        lock = threading.Lock()
+        batch, state = [], {"progress": None, "items": 0, "skipped": 0}
+        lease_lost = threading.Event()
+
+        def push():
+            # Вызывается под lock
+            if batch:
+                self.queue.push_records(job_id, slot_id, list(batch))
+                batch.clear()
+
+        def on_record(record):
+            with lock:
+                if lease_lost.is_set():
+                    return
+                if (limit is None or state["items"] < limit) and _in_range(record, start, end):
+                    batch.append(record)
+                    state["items"] += 1
+                    if len(batch) >= PUSH_BATCH:
+                        try:
+                            push()
+                        except workqueue.LeaseLost:
+                            lease_lost.set()
+                else:
+                    state["skipped"] += 1
+
+        def on_progress(percent):
+            state["progress"] = percent
+
+        # Пульс: продление аренды в отдельном потоке, треть срока аренды
+        finished = threading.Event()
+
+        def beat():
+            while not finished.wait(self.lease_seconds / 3):
+                try:
+                    self.queue.heartbeat(job_id, slot_id, self.lease_seconds, progress=state["progress"])
+                except workqueue.LeaseLost:
+                    print(f"[WARN] {slot_id}: аренда задания {job_id} потеряна, сбор остановлен")
+                    lease_lost.set()
+                    return
+                except Exception as e:
+                    # Координатор временно недоступен: пробуем снова до истечения аренды
+                    print(f"[WARN] {slot_id}: пульс задания {job_id} не отправлен: {e}")
+
+        env = dict(self.env)
+        if limit is not None and start is None and end is None:
+            env[LIMIT_ENV] = str(limit)
+
+        beater = threading.Thread(target=beat, name=f"heartbeat-{job_id}", daemon=True)
+        beater.start()
+        try:
+            run = cli.run_parser(source, on_record, on_progress=on_progress,
+                                 timeout=params.get("timeout"), headless=self.headless, env=env,
+                                 should_stop=lambda: lease_lost.is_set() or self._stop.is_set())
+        finally:
+            finished.set()
+            beater.join()
+
+        if lease_lost.is_set():
+            return
+        try:
+            with lock:
+                push()
+            result = {"status": run["status"], "items": state["items"], "skipped": state["skipped"],
+                      "exit_code": run["exit_code"]}
+            if run["status"] in ("success", "partial"):
+                self.queue.complete(job_id, slot_id, result)
+                print(f"[INFO] {slot_id}: задание {job_id} выполнено, записей: {state['items']}")
+            else:
+                # Остановка рабочего (cancelled) - не ошибка источника: задание вернётся в очередь
+                error = "\n".join(run["tail"]) or run["status"]
+                self.queue.fail(job_id, slot_id, error, retry=True)
+                print(f"[WARN] {slot_id}: задание {job_id} завершилось со статусом {run['status']}")
+        except workqueue.LeaseLost:
+            print(f"[WARN] {slot_id}: аренда задания {job_id} истекла до отправки результата")
+
+    def run_slot(self, slot):
+        slot_id = self.worker_id if self.slots == 1 else f"{self.worker_id}/{slot}"
+        while not self._stop.is_set():
+            try:
+                job = self.queue.lease(slot_id, self.lease_seconds)
+            except Exception as e:
+                print(f"[WARN] {slot_id}: очередь недоступна: {e}")
+                job = None
+            if job is None:
+                if self.once:
+                    return
+                self._stop.wait(IDLE_SECONDS)
+                continue
+            try:
+                self.run_job(job, slot_id)
+            except Exception as e:
+                print(f"[ERROR] {slot_id}: задание {job['id']}: {e}")
+
+    def run(self):
+        print(f"[INFO] Рабочий {self.worker_id}: {self.slots} слот(ов)")
+        shared = None
+        if self.shared_browser:
+            # Слоты рабочего делят один Chrome: каждое задание - в своём контексте-вкладке
+            shared = browser.SharedBrowser(headless=self.headless).start()
+            self.env.update(shared.env())
+        try:
+            with ThreadPoolExecutor(max_workers=self.slots) as pool:
+                for slot in range(self.slots):
+                    pool.submit(self.run_slot, slot)
+        except KeyboardInterrupt:
+            # Парсеры останавливаются сторожем run_parser, задания возвращаются в очередь
+            print(f"[INFO] Рабочий {self.worker_id} останавливается")
+            self.stop()
+        finally:
+            if shared is not None:
+                shared.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m newsparser.worker",
+        description="Рабочий распределённого сбора: задания из очереди, записи - в общий архив.",
+        epilog="Очередь: путь к SQLite (несколько процессов одной машины) или адрес координатора "
+               "(http://host:5000, маршруты /queue/... в server.py). "
+               "Задания: python -m newsparser.worker --enqueue all --since 6")
+    parser.add_argument("--queue", help="Путь к queue.sqlite3 или http://координатор (по умолчанию NEWSPARSER_QUEUE "
+                                        "или data/queue.sqlite3)")
+    parser.add_argument("--worker-id", help="Имя рабочего (по умолчанию хост-pid)")
+    parser.add_argument("--slots", type=int, default=1, help="Сколько заданий выполнять параллельно")
+    parser.add_argument("--lease", type=float, default=workqueue.LEASE_SECONDS, help="Срок аренды задания, с")
+    parser.add_argument("--once", action="store_true", help="Выйти, когда очередь опустеет")
+    parser.add_argument("--headed", action="store_true", help="Показывать окно Chrome")
+    parser.add_argument("--shared-browser", action="store_true", help="Один Chrome на все слоты рабочего")
+    parser.add_argument("--enqueue", nargs="+", metavar="SOURCE", help="Поставить задания (источники или all) и выйти")
+    parser.add_argument("--limit", type=int, help="Для --enqueue: не больше N записей")
+    parser.add_argument("--since", type=float, metavar="HOURS", help="Для --enqueue: новости за последние HOURS часов")
+    parser.add_argument("--from", dest="date_from", metavar="ISO", help="Для --enqueue: начало окна дат (догрузка)")
+    parser.add_argument("--to", dest="date_to", metavar="ISO", help="Для --enqueue: конец окна дат")
+    parser.add_argument("--status", action="store_true", help="Показать задания и рабочих и выйти")
+    args = parser.parse_args(argv)
+
+    queue = workqueue.open_queue(args.queue)
+    if args.status:
+        for job in queue.jobs():
+            print(f"{job['id']:>6} {job['status']:<7} {job['source']:<24} попыток {job['attempts']}/{job['max_attempts']}"
+                  f" {job['worker'] or ''}")
+        for worker in queue.workers():
+            print(f"рабочий {worker['worker']}: задание {worker['job_id']}, {worker['seconds_since_seen']} с назад")
+        return 0
+
+    if args.enqueue:
+        known = cli.available_sources()
+        sources = known if args.enqueue == ["all"] else args.enqueue
+        unknown = [name for name in sources if name not in known]
+        if unknown:
+            parser.error(f"неизвестные источники: {', '.join(unknown)}")
+        if args.limit is not None and args.limit < 1:
+            parser.error("--limit должен быть не меньше 1")
+        params = {key: value for key, value in (("limit", args.limit), ("since", args.since),
+                                                ("from", args.date_from), ("to", args.date_to)) if value is not None}
+        for source in sources:
+            print(f"[INFO] Задание {queue.enqueue(source, params)}: {source}")
+        return 0
+
+    worker = Worker(queue, worker_id=args.worker_id, slots=args.slots, lease_seconds=args.lease,
+                    headless=not args.headed, once=args.once, shared_browser=args.shared_browser)
+    worker.run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,324 @@
+import json
+import os
+import sqlite3
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+from newsparser import assets
+
+QUEUE_PATH = os.path.join(assets.PROJECT_DIR, "data", "queue.sqlite3")
+# Общий ключ координатора и рабочих (заголовок X-Queue-Token); без него очередь открыта
+QUEUE_TOKEN = os.environ.get("NEWSPARSER_QUEUE_TOKEN")
+
+# Парсер, запущенный рабочим, только собирает записи: архив, снимки, уведомления и Excel - забота координатора
+WORKER_MODE_ENV = "NEWSPARSER_WORKER_MODE"
+
+
+def worker_mode():
+    return os.environ.get(WORKER_MODE_ENV) == "1"
+
+
+# Аренда задания: рабочий продлевает её пульсом; не продлил - задание выдаётся другому
+LEASE_SECONDS = 120
+MAX_ATTEMPTS = 3
+HTTP_TIMEOUT = 30
+
+
+class LeaseLost(Exception):
+    """Аренда задания истекла или передана другому рабочему"""
+
+
+class JobQueue:
+    """
+    Очередь заданий на сбор. Задание: источник и параметры (limit, since, from/to для догрузки).
+    Реализации: SQLiteQueue (локально, на координаторе) и HTTPQueue (рабочий на другой машине).
+
+    Жизненный цикл: queued -> leased (lease_until продлевается heartbeat) -> done / failed.
+    Задание с истёкшей арендой (рабочий умер) снова выдаётся lease(), пока не исчерпаны попытки.
+    """
+
+    def enqueue(self, source, params=None, max_attempts=MAX_ATTEMPTS):
+        raise NotImplementedError
+
+    def lease(self, worker, lease_seconds=LEASE_SECONDS):
+        """Следующее задание для рабочего (dict) или None, если очередь пуста"""
+        raise NotImplementedError
+
+    def heartbeat(self, job_id, worker, lease_seconds=LEASE_SECONDS, progress=None):
+        """Продление аренды; LeaseLost, если задание уже не принадлежит рабочему"""
+        raise NotImplementedError
+
+    def push_records(self, job_id, worker, records):
+        """Передача собранных записей в общее хранилище (архив координатора)"""
+        raise NotImplementedError
+
+    def complete(self, job_id, worker, result=None):
+        raise NotImplementedError
+
+    def fail(self, job_id, worker, error, retry=True):
+        raise NotImplementedError
+
+    def jobs(self, status=None, limit=100):
+        raise NotImplementedError
+
+    def workers(self):
+        raise NotImplementedError
+
+
+def _published_at(record):
+    """Дата, распознанная конвейером рабочего (NewsRecord.to_dict), без повторного разбора текста"""
+    try:
+        return datetime.fromisoformat(record["published_at"]) if record.get("published_at") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def store_records(records):
+    """
+    Запись в архив записей от рабочих (словари NewsRecord.to_dict) по источникам.
+    Архив не дублирует ссылки, поэтому повторная доставка задания безопасна.
+    """
+    from newsparser.archive import shared_archive
+
+    groups = {}
+    for record in records:
+        groups.setdefault(record.get("source") or "unknown", []).append(record)
+    archive = shared_archive()
+    stored = 0
+    for source, group in groups.items():
+        archive.ingest(source, {
+            'name': [record.get("title") for record in group],
+            'link': [record.get("url") for record in group],
+            'date': [record.get("raw_date") for record in group],
+            'published_at': [_published_at(record) for record in group],
+            'tags': [record.get("tags") or [] for record in group],
+        })
+        stored += len(group)
+    return stored
+
+
+def _now():
+    return time.time()
+
+
+class SQLiteQueue(JobQueue):
+    """Очередь в SQLite (WAL): несколько процессов одной машины или координатор для HTTPQueue"""
+
+    def __init__(self, path=QUEUE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self.connect()
+        try:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    source TEXT NOT NULL,
+                    params TEXT NOT NULL DEFAULT '{}',
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL DEFAULT 3,
+                    worker TEXT,
+                    lease_until REAL,
+                    progress INTEGER,
+                    items INTEGER NOT NULL DEFAULT 0,
+                    result TEXT,
+                    error TEXT,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+                CREATE TABLE IF NOT EXISTS workers (
+                    worker TEXT PRIMARY KEY,
+                    last_seen REAL NOT NULL,
+                    job_id INTEGER
+                );
+            """)
+        finally:
+            conn.close()
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @staticmethod
+    def _job(row):
+        job = dict(row)
+        job["params"] = json.loads(job["params"] or "{}")
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def _seen(self, conn, worker, job_id):
+        conn.execute("INSERT OR REPLACE INTO workers (worker, last_seen, job_id) VALUES (?, ?, ?)",
+                     (worker, _now(), job_id))
+
+    def enqueue(self, source, params=None, max_attempts=MAX_ATTEMPTS):
+        stamp = datetime.now().isoformat(timespec="seconds")
+        conn = self.connect()
+        try:
+            cursor = conn.execute("""
+                INSERT INTO jobs (source, params, max_attempts, created_at, updated_at) VALUES (?, ?, ?, ?, ?)
+            """, (source, json.dumps(params or {}, ensure_ascii=False), max_attempts, stamp, stamp))
+            return cursor.lastrowid
+        finally:
+            conn.close()
+
+    def lease(self, worker, lease_seconds=LEASE_SECONDS):
+        now = _now()
+        stamp = datetime.now().isoformat(timespec="seconds")
+        conn = self.connect()
+        try:
+            # BEGIN IMMEDIATE: два рабочих не получат одно задание
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Аренды умерших рабочих: попытки исчерпаны - failed, иначе задание выдаётся заново
+                conn.execute("""
+                    UPDATE jobs SET status = 'failed', error = 'Аренда истекла: рабочий не отвечает', updated_at = ?
+                    WHERE status = 'leased' AND lease_until < ? AND attempts >= max_attempts
+                """, (stamp, now))
+                row = conn.execute("""
+                    SELECT * FROM jobs
+                    WHERE status = 'queued' OR (status = 'leased' AND lease_until < ?)
+                    ORDER BY id LIMIT 1
+                """, (now,)).fetchone()
+                if row is not None:
+                    conn.execute("""
+                        UPDATE jobs SET status = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1,
+                                        progress = NULL, updated_at = ?
+                        WHERE id = ?
+                    """, (worker, now + lease_seconds, stamp, row["id"]))
+                self._seen(conn, worker, row["id"] if row else None)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            if row is None:
+                return None
+            return self._job(conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone())
+        finally:
+            conn.close()
+
+    def _owned_update(self, job_id, worker, sql, params):
+        """UPDATE только пока аренда у этого рабочего и не истекла (иначе LeaseLost)"""
+        conn = self.connect()
+        try:
+            cursor = conn.execute(sql + " WHERE id = ? AND worker = ? AND status = 'leased' AND lease_until >= ?",
+                                  (*params, job_id, worker, _now()))
+            if cursor.rowcount == 0:
+                raise LeaseLost(f"Задание {job_id} больше не принадлежит рабочему {worker}")
+            self._seen(conn, worker, job_id)
+        finally:
+            conn.close()
+
+    def heartbeat(self, job_id, worker, lease_seconds=LEASE_SECONDS, progress=None):
+        self._owned_update(job_id, worker, "UPDATE jobs SET lease_until = ?, progress = COALESCE(?, progress)",
+                           (_now() + lease_seconds, progress))
+
+    def push_records(self, job_id, worker, records):
+        # Сначала проверка аренды: записи умершей попытки не нужны, их соберёт следующая
+        self._owned_update(job_id, worker, "UPDATE jobs SET items = items + ?", (len(records),))
+        return store_records(records)
+
+    def complete(self, job_id, worker, result=None):
+        stamp = datetime.now().isoformat(timespec="seconds")
+        self._owned_update(job_id, worker,
+                           "UPDATE jobs SET status = 'done', progress = 100, result = ?, lease_until = NULL, updated_at = ?",
+                           (json.dumps(result or {}, ensure_ascii=False), stamp))
+
+    def fail(self, job_id, worker, error, retry=True):
+        stamp = datetime.now().isoformat(timespec="seconds")
+        # Повтор: задание возвращается в очередь, пока не исчерпаны попытки
+        self._owned_update(job_id, worker, """
+            UPDATE jobs SET status = CASE WHEN ? AND attempts < max_attempts THEN 'queued' ELSE 'failed' END,
+                            error = ?, lease_until = NULL, updated_at = ?
+        """, (1 if retry else 0, str(error)[:2000], stamp))
+
+    def jobs(self, status=None, limit=100):
+        query, params = "SELECT * FROM jobs", []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        conn = self.connect()
+        try:
+            return [self._job(row) for row in conn.execute(query, params)]
+        finally:
+            conn.close()
+
+    def workers(self):
+        conn = self.connect()
+        try:
+            now = _now()
+            return [{"worker": row["worker"], "job_id": row["job_id"],
+                     "seconds_since_seen": round(now - row["last_seen"], 1)}
+                    for row in conn.execute("SELECT * FROM workers ORDER BY last_seen DESC")]
+        finally:
+            conn.close()
+
+
+class HTTPQueue(JobQueue):
+    """Очередь координатора (server.py, маршруты /queue/...) для рабочих на других машинах"""
+
+    def __init__(self, base_url, token=QUEUE_TOKEN):
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+
+    def _call(self, method, path, body=None):
+        data = json.dumps(body or {}, ensure_ascii=False).encode("utf-8") if method == "POST" else None
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["X-Queue-Token"] = self.token
+        request = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(request, timeout=HTTP_TIMEOUT) as response:
+                if response.status == 204:
+                    return None
+                return json.loads(response.read().decode("utf-8"))
+        except urllib.error.HTTPError as e:
+            if e.code == 409:
+                raise LeaseLost(e.read().decode("utf-8", errors="replace"))
+            raise
+
+    def enqueue(self, source, params=None, max_attempts=MAX_ATTEMPTS):
+        return self._call("POST", "/queue/jobs", {"source": source, "params": params or {},
+                                                  "max_attempts": max_attempts})["ids"][0]
+
+    def lease(self, worker, lease_seconds=LEASE_SECONDS):
+        return self._call("POST", "/queue/lease", {"worker": worker, "lease_seconds": lease_seconds})
+
+    def heartbeat(self, job_id, worker, lease_seconds=LEASE_SECONDS, progress=None):
+        self._call("POST", f"/queue/jobs/{job_id}/heartbeat",
+                   {"worker": worker, "lease_seconds": lease_seconds, "progress": progress})
+
+    def push_records(self, job_id, worker, records):
+        return self._call("POST", f"/queue/jobs/{job_id}/records", {"worker": worker, "records": records})["stored"]
+
+    def complete(self, job_id, worker, result=None):
+        self._call("POST", f"/queue/jobs/{job_id}/complete", {"worker": worker, "result": result or {}})
+
+    def fail(self, job_id, worker, error, retry=True):
+        self._call("POST", f"/queue/jobs/{job_id}/fail", {"worker": worker, "error": str(error), "retry": retry})
+
+    def jobs(self, status=None, limit=100):
+        query = f"?limit={limit}" + (f"&status={status}" if status else "")
+        return self._call("GET", "/queue/jobs" + query)
+
+    def workers(self):
+        return self._call("GET", "/queue/workers")
+
+
+def open_queue(address=None):
+    """
+    Очередь по адресу: http(s)://... - координатор (HTTPQueue), путь к файлу или
+    sqlite:///путь - локальная SQLiteQueue; по умолчанию data/queue.sqlite3
+    """
+    address = address or os.environ.get("NEWSPARSER_QUEUE") or QUEUE_PATH
+    if address.startswith(("http://", "https://")):
+        return HTTPQueue(address)
+    if address.startswith("sqlite:///"):
+        address = address[len("sqlite:///"):]
+    return SQLiteQueue(address)
@@ -0,0 +1,78 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from newsparser import feeds
+from newsparser.alerts import AlertStream
+from newsparser.checkpoint import Checkpoint
+from newsparser.metrics import RunMetrics
+from newsparser.pipeline import news_pipeline
+from newsparser.records import NewsRecord
+
+metrics = RunMetrics("RSS_news")
+alerts = AlertStream(metrics.source)
+checkpoint = Checkpoint(metrics.source)
+
+# --offline (или NEWSPARSER_FEEDS_OFFLINE=1): ленты читаются из newsparser/fixtures/feeds
+OFFLINE = "--offline" in sys.argv or os.environ.get("NEWSPARSER_FEEDS_OFFLINE") == "1"
+
+
+def extract_news(progress_callback):
+    """
+    Генератор: опрос RSS/Atom лент из feeds.FEEDS без браузера, записи NewsRecord по мере ответа лент.
+    Ленты запрашиваются параллельно с условным GET; новыми считаются записи,
+    которых не было при прошлом опросе (только они уходят в уведомления).
+    """
+    state = feeds.load_state()
+    urls = {source: feeds.fixture_url(source) if OFFLINE else url for source, url in feeds.FEEDS.items()}
+    collected = 0
+
+    def poll(source):
+        known = {entry[1] for entry in state.get(urls[source], {}).get("entries", [])}
+        entries, changed = feeds.fetch_feed(urls[source], state)
+        return entries, changed, known
+
+    with metrics.span("harvest"):
+        with ThreadPoolExecutor(max_workers=len(urls)) as pool:
+            futures = {pool.submit(poll, source): source for source in urls}
+            for done, future in enumerate(as_completed(futures), start=1):
+                source = futures[future]
+                try:
+                    entries, changed, known = future.result()
+                except Exception as e:
+                    print(f"[WARN] Лента {source} недоступна: {e}")
+                    continue
+
+                new_count = 0
+                for title, link, date in entries:
+                    if link not in known:
+                        new_count += 1
+                        alerts.emit(title, link, date)
+                    collected += 1
+                    yield NewsRecord(source, title, link, date)
+
+                note = "" if changed else " (лента не изменилась)"
+                print(f"[INFO] {source}: записей {len(entries)}, новых {new_count}{note}")
+                progress_callback(int(done / len(urls) * 100))
+
+    feeds.save_state(state)
+    print(f"[INFO] Завершён опрос лент. Собрано {collected} новостей.")
+
+
+if __name__ == "__main__":
+    def progress_callback(progress):
+        print(f"Progress: {progress}%")
+
+    status = "failed"
+    try:
+        # Журнал, ссылки и даты, теги, архив, снимок и Excel - стадии конвейера по мере опроса
+        pipeline = news_pipeline(metrics, checkpoint, "News_data_RSS_Feeds.xlsx", source_column=True)
+        pipeline.run(extract_news(progress_callback))
+        checkpoint.complete()
+        status = "partial" if checkpoint.partial else "success"
+        print("[INFO] Скрипт завершен успешно.")
+    finally:
+        checkpoint.close()
+        alerts.close()
+        metrics.report(status)
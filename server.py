@@ -1,13 +1,45 @@
 import os
+import argparse
+import atexit
+import ipaddress
+import json
 import subprocess
-from datetime import datetime
-from flask import Flask, request, Response, send_from_directory
+from flask import Flask, request, Response, send_from_directory, jsonify
+
+from newsparser import browser
+from newsparser.archive import shared_archive
+from newsparser.logstore import RunLogStore
+from newsparser.metrics import MetricsRegistry, parse_metrics_line
+from newsparser.records import RECORD_MARKER, parse_record_line
+from newsparser.related import shared_index
+from newsparser.snapshots import CHANGE_MARKER, SnapshotStore, parse_change_line
+from newsparser.proctree import popen_group, kill_tree
+from newsparser.workqueue import LeaseLost, QUEUE_TOKEN, SQLiteQueue
 
 app = Flask(__name__)
 
+# Архив новостей процесса: схема проверяется один раз, а не в каждом запросе (/news/page - на каждую прокрутку)
+news_archive = shared_archive()
+
+# Хранилище логов запусков (JSON lines с ротацией в logs/)
+log_store = RunLogStore()
+atexit.register(log_store.close)
+
+# Метрики всех запусков для /metrics
+metrics_registry = MetricsRegistry()
+
 PYTHON_EXE = os.environ.get("PYTHON_EXE", "python")
 SCRIPTS_DIR = os.path.join(os.path.dirname(__file__), "parsers")
 
+STATIC_DIR = os.path.join(os.path.dirname(__file__), "static")
+# css/js отдаются с долгим кэшем: в index.html ссылки с ?v=<версия>, новая версия - новый адрес
+STATIC_MAX_AGE = 30 * 24 * 3600
+# Размер страницы /news/page для списка новостей в веб-интерфейсе
+PAGE_SIZE = 200
+MAX_PAGE_SIZE = 1000
+# Окно /related: дальше 10 лет назад архива нет, а слишком большое окно не вычитается из текущей даты
+MAX_RELATED_HOURS = 10 * 365 * 24
+
 SCRIPTS = {
     "INTERFAX_Business_news": "INTERFAX_Business_news.py",
     "MASH_First_100_news": "MASH_First_100_news.py",
@@ -15,25 +47,62 @@ SCRIPTS = {
     "TASS_news": "TASS_news.py",
     "RGru_news": "RGru_news.py",
     "PRIME_news": "PRIME_news.py",
+    "RSS_news": "RSS_news.py",
 }
 
+def limit_arg(default, maximum=MAX_PAGE_SIZE):
+    """?limit= в пределах 1..maximum: отрицательный LIMIT в SQLite снимает ограничение"""
+    return max(1, min(request.args.get('limit', default, type=int), maximum))
+
+def asset_version():
+    """Версия статики: время последнего изменения файлов static/css и static/js"""
+    mtimes = [0]
+    for folder in ("css", "js"):
+        folder_path = os.path.join(STATIC_DIR, folder)
+        if os.path.isdir(folder_path):
+            mtimes += [os.path.getmtime(os.path.join(folder_path, name)) for name in os.listdir(folder_path)]
+    return str(int(max(mtimes)))
+
 @app.route("/")
 def index():
-    return send_from_directory(os.path.dirname(__file__), 'index.html')
+    with open(os.path.join(os.path.dirname(__file__), 'index.html'), encoding='utf-8') as f:
+        page = f.read().replace('__ASSET_VERSION__', asset_version())
+    # Сама страница всегда перепроверяется, чтобы подхватить новую версию статики
+    return Response(page, mimetype='text/html', headers={'Cache-Control': 'no-cache'})
 
 @app.route("/static/<path:path>")
 def send_static(path):
-    return send_from_directory('static', path)
+    return send_from_directory(STATIC_DIR, path, max_age=STATIC_MAX_AGE)
 
-def stream_process_output(process, logfile_path):
-    """Вывод stdout скрипта в SSE и лог-файл"""
-    with open(logfile_path, "w", encoding="utf-8") as logfile:
+def stream_process_output(process, run_log):
+    """Вывод stdout скрипта в SSE и хранилище логов"""
+    status = "cancelled"
+    try:
+        # Идентификатор запуска для поиска логов через /runs/<job_id>/log
+        yield f"event: job\ndata: {run_log.job_id}\n\n"
         for line in iter(process.stdout.readline, ''):
             clean_line = line.rstrip()
-            logfile.write(clean_line + "\n")
-            logfile.flush()
+            run_log.write(clean_line)
+            run_metrics = parse_metrics_line(clean_line)
+            if run_metrics is not None:
+                metrics_registry.observe(run_metrics)
+                continue
+            # Собранная новость - отдельное событие для списка результатов
+            if parse_record_line(clean_line) is not None:
+                yield f"event: record\ndata: {clean_line[len(RECORD_MARKER):]}\n\n"
+                continue
+            # Новая, снятая или переименованная с прошлого запуска запись
+            if parse_change_line(clean_line) is not None:
+                yield f"event: change\ndata: {clean_line[len(CHANGE_MARKER):]}\n\n"
+                continue
             yield f"data: {clean_line}\n\n"
+        status = "finished" if process.wait() == 0 else "failed"
         yield "data: [Завершено]\n\n"
+    finally:
+        # Клиент закрыл соединение - завершаем парсер вместе с chromedriver и Chrome
+        if process.poll() is None:
+            kill_tree(process)
+        run_log.finish(status)
 
 @app.route("/run-script-stream")
 def run_script_stream():
@@ -45,16 +114,10 @@ def run_script_stream():
     if not os.path.isfile(script_path):
         return f"Файл скрипта не найден: {script_path}", 404
 
-    # Создаём папку Logs, если нет
-    logs_dir = os.path.join(os.path.dirname(__file__), "Logs")
-    os.makedirs(logs_dir, exist_ok=True)
-
-    now = datetime.now().strftime("%d.%m.%Y %H.%M.%S")
-    logfile_name = f"log {now}.txt"
-    logfile_path = os.path.join(logs_dir, logfile_name)
+    run_log = log_store.open_run(script_name)
 
     # Запуск скрипта
-    process = subprocess.Popen(
+    process = popen_group(
         [PYTHON_EXE, script_path],
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
@@ -63,7 +126,282 @@ def run_script_stream():
         universal_newlines=True,
     )
 
-    return Response(stream_process_output(process, logfile_path), mimetype='text/event-stream')
+    return Response(stream_process_output(process, run_log), mimetype='text/event-stream')
+
+@app.route("/metrics")
+def metrics():
+    """Метрики запусков парсеров в формате Prometheus"""
+    return Response(metrics_registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route("/health")
+def health():
+    """Готовность к запуску парсеров: пара chromedriver/Chrome и файлы скриптов (?refresh=1 - перепроверить)"""
+    info = browser.status(refresh=request.args.get('refresh') == '1')
+    missing = [name for name, script in SCRIPTS.items()
+               if not os.path.isfile(os.path.join(SCRIPTS_DIR, script))]
+    ok = bool(info.get("ok")) and not missing
+    body = {"status": "ok" if ok else "error", "browser": info, "missing_scripts": missing}
+    return jsonify(body), 200 if ok else 503
+
+@app.route("/runs")
+def list_runs():
+    """Последние запуски из индекса логов"""
+    source = request.args.get('source')
+    return jsonify(log_store.runs(source=source, limit=limit_arg(50)))
+
+@app.route("/runs/<job_id>/log")
+def run_log_lines(job_id):
+    """Строки лога одного запуска в формате JSON lines"""
+    if log_store.get_run(job_id) is None:
+        return "Запуск не найден", 404
+
+    level = request.args.get('level')
+    contains = request.args.get('q')
+    records = log_store.read_run(job_id, level=level, contains=contains)
+    body = (json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+    return Response(body, mimetype='application/x-ndjson')
+
+@app.route("/news")
+def news():
+    """Записи архива с фильтрами ?source=&tag=&hours=&limit="""
+    records = news_archive.records(
+        source=request.args.get('source'),
+        tag=request.args.get('tag'),
+        since_hours=request.args.get('hours', type=int),
+        limit=limit_arg(100),
+    )
+    return jsonify(records)
+
+@app.route("/news/page")
+def news_page():
+    """
+    Страница архива для списка новостей веб-интерфейса (новые сверху).
+    ?before=<id> - следующая страница, ?limit=, ?source=, ?hours=; в ответе next - before для следующей страницы
+    """
+    limit = limit_arg(PAGE_SIZE)
+    items = news_archive.records(
+        source=request.args.get('source'),
+        since_hours=request.args.get('hours', type=int),
+        before_id=request.args.get('before', type=int),
+        limit=limit,
+    )
+    return jsonify({"items": items, "next": items[-1]["id"] if len(items) == limit else None})
+
+@app.route("/stories")
+def stories():
+    """Сюжеты (кластеры перепечаток) с фильтрами ?tag=&hours=&limit="""
+    return jsonify(news_archive.stories(
+        since_hours=request.args.get('hours', 24, type=int),
+        limit=limit_arg(100),
+        tag=request.args.get('tag'),
+    ))
+
+@app.route("/tags")
+def tags():
+    """Число записей по тегам за период ?hours="""
+    return jsonify(news_archive.tag_counts(since_hours=request.args.get('hours', type=int)))
+
+@app.route("/changes")
+def changes():
+    """Что изменилось в лентах: дельты последних ?runs= запусков каждого источника (или ?source=)"""
+    return jsonify(SnapshotStore().latest(
+        source=request.args.get('source'),
+        runs=max(1, request.args.get('runs', 1, type=int)),
+    ))
+
+def related_window(k, hours):
+    """Проверка k и hours запроса /related: (k, hours, None) или (None, None, текст ошибки для 400)"""
+    if isinstance(k, bool) or not isinstance(k, int) or k < 1:
+        return None, None, "k: целое не меньше 1"
+    if isinstance(hours, bool) or not isinstance(hours, (int, float)) or not 0 < hours <= MAX_RELATED_HOURS:
+        return None, None, f"hours: число больше 0 и не больше {MAX_RELATED_HOURS}"
+    return k, hours, None
+
+@app.route("/related", methods=["GET", "POST"])
+def related():
+    """
+    Похожие публикации за последние недели (TF-IDF по n-граммам заголовков, без внешних сервисов).
+    GET ?q=<заголовок> или ?id=<запись архива> (по умолчанию только другие издания, ?all_sources=1 - все),
+    &k=&hours=; POST {"titles": [...], "k", "hours"} - пачка заголовков, ответ - список по каждому
+    """
+    index = shared_index()
+    if request.method == "POST":
+        body = request.get_json(silent=True) or {}
+        titles = body.get('titles') or []
+        if not isinstance(titles, list) or not titles:
+            return "Нужен непустой список titles", 400
+        k, hours, error = related_window(body.get('k', 10), body.get('hours', 21 * 24))
+        if error:
+            return error, 400
+        matches = index.search(titles, k=k, since_hours=hours)
+        records = index.archive.by_ids({record_id for found in matches for record_id, _ in found})
+        return jsonify([[dict(records[record_id], score=round(score, 4)) for record_id, score in found
+                         if record_id in records] for found in matches])
+
+    title, record_id = request.args.get('q'), request.args.get('id', type=int)
+    if not title and record_id is None:
+        return "Нужен параметр q или id", 400
+    k, hours, error = related_window(request.args.get('k', 10, type=int),
+                                     request.args.get('hours', 21 * 24, type=float))
+    if error:
+        return error, 400
+    result = index.related(title=title, record_id=record_id, k=k, since_hours=hours,
+                           other_sources=request.args.get('all_sources') != '1')
+    if result is None:
+        return "Запись не найдена", 404
+    return jsonify(result)
+
+@app.route("/stats/series")
+def stats_series():
+    """
+    Число публикаций по часам или дням из сводок архива:
+    ?granularity=hour|day&hours=&source=&tag=&group=source|tag (ряды выровнены по start + i * step)
+    """
+    granularity = request.args.get('granularity', 'hour')
+    group = request.args.get('group', 'source')
+    if granularity not in ('hour', 'day') or group not in ('source', 'tag'):
+        return "granularity: hour|day, group: source|tag", 400
+    return jsonify(news_archive.series(
+        granularity=granularity,
+        since_hours=request.args.get('hours', type=int),
+        source=request.args.get('source'),
+        tag=request.args.get('tag'),
+        group=group,
+    ))
+
+# Координатор распределённого сбора: рабочие (python -m newsparser.worker --queue http://host:5000)
+# берут задания через /queue/lease и отправляют записи в общий архив.
+# Для рабочих с других машин: NEWSPARSER_QUEUE_TOKEN=... python server.py --coordinator --host 0.0.0.0
+job_queue = SQLiteQueue()
+# Сервер слушает не только loopback: токен нужен всем маршрутам, кроме статики (выставляется в __main__)
+TOKEN_EVERYWHERE = False
+# Cookie с токеном для веб-интерфейса: браузер открывает /?token=..., дальше запросы страницы идут с cookie
+TOKEN_COOKIE = "newsparser_token"
+
+def queue_authorized():
+    if not QUEUE_TOKEN:
+        return True
+    return QUEUE_TOKEN in (request.headers.get('X-Queue-Token'), request.cookies.get(TOKEN_COOKIE))
+
+@app.before_request
+def check_queue_token():
+    if request.path.startswith('/static/'):
+        return None
+    if not (TOKEN_EVERYWHERE or request.path.startswith('/queue/')):
+        return None
+    if request.path == '/' and QUEUE_TOKEN and request.args.get('token') == QUEUE_TOKEN:
+        return None
+    if not queue_authorized():
+        return "Неверный X-Queue-Token", 403
+
+@app.after_request
+def remember_token(response):
+    """Открытие /?token=... запоминает токен в cookie для запросов веб-интерфейса"""
+    if request.path == '/' and QUEUE_TOKEN and request.args.get('token') == QUEUE_TOKEN:
+        response.set_cookie(TOKEN_COOKIE, QUEUE_TOKEN, httponly=True, samesite='Strict')
+    return response
+
+@app.route("/queue/jobs", methods=["POST"])
+def queue_enqueue():
+    """Постановка заданий: {"source" | "sources": [...] | "sources": "all", "params": {limit, since, from, to, timeout}}"""
+    body = request.get_json(silent=True) or {}
+    if not isinstance(body, dict):
+        return jsonify({"error": "Нужен JSON-объект"}), 400
+    sources = body.get('sources') or [body.get('source')]
+    if sources == "all":
+        sources = list(SCRIPTS)
+    elif isinstance(sources, str):
+        sources = [sources]
+    if not isinstance(sources, list) or not all(isinstance(name, str) for name in sources):
+        return jsonify({"error": "sources: имя источника, список имён или \"all\""}), 400
+    unknown = [name for name in sources if name not in SCRIPTS]
+    if unknown:
+        return jsonify({"error": f"Неизвестные источники: {unknown}"}), 400
+    params = body.get('params') or {}
+    limit = params.get('limit') if isinstance(params, dict) else None
+    if not isinstance(params, dict) or limit is not None and (not isinstance(limit, int) or limit < 1):
+        return jsonify({"error": "params: объект; params.limit - целое не меньше 1"}), 400
+    max_attempts = body.get('max_attempts', 3)
+    if isinstance(max_attempts, bool) or not isinstance(max_attempts, int) or max_attempts < 1:
+        return jsonify({"error": "max_attempts: целое не меньше 1"}), 400
+    ids = [job_queue.enqueue(source, params, max_attempts) for source in sources]
+    return jsonify({"ids": ids}), 201
+
+@app.route("/queue/jobs")
+def queue_jobs():
+    """Задания очереди ?status=queued|leased|done|failed&limit="""
+    return jsonify(job_queue.jobs(status=request.args.get('status'), limit=limit_arg(100)))
+
+@app.route("/queue/workers")
+def queue_workers():
+    return jsonify(job_queue.workers())
+
+@app.route("/queue/lease", methods=["POST"])
+def queue_lease():
+    """Следующее задание рабочему; 204 - очередь пуста"""
+    body = request.get_json(silent=True) or {}
+    if not body.get('worker'):
+        return "Не указан worker", 400
+    job = job_queue.lease(body['worker'], body.get('lease_seconds', 120))
+    return (jsonify(job), 200) if job else ("", 204)
+
+def owned_job_call(method, job_id, *args, **kwargs):
+    """Вызов очереди от имени рабочего-арендатора; 409 - аренда потеряна"""
+    body = request.get_json(silent=True) or {}
+    if not body.get('worker'):
+        return None, ("Не указан worker", 400)
+    try:
+        return method(job_id, body['worker'], *args, **kwargs), None
+    except LeaseLost as e:
+        return None, (str(e), 409)
+
+@app.route("/queue/jobs/<int:job_id>/heartbeat", methods=["POST"])
+def queue_heartbeat(job_id):
+    body = request.get_json(silent=True) or {}
+    _, error = owned_job_call(job_queue.heartbeat, job_id, body.get('lease_seconds', 120), progress=body.get('progress'))
+    return error or jsonify({"ok": True})
+
+@app.route("/queue/jobs/<int:job_id>/records", methods=["POST"])
+def queue_records(job_id):
+    body = request.get_json(silent=True) or {}
+    stored, error = owned_job_call(job_queue.push_records, job_id, body.get('records') or [])
+    return error or jsonify({"stored": stored})
+
+@app.route("/queue/jobs/<int:job_id>/complete", methods=["POST"])
+def queue_complete(job_id):
+    body = request.get_json(silent=True) or {}
+    _, error = owned_job_call(job_queue.complete, job_id, body.get('result'))
+    return error or jsonify({"ok": True})
+
+@app.route("/queue/jobs/<int:job_id>/fail", methods=["POST"])
+def queue_fail(job_id):
+    body = request.get_json(silent=True) or {}
+    _, error = owned_job_call(job_queue.fail, job_id, body.get('error', ''), retry=body.get('retry', True))
+    return error or jsonify({"ok": True})
+
+def is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
 
 if __name__ == "__main__":
-    app.run(debug=True, threaded=True, port=5000)
+    parser = argparse.ArgumentParser(description="Веб-интерфейс парсеров и координатор очереди заданий")
+    parser.add_argument("--coordinator", action="store_true",
+                        help="Режим координатора для рабочих на других машинах: без отладчика Werkzeug")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="Адрес прослушивания (0.0.0.0 - все интерфейсы; нужен NEWSPARSER_QUEUE_TOKEN, "
+                             "он требуется всеми маршрутами: X-Queue-Token или веб-интерфейс по /?token=...)")
+    parser.add_argument("--port", type=int, default=5000)
+    args = parser.parse_args()
+
+    external = not is_loopback(args.host)
+    if external and not QUEUE_TOKEN:
+        parser.error("вне loopback сервер был бы открыт всем: задайте NEWSPARSER_QUEUE_TOKEN")
+    # Из сети доступны запуск парсеров (/run-script-stream), архив и поиск - не только очередь
+    TOKEN_EVERYWHERE = external
+    # Отладчик Werkzeug выполняет код из браузера - только для локального запуска разработчика
+    debug = not (args.coordinator or external)
+    app.run(host=args.host, port=args.port, debug=debug, threaded=True)
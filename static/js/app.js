@@ -0,0 +1,73 @@
+let eventSource = null;
+let clickedCard = null;
+
+async function runScript(scriptName) {
+    const output  = document.getElementById('output');
+    const status  = document.getElementById('status');
+    const spinner = document.getElementById('spinner');
+    const stopBtn = document.getElementById('stopBtn');
+    const cards   = document.querySelectorAll('.script-card');
+
+    clickedCard = [...cards].find(card => card.onclick.toString().includes(scriptName));
+
+    cards.forEach(card => {
+        if (card === clickedCard) {
+            card.style.pointerEvents = 'none';
+            card.style.opacity = '0.6';
+        } else {
+            card.style.display = 'none';
+        }
+    });
+
+    output.textContent = '';
+    status.textContent = '';
+    status.className   = 'status';
+    spinner.style.display = 'block';
+    stopBtn.style.display = 'inline-block';
+
+    if (eventSource) eventSource.close();
+
+    eventSource = new EventSource(`/run-script-stream?name=${scriptName}`);
+
+    // Собранные новости приходят отдельными событиями и сразу попадают в список результатов
+    eventSource.addEventListener('record', function (event) {
+        NewsResults.add(JSON.parse(event.data));
+    });
+
+    eventSource.onmessage = function (event) {
+        if (event.data === "[Завершено]") {
+            finishScript("Скрипт выполнен успешно", "success");
+            return;
+        }
+        output.textContent += event.data + "\n";
+        output.scrollTop = output.scrollHeight;
+    };
+
+    eventSource.onerror = function () {
+        finishScript("Ошибка выполнения или соединение закрыто", "error");
+    };
+
+    stopBtn.onclick = function () {
+        if (eventSource) {
+            eventSource.close();
+            eventSource = null;
+            finishScript("Выполнение остановлено пользователем", "error");
+        }
+    };
+
+    function finishScript(message, className) {
+        status.textContent = message;
+        status.className   = 'status ' + className;
+        spinner.style.display = 'none';
+        stopBtn.style.display = 'none';
+        if (eventSource) {
+            eventSource.close();
+            eventSource = null;
+        }
+        cards.forEach(card => {
+            card.style.pointerEvents = 'auto';
+            card.style.opacity = '1';
+            card.style.display = 'block';
+        });
+    }
+}
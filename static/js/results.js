@@ -0,0 +1,177 @@
+// Список новостей: страницы архива из /news/page, новые записи из SSE-событий record.
+// Виртуальная прокрутка: в DOM только видимые строки (пул переиспользуемых элементов),
+// поэтому тысячи заголовков не замедляют страницу. Фильтры по источнику и периоду - на клиенте.
+
+const NewsResults = (function () {
+    const ROW_HEIGHT = 52;
+    const OVERSCAN = 8;
+    const PERIODS = { "1": 3600e3, "6": 6 * 3600e3, "24": 24 * 3600e3, "168": 7 * 24 * 3600e3 };
+
+    let items = [];          // все загруженные записи, новые сверху
+    let view = [];           // индексы items после фильтров
+    const seen = new Set();  // ссылки (или заголовки) уже показанных записей
+    const sources = new Set();
+    let nextBefore = null;
+    let exhausted = false;
+    let loading = false;
+    let scheduled = false;
+
+    let viewport, spacer, countEl, sourceSelect, periodSelect, emptyEl;
+    const pool = [];
+
+    function normalize(raw, fresh) {
+        // Запись архива (id, date_raw, collected_at) или события record (published_at, raw_date)
+        const time = Date.parse(raw.published_at || raw.collected_at || "") || (fresh ? Date.now() : 0);
+        return {
+            key: raw.url || raw.title,
+            source: raw.source || "",
+            title: raw.title || "",
+            url: raw.url || "",
+            date: raw.raw_date || raw.date_raw || "",
+            time: time,
+            tags: raw.tags || [],
+            fresh: fresh,
+        };
+    }
+
+    function addSource(source) {
+        if (!source || sources.has(source)) return;
+        sources.add(source);
+        const option = document.createElement("option");
+        option.value = source;
+        option.textContent = source;
+        const options = [...sourceSelect.options].slice(1);
+        const before = options.find(o => o.value.localeCompare(source) > 0) || null;
+        sourceSelect.insertBefore(option, before);
+    }
+
+    function matches(item, source, since) {
+        return (!source || item.source === source) && (!since || item.time >= since);
+    }
+
+    function currentFilters() {
+        const period = PERIODS[periodSelect.value];
+        return [sourceSelect.value, period ? Date.now() - period : 0];
+    }
+
+    function applyFilters() {
+        const [source, since] = currentFilters();
+        view = [];
+        for (let i = 0; i < items.length; i++) {
+            if (matches(items[i], source, since)) view.push(i);
+        }
+        viewport.scrollTop = 0;
+        schedule();
+    }
+
+    function schedule() {
+        if (scheduled) return;
+        scheduled = true;
+        requestAnimationFrame(render);
+    }
+
+    function rowElement(index) {
+        let row = pool[index];
+        if (!row) {
+            row = document.createElement("div");
+            row.className = "results-row";
+            row.innerHTML = '<a class="results-title" target="_blank" rel="noopener"></a><div class="results-meta"></div>';
+            viewport.appendChild(row);
+            pool[index] = row;
+        }
+        return row;
+    }
+
+    function render() {
+        scheduled = false;
+        spacer.style.height = (view.length * ROW_HEIGHT) + "px";
+        countEl.textContent = `${view.length} из ${items.length}` + (exhausted ? "" : "+");
+        emptyEl.style.display = view.length || loading ? "none" : "block";
+
+        const first = Math.max(0, Math.floor(viewport.scrollTop / ROW_HEIGHT) - OVERSCAN);
+        const last = Math.min(view.length, Math.ceil((viewport.scrollTop + viewport.clientHeight) / ROW_HEIGHT) + OVERSCAN);
+
+        let used = 0;
+        for (let position = first; position < last; position++, used++) {
+            const item = items[view[position]];
+            const row = rowElement(used);
+            const link = row.firstChild;
+            row.style.display = "";
+            row.style.transform = `translateY(${position * ROW_HEIGHT}px)`;
+            row.classList.toggle("fresh", item.fresh);
+            link.textContent = item.title;
+            link.title = item.title;
+            if (item.url.startsWith("http")) link.href = item.url; else link.removeAttribute("href");
+            row.lastChild.textContent = [item.source, item.date, item.tags.join(", ")].filter(Boolean).join(" · ");
+        }
+        for (let i = used; i < pool.length; i++) pool[i].style.display = "none";
+
+        // Прокрутили к концу загруженного - подгружаем следующую страницу архива
+        if (!exhausted && !loading && viewport.scrollTop + viewport.clientHeight >= view.length * ROW_HEIGHT - ROW_HEIGHT * OVERSCAN) {
+            loadPage();
+        }
+    }
+
+    async function loadPage() {
+        loading = true;
+        try {
+            const url = nextBefore ? `/news/page?before=${nextBefore}` : "/news/page";
+            const response = await fetch(url);
+            if (!response.ok) throw new Error(response.status);
+            const page = await response.json();
+            const [source, since] = currentFilters();
+            for (const raw of page.items) {
+                const item = normalize(raw, false);
+                if (seen.has(item.key)) continue;
+                seen.add(item.key);
+                addSource(item.source);
+                items.push(item);
+                if (matches(item, source, since)) view.push(items.length - 1);
+            }
+            nextBefore = page.next;
+            exhausted = !page.next;
+        } catch (e) {
+            exhausted = true;
+            console.warn("Не удалось загрузить архив новостей", e);
+        } finally {
+            loading = false;
+            schedule();
+        }
+    }
+
+    function add(raw) {
+        // Новая запись из SSE: вставляется сверху, позиция прокрутки сохраняется
+        const item = normalize(raw, true);
+        if (seen.has(item.key)) return;
+        seen.add(item.key);
+        addSource(item.source);
+        items.unshift(item);
+        const [source, since] = currentFilters();
+        const visible = matches(item, source, since);
+        view = view.map(i => i + 1);
+        if (visible) {
+            view.unshift(0);
+            if (viewport.scrollTop > 0) viewport.scrollTop += ROW_HEIGHT;
+        }
+        schedule();
+    }
+
+    function init() {
+        viewport = document.getElementById("results-viewport");
+        spacer = document.getElementById("results-spacer");
+        countEl = document.getElementById("results-count");
+        sourceSelect = document.getElementById("filter-source");
+        periodSelect = document.getElementById("filter-period");
+        emptyEl = document.getElementById("results-empty");
+
+        viewport.addEventListener("scroll", schedule, { passive: true });
+        window.addEventListener("resize", schedule);
+        sourceSelect.addEventListener("change", applyFilters);
+        periodSelect.addEventListener("change", applyFilters);
+        loadPage();
+    }
+
+    return { init: init, add: add };
+})();
+
+document.addEventListener("DOMContentLoaded", NewsResults.init);
@@ -0,0 +1,97 @@
+from datetime import datetime
+
+import pytest
+
+from newsparser import dedup
+from newsparser.archive import NewsArchive
+
+SAME_STORY = [
+    "Центробанк сохранил ключевую ставку на уровне 16 процентов",
+    "ЦБ сохранил ключевую ставку на уровне 16 процентов годовых",
+]
+OTHER_STORY = "В Москве открылась выставка современного искусства"
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return NewsArchive(str(tmp_path / "archive.sqlite3"))
+
+
+def test_minhash_estimates_title_similarity():
+    close = dedup.similarity(dedup.minhash(SAME_STORY[0]), dedup.minhash(SAME_STORY[1]))
+    far = dedup.similarity(dedup.minhash(SAME_STORY[0]), dedup.minhash(OTHER_STORY))
+    assert close >= dedup.SIMILARITY_THRESHOLD > far
+    # Регистр, ё и знаки препинания на сигнатуру не влияют
+    assert dedup.minhash("Ещё один рекорд!") == dedup.minhash("еще  ОДИН рекорд")
+
+
+def test_similar_titles_from_other_sources_join_one_story(archive):
+    first = archive.ingest("TASS_news", {"name": [SAME_STORY[0], OTHER_STORY],
+                                         "link": ["https://tass.ru/1", "https://tass.ru/2"],
+                                         "tags": [["finance"], []]})
+    second = archive.ingest("RGru_news", {"name": [SAME_STORY[1]], "link": ["https://rg.ru/1"],
+                                          "tags": [["cbr"]]})
+
+    assert second == [first[0]]
+    assert first[1] != first[0]
+    stories = {story["cluster_id"]: story for story in archive.stories()}
+    story = stories[first[0]]
+    assert story["count"] == 2
+    assert story["title"] == SAME_STORY[0]
+    assert story["links"] == ["https://tass.ru/1", "https://rg.ru/1"]
+    assert story["tags"] == ["cbr", "finance"]
+    assert sorted(story["sources"].split(",")) == ["RGru_news", "TASS_news"]
+    assert [story["cluster_id"] for story in archive.stories(tag="cbr")] == [first[0]]
+
+
+def test_known_url_returns_its_story_without_new_record(archive):
+    cluster = archive.ingest("TASS_news", {"name": [OTHER_STORY], "link": ["https://tass.ru/2?utm_source=tg"]})
+    # Та же новость без метки рассылки: ссылка приводится к канонической форме
+    again = archive.ingest("TASS_news", {"name": ["Заголовок изменён"], "link": ["https://TASS.ru/2#top"]})
+
+    assert again == cluster
+    assert len(archive.records()) == 1
+
+
+def test_rollups_count_by_publication_date(archive):
+    archive.ingest("TASS_news", {"name": [SAME_STORY[0], OTHER_STORY],
+                                 "date": ["02-01-2020 10:15", "02-01-2020 10:45"],
+                                 "tags": [["finance"], []]})
+    archive.ingest("RGru_news", {"name": ["Новость без даты"], "date": ["не дата"],
+                                 "published_at": [datetime(2020, 1, 2, 11, 5)], "tags": [["finance"]]})
+
+    conn = archive.connect()
+    try:
+        rollups = {(row["granularity"], row["tag"], row["bucket"], row["source"]): row["count"]
+                   for row in conn.execute("SELECT * FROM rollups")}
+    finally:
+        conn.close()
+    assert rollups[("hour", "", "2020-01-02T10", "TASS_news")] == 2
+    assert rollups[("hour", "finance", "2020-01-02T10", "TASS_news")] == 1
+    # Дата, распознанная конвейером, важнее текста date
+    assert rollups[("hour", "", "2020-01-02T11", "RGru_news")] == 1
+    assert rollups[("day", "finance", "2020-01-02", "RGru_news")] == 1
+
+    # Пересчёт по записям даёт те же сводки
+    archive.rebuild_rollups()
+    conn = archive.connect()
+    try:
+        rebuilt = {(row["granularity"], row["tag"], row["bucket"], row["source"]): row["count"]
+                   for row in conn.execute("SELECT * FROM rollups")}
+    finally:
+        conn.close()
+    assert rebuilt == rollups
+
+
+def test_series_is_dense_and_grouped_by_tag(archive):
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+    archive.ingest("TASS_news", {"name": [SAME_STORY[0], OTHER_STORY], "published_at": [now, now],
+                                 "tags": [["finance"], ["culture"]]})
+
+    by_source = archive.series("hour", since_hours=3)
+    assert by_source["buckets"] == 4
+    assert by_source["series"]["TASS_news"] == [0, 0, 0, 2]
+    by_tag = archive.series("day", since_hours=48, group="tag")
+    assert by_tag["totals"] == {"finance": 1, "culture": 1}
+    with pytest.raises(ValueError):
+        archive.series("week")
@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from newsparser import pipeline, workqueue
+from newsparser.checkpoint import Checkpoint
+from newsparser.pipeline import Pipeline, Stage, Transform, news_pipeline
+from newsparser.records import NewsRecord
+
+
+class Recorder(Stage):
+    """Стадия, которая отмечает порядок обработки записей и вызова finish()"""
+
+    def __init__(self, name, log, batch_size=1):
+        self.name = name
+        self.log = log
+        self.batch_size = batch_size
+
+    def process_one(self, record):
+        self.log.append((self.name, record.title))
+        return record
+
+    def process_batch(self, batch):
+        self.log.append((self.name, [record.title for record in batch]))
+        return batch
+
+    def finish(self):
+        self.log.append((self.name, "finish"))
+
+
+class Alerts:
+    def stream(self, records):
+        return records
+
+
+@pytest.fixture
+def checkpoint(tmp_path):
+    checkpoint = Checkpoint("SITE_news", root=str(tmp_path))
+    yield checkpoint
+    checkpoint.close()
+
+
+@pytest.fixture(autouse=True)
+def no_tagger(monkeypatch):
+    monkeypatch.setattr(pipeline, "load_tagger", lambda: None)
+
+
+def news(*titles):
+    return [NewsRecord("SITE_news", title, f"https://site.ru/{title}") for title in titles]
+
+
+def test_standard_stage_order(checkpoint, monkeypatch):
+    monkeypatch.delenv(workqueue.WORKER_MODE_ENV, raising=False)
+    extra = Stage()
+    stages = news_pipeline(None, checkpoint, "out.xlsx", alerts=Alerts(), extra_stages=[extra]).stages
+
+    assert [stage.name for stage in stages] == [
+        "checkpoint", "canonicalize", "dates", "dedup", "alerts", "tagging", "stage", "archive",
+        "announce", "diff", "save"]
+    assert stages[6] is extra
+
+
+def test_worker_mode_leaves_storage_to_the_coordinator(checkpoint, monkeypatch):
+    monkeypatch.setenv(workqueue.WORKER_MODE_ENV, "1")
+    stages = news_pipeline(None, checkpoint, "out.xlsx", alerts=Alerts()).stages
+
+    assert [stage.name for stage in stages] == [
+        "checkpoint", "canonicalize", "dates", "dedup", "tagging", "announce"]
+
+
+def test_records_pass_stages_in_order_and_sinks_finish_last():
+    log = []
+    stages = [Recorder("a", log), Recorder("b", log, batch_size=2), Recorder("c", log)]
+    assert Pipeline(stages).run(news("1", "2", "3")) == 3
+
+    assert log == [
+        ("a", "1"), ("a", "2"), ("b", ["1", "2"]), ("c", "1"), ("c", "2"),
+        ("a", "3"), ("b", ["3"]), ("c", "3"),
+        ("a", "finish"), ("b", "finish"), ("c", "finish"),
+    ]
+
+
+def test_failed_stream_skips_finish():
+    log = []
+
+    def broken(records):
+        yield from records
+        raise RuntimeError("сбой источника")
+
+    with pytest.raises(RuntimeError):
+        Pipeline([Transform("broken", broken), Recorder("sink", log)]).run(news("1"))
+    assert log == [("sink", "1")]
+
+
+def test_preparation_stages(checkpoint):
+    records = news("a", "b") + [NewsRecord("SITE_news", "a", "https://SITE.ru/a?utm_source=tg"),
+                                NewsRecord("SITE_news", "Из будущего", None,
+                                           published_at=datetime.now() + timedelta(days=3))]
+    stages = news_pipeline(None, checkpoint, "out.xlsx").stages[:4]
+    result = list(Pipeline(stages).stream(records))
+
+    # Ссылка с меткой рассылки - повтор после канонизации; дата из будущего сбрасывается
+    assert [record.title for record in result] == ["a", "b", "Из будущего"]
+    assert result[2].published_at is None
+
+
+def test_interrupted_stream_still_finishes_sinks(checkpoint):
+    log = []
+
+    def interrupted():
+        yield from news("1", "2")
+        raise KeyboardInterrupt
+
+    pipe = Pipeline([Transform("checkpoint", checkpoint.stream), Recorder("sink", log)])
+    assert pipe.run(interrupted()) == 2
+    assert log[-1] == ("sink", "finish")
+    assert checkpoint.partial
+    with pytest.raises(KeyboardInterrupt):
+        checkpoint.complete()
@@ -0,0 +1,74 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from newsparser import ratelimit
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RATE = 5.0
+BURST = 2
+
+# Парсер в отдельном процессе: берёт токены и печатает время каждого разрешения
+ACQUIRING_PROCESS = """
+import sys, time
+from newsparser import ratelimit
+ratelimit.STATE_DIR = sys.argv[1]
+for _ in range(int(sys.argv[2])):
+    ratelimit.acquire("https://www.example.test/news")
+    print(time.time(), flush=True)
+"""
+
+
+@pytest.fixture
+def limits(tmp_path, monkeypatch):
+    path = tmp_path / "ratelimits.json"
+    path.write_text(json.dumps({"example.test": {"rate": RATE, "burst": BURST}}), encoding="utf-8")
+    state_dir = str(tmp_path / "state")
+    monkeypatch.setattr(ratelimit, "STATE_DIR", state_dir)
+    monkeypatch.setattr(ratelimit, "LIMITS_PATH", str(path))
+    monkeypatch.setattr(ratelimit, "ENABLED", True)
+    monkeypatch.setattr(ratelimit, "_limits", None)
+    monkeypatch.setenv("NEWSPARSER_RATELIMITS", str(path))
+    monkeypatch.delenv("NEWSPARSER_RATELIMIT", raising=False)
+    return state_dir
+
+
+def start_process(state_dir, count):
+    return subprocess.Popen([sys.executable, "-c", ACQUIRING_PROCESS, state_dir, str(count)],
+                            cwd=PROJECT_DIR, stdout=subprocess.PIPE, text=True)
+
+
+def test_budget_uses_the_nearest_parent_domain(limits):
+    assert ratelimit.domain_of("https://www.Example.test:8080/a") == "example.test"
+    assert ratelimit.budget("news.example.test") == (RATE, BURST)
+    assert ratelimit.budget("unknown.test") == (ratelimit.DEFAULT_RATE, ratelimit.DEFAULT_BURST)
+
+
+def test_bucket_is_shared_between_processes(limits):
+    processes = [start_process(limits, 4) for _ in range(3)]
+    stamps = []
+    for process in processes:
+        out, _ = process.communicate(timeout=30)
+        assert process.returncode == 0
+        stamps += [float(line) for line in out.split()]
+
+    stamps.sort()
+    assert len(stamps) == 12
+    # В любом окне не больше пачки и токенов, накопленных за это окно (ведро общее на все процессы)
+    for i in range(len(stamps)):
+        for j in range(i + 1, len(stamps)):
+            assert j - i + 1 <= BURST + RATE * (stamps[j] - stamps[i]) + 1
+    assert stamps[-1] - stamps[0] >= (len(stamps) - BURST - 1) / RATE - 0.1
+
+
+def test_penalty_pauses_other_processes(limits):
+    ratelimit.penalize("https://example.test/", retry_after="1")
+    started = time.time()
+    process = start_process(limits, 1)
+    out, _ = process.communicate(timeout=30)
+    assert float(out.split()[0]) - started >= 0.8
@@ -0,0 +1,60 @@
+from datetime import datetime
+
+import pytest
+
+from newsparser import records
+from newsparser.records import NewsRecord, canonical_url, news_limit, parse_date, parse_record_line
+
+NOW = datetime(2024, 1, 10, 15, 30)
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("https://TASS.ru/ekonomika/1?utm_source=tg&utm_medium=social", "https://tass.ru/ekonomika/1"),
+    ("https://ria.ru/a?id=5&fbclid=abc#comments", "https://ria.ru/a?id=5"),
+    # Параметры содержимого остаются, в том числе с похожими на метки именами
+    ("https://rg.ru/search?from=main&page=2", "https://rg.ru/search?from=main&page=2"),
+    ("https://www.interfax.ru", "https://www.interfax.ru/"),
+    ("Ссылка не найдена", "Ссылка не найдена"),
+    (None, None),
+])
+def test_canonical_url(url, expected):
+    assert canonical_url(url) == expected
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("15-05-2024 12:30", datetime(2024, 5, 15, 12, 30)),
+    ("15.05.2024, 12:30", datetime(2024, 5, 15, 12, 30)),
+    ("2024-05-15T12:30", datetime(2024, 5, 15, 12, 30)),
+    ("12:05", datetime(2024, 1, 10, 12, 5)),
+    ("Вчера, 23:40", datetime(2024, 1, 9, 23, 40)),
+    ("3 января, 09:15", datetime(2024, 1, 3, 9, 15)),
+    ("3 июня 2023 09:05", datetime(2023, 6, 3, 9, 5)),
+    # Без года «31 декабря» в январе - прошлый год
+    ("31 декабря, 18:00", datetime(2023, 12, 31, 18, 0)),
+    ("5 февраля", datetime(2023, 2, 5, 0, 0)),
+])
+def test_parse_date(raw, expected):
+    assert parse_date(raw, now=NOW) == expected
+
+
+@pytest.mark.parametrize("raw", [None, "", "недавно", "25:61", "31 февраля, 10:00", 1700000000])
+def test_parse_date_rejects_unknown_text(raw):
+    assert parse_date(raw, now=NOW) is None
+
+
+def test_news_limit(monkeypatch):
+    monkeypatch.delenv(records.LIMIT_ENV, raising=False)
+    assert news_limit(50) == 50
+    monkeypatch.setenv(records.LIMIT_ENV, "10")
+    assert news_limit(50) == 10 and news_limit() == 10
+    monkeypatch.setenv(records.LIMIT_ENV, "0")
+    assert news_limit(50) == 50
+
+
+def test_record_line_round_trip():
+    record = NewsRecord("TASS_news", "Заголовок", "https://tass.ru/1", "15-05-2024 12:30")
+    line = records.RECORD_MARKER + '{"source": "TASS_news", "published_at": "2024-05-15T12:30"}'
+    assert record.to_dict()["published_at"] == "2024-05-15T12:30"
+    assert parse_record_line(line) == {"source": "TASS_news", "published_at": "2024-05-15T12:30"}
+    assert parse_record_line(records.RECORD_MARKER + "{обрезано") is None
+    assert parse_record_line("[INFO] текст") is None
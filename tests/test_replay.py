@@ -0,0 +1,105 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from newsparser import ratelimit, replay
+
+NEWS_HTML = "".join(f'<a class="item" href="/news/{i}">Новость номер {i} о событиях в экономике</a>'
+                    for i in range(10))
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith("/api/counters"):
+            # Самый частый XHR страницы - счётчики просмотров, новостей в ответе нет
+            body = json.dumps({"views": 10}).encode("utf-8")
+        elif self.path.startswith("/news/more") or self.path == "/":
+            body = NEWS_HTML.encode("utf-8")
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeDriver:
+    def __init__(self, urls, current_url):
+        self.urls = urls
+        self.current_url = current_url
+
+    def get_log(self, kind):
+        return [{"message": json.dumps({"message": {
+            "method": "Network.requestWillBeSent",
+            "params": {"type": "XHR", "request": {"method": "GET", "url": url}},
+        }})} for url in self.urls]
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    monkeypatch.setattr(replay, "ENDPOINTS_PATH", str(tmp_path / "endpoints.json"))
+    monkeypatch.setattr(ratelimit, "ENABLED", False)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def test_learn_skips_candidates_without_news(site):
+    urls = [f"{site}/api/counters?t={i}" for i in range(5)] + [f"{site}/news/more?page={i}" for i in (2, 3)]
+    pattern = replay.learn(FakeDriver(urls, site + "/"), "SITE_news", link_class="item")
+
+    assert pattern["template"] == f"{site}/news/more?page={{page}}"
+    assert f"{site}/api/counters?t={{page}}" in pattern["rejected"]
+
+
+def test_rejected_pattern_is_not_relearned(site):
+    urls = [f"{site}/news/more?page={i}" for i in (2, 3)]
+    driver = FakeDriver(urls, site + "/")
+    assert replay.learn(driver, "SITE_news", link_class="item") is not None
+
+    # Эндпоинт перестал отвечать: шаблон отвергнут и при следующем изучении не выбирается
+    replay.forget("SITE_news")
+    assert replay.fetch_news("SITE_news", site + "/", 10) is None
+    assert replay.learn(driver, "SITE_news", link_class="item") is None
+    assert "template" not in replay.load_endpoints()["SITE_news"]
+
+
+def test_first_page_within_limit_keeps_the_endpoint(site):
+    urls = [f"{site}/news/more?page={i}" for i in (2, 3)]
+    pattern = replay.learn(FakeDriver(urls, site + "/"), "SITE_news", link_class="item")
+
+    # Первая страница уже даёт limit записей: к эндпоинту не обращались, и он не отвергается
+    news = replay.fetch_news("SITE_news", site + "/", 5)
+    assert len(news) == 5
+    entry = replay.load_endpoints()["SITE_news"]
+    assert entry["template"] == pattern["template"]
+    assert not entry.get("rejected")
+
+
+def test_network_error_does_not_reject_the_endpoint(site):
+    urls = [f"{site}/news/more?page={i}" for i in (2, 3)]
+    replay.learn(FakeDriver(urls, site + "/"), "SITE_news", link_class="item")
+
+    # Сайт недоступен (закрытый порт): эндпоинт сбрасывается, но остаётся доступным для изучения
+    assert replay.fetch_news("SITE_news", "http://127.0.0.1:9/", 50) is None
+    assert "SITE_news" not in replay.load_endpoints()
+    assert replay.learn(FakeDriver(urls, site + "/"), "SITE_news", link_class="item") is not None
+
+
+def test_links_are_matched_by_the_selector_the_locator_chose():
+    html = ('<a class="tass_pkg_link-AbC12" href="/ekonomika/1">Курс рубля</a>'
+            '<a class="tass_pkg_link-AbC12" href="/sport/2">Матч</a>'
+            '<a class="other" href="/ekonomika/3">Ставка</a>')
+    selector = ("css selector", "a[href^='/ekonomika/'][class*='tass_pkg_link-']")
+    records = replay.extract_records(html, "https://tass.ru/ekonomika", link_selector=selector)
+    assert [link for _, link, _ in records] == ["https://tass.ru/ekonomika/1"]
+    # Прежний класс со старым хэшем сборки в новой вёрстке ничего не находит
+    assert replay.extract_records(html, "https://tass.ru/ekonomika", link_class="tass_pkg_link-v5WdK") == []
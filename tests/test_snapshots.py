@@ -0,0 +1,73 @@
+import pytest
+
+from newsparser import snapshots
+from newsparser.records import NewsRecord
+from newsparser.snapshots import NEW, REMOVED, RETITLED, SnapshotStore
+
+
+def listing(*items):
+    return [NewsRecord("SITE_news", title, f"https://site.ru/news/{number}") for number, title in items]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SnapshotStore(str(tmp_path / "snapshots.sqlite3"))
+
+
+def kinds(changes):
+    return sorted((change["kind"], change["url"]) for change in changes)
+
+
+def test_first_run_is_only_a_baseline(store):
+    assert store.diff("SITE_news", listing((1, "Первая"), (2, "Вторая"))) == []
+    assert store.latest("SITE_news")[0]["total"] == 2
+
+
+def test_new_removed_and_retitled(store):
+    store.diff("SITE_news", listing((1, "Первая"), (2, "Вторая"), (3, "Третья"), (4, "Четвёртая")))
+
+    changes = store.diff("SITE_news", listing((5, "Свежая"), (1, "Первая (обновлено)"), (3, "Третья"),
+                                              (4, "четвёртая ")))
+    assert kinds(changes) == [
+        (NEW, "https://site.ru/news/5"),
+        (REMOVED, "https://site.ru/news/2"),
+        (RETITLED, "https://site.ru/news/1"),
+    ]
+    run = store.latest("SITE_news")[0]
+    assert (run["new"], run["removed"], run["retitled"]) == (1, 1, 1)
+    assert kinds(run["changes"]) == kinds(changes)
+
+    # Снимок обновлён: тот же список во второй раз изменений не даёт
+    assert store.diff("SITE_news", listing((5, "Свежая"), (1, "Первая (обновлено)"), (3, "Третья"),
+                                           (4, "Четвёртая"))) == []
+
+
+def test_items_below_the_last_kept_one_are_not_removed(store):
+    store.diff("SITE_news", listing((1, "Первая"), (2, "Вторая"), (3, "Третья")))
+    # Новые сверху вытеснили хвост за пределы первых N - это не снятие
+    changes = store.diff("SITE_news", listing((4, "Четвёртая"), (5, "Пятая"), (1, "Первая")))
+    assert kinds(changes) == [(NEW, "https://site.ru/news/4"), (NEW, "https://site.ru/news/5")]
+
+
+def test_partial_run_does_not_remove(store):
+    store.diff("SITE_news", listing((1, "Первая"), (2, "Вторая"), (3, "Третья")))
+    assert store.diff("SITE_news", listing((1, "Первая")), partial=True) == []
+    # Записи, не попавшие в частичный запуск, остались в снимке
+    assert kinds(store.diff("SITE_news", listing((1, "Первая"), (3, "Третья")))) == [
+        (REMOVED, "https://site.ru/news/2")]
+
+
+def test_tracking_parameters_do_not_make_items_new(store):
+    store.diff("SITE_news", [NewsRecord("SITE_news", "Первая", "https://site.ru/news/1?utm_source=tg")])
+    assert store.diff("SITE_news", [NewsRecord("SITE_news", "Первая", "https://SITE.ru/news/1")]) == []
+
+
+def test_change_lines_round_trip(store, monkeypatch, capsys):
+    monkeypatch.setattr(snapshots, "SnapshotStore", lambda: store)
+    snapshots.diff_records(listing((1, "Первая")))
+    changes = snapshots.diff_records(listing((2, "Вторая"), (1, "Первая")))
+
+    lines = [snapshots.parse_change_line(line) for line in capsys.readouterr().out.splitlines()]
+    assert [line for line in lines if line] == changes
+    assert changes[0]["kind"] == NEW and changes[0]["title"] == "Вторая"
+    assert snapshots.parse_change_line("[INFO] текст") is None
@@ -0,0 +1,66 @@
+import json
+import os
+
+import pytest
+
+from newsparser import assets, tagging
+from newsparser.tagging import Tagger, load_tagger
+
+DICTIONARY = {
+    "Газпром": ["Газпром"],
+    "Роснефть": ["Роснефть"],
+    "Сбербанк": ["Сбербанк", "Сбер", "SBER"],
+    "Нефть": ["нефт*"],
+    "ЦБ": ["Центробанк", "ЦБ"],
+}
+
+
+@pytest.fixture
+def tagger():
+    return Tagger(DICTIONARY)
+
+
+def test_inflected_forms_match(tagger):
+    assert tagger.tags("Акции Газпрома выросли") == ["Газпром"]
+    assert tagger.tags("Сделка с Роснефтью закрыта") == ["Роснефть"]
+    assert tagger.tags("Глава ЦЕНТРОБАНКА выступил") == ["ЦБ"]
+    # Явная основа: любое окончание в пределах MAX_SUFFIX
+    assert tagger.tags("Нефтяные котировки") == []
+    assert tagger.tags("Цены на нефть и нефти") == ["Нефть"]
+
+
+def test_matches_only_on_word_boundaries(tagger):
+    # Короткие шаблоны и латиница ищутся только целым словом
+    assert tagger.tags("Сберкасса открыла отделение") == []
+    assert tagger.tags("Бумаги SBER подорожали") == ["Сбербанк"]
+    assert tagger.tags("Индекс SBERX пересмотрен") == []
+    assert tagger.tags("ЦБР и ЦБ: новые правила") == ["ЦБ"]
+    # Окончание длиннее MAX_SUFFIX - уже другое слово
+    assert tagger.tags("Газпромнефть отчиталась") == []
+
+
+def test_several_tags_sorted_without_duplicates(tagger):
+    title = "Сбер и Сбербанк кредитуют Газпром, ЦБ доволен"
+    assert tagger.tags(title) == ["Газпром", "Сбербанк", "ЦБ"]
+    assert tagger.tags("") == []
+    assert tagger.tags(None) == []
+
+
+def test_compiled_tagger_is_rebuilt_when_dictionary_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(assets, "CACHE_DIR", str(tmp_path / "cache"))
+    path = tmp_path / "tags.json"
+    path.write_text(json.dumps({"Газпром": ["Газпром"]}, ensure_ascii=False), encoding="utf-8")
+
+    assert load_tagger(str(path)).tags("Газпром и Роснефть") == ["Газпром"]
+    assert len(os.listdir(tmp_path / "cache")) == 1
+    # Повторная загрузка - из кэша, результат тот же
+    assert load_tagger(str(path)).tags("Газпром и Роснефть") == ["Газпром"]
+
+    path.write_text(json.dumps({"Роснефть": ["Роснефть"]}, ensure_ascii=False), encoding="utf-8")
+    assert load_tagger(str(path)).tags("Газпром и Роснефть") == ["Роснефть"]
+    assert len(os.listdir(tmp_path / "cache")) == 2
+
+
+def test_missing_dictionary_gives_no_tagger(tmp_path):
+    assert load_tagger(str(tmp_path / "missing.json")) is None
+    assert tagging.normalize("Ёлка") == "елка"
@@ -0,0 +1,80 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from newsparser.workqueue import LeaseLost, SQLiteQueue
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Рабочий в отдельном процессе: берёт задание с короткой арендой и «падает», не продлив её
+CRASHING_WORKER = """
+import sys
+from newsparser.workqueue import SQLiteQueue
+job = SQLiteQueue(sys.argv[1]).lease("worker-a", lease_seconds=float(sys.argv[2]))
+print(job["id"] if job else "")
+"""
+
+
+def lease_in_process(path, lease_seconds):
+    result = subprocess.run([sys.executable, "-c", CRASHING_WORKER, path, str(lease_seconds)],
+                            cwd=PROJECT_DIR, capture_output=True, text=True, check=True)
+    return int(result.stdout.strip())
+
+
+def test_expired_lease_is_redelivered_to_another_worker(tmp_path):
+    path = str(tmp_path / "queue.sqlite3")
+    queue = SQLiteQueue(path)
+    job_id = queue.enqueue("TASS_news", {"limit": 10})
+
+    assert lease_in_process(path, 1) == job_id
+    # Пока аренда действует, задание второму рабочему не выдаётся
+    assert SQLiteQueue(path).lease("worker-b", lease_seconds=30) is None
+
+    time.sleep(1.2)
+    worker_b = SQLiteQueue(path)
+    job = worker_b.lease("worker-b", lease_seconds=30)
+    assert job["id"] == job_id
+    assert job["attempts"] == 2
+    assert job["params"] == {"limit": 10}
+
+    # Первый рабочий «ожил»: его аренда передана, результат не принимается
+    with pytest.raises(LeaseLost):
+        queue.heartbeat(job_id, "worker-a")
+    with pytest.raises(LeaseLost):
+        queue.complete(job_id, "worker-a", {"items": 1})
+
+    worker_b.heartbeat(job_id, "worker-b", lease_seconds=30, progress=50)
+    worker_b.complete(job_id, "worker-b", {"items": 10})
+    done = queue.jobs(status="done")
+    assert [job["id"] for job in done] == [job_id]
+    assert done[0]["worker"] == "worker-b"
+    assert done[0]["result"] == {"items": 10}
+
+
+def test_job_fails_when_attempts_run_out(tmp_path):
+    path = str(tmp_path / "queue.sqlite3")
+    queue = SQLiteQueue(path)
+    job_id = queue.enqueue("RGru_news", max_attempts=1)
+
+    assert lease_in_process(path, 0.5) == job_id
+    time.sleep(0.7)
+    assert SQLiteQueue(path).lease("worker-b") is None
+    failed = queue.jobs(status="failed")
+    assert [job["id"] for job in failed] == [job_id]
+    assert failed[0]["attempts"] == 1
+
+
+def test_failed_attempt_returns_job_to_queue(tmp_path):
+    queue = SQLiteQueue(str(tmp_path / "queue.sqlite3"))
+    job_id = queue.enqueue("PRIME_news", max_attempts=2)
+
+    queue.lease("worker-a")
+    queue.fail(job_id, "worker-a", "Chrome не запустился", retry=True)
+    job = queue.lease("worker-b")
+    assert job["id"] == job_id and job["attempts"] == 2
+    queue.fail(job_id, "worker-b", "Chrome не запустился", retry=True)
+    assert queue.lease("worker-c") is None
+    assert queue.jobs(status="failed")[0]["error"] == "Chrome не запустился"